@@ -0,0 +1,27 @@
+"""
+These are Respite's benchmarks. You may run them with::
+
+    $ make benchmark
+
+"""
+
+import timeit
+
+from django.core.management import call_command
+
+def setup():
+    """Setup the benchmark environment."""
+    call_command('syncdb', interactive=False, verbosity=0)
+
+def report(name, function, number=1, repeat=3):
+    """
+    Time the given function and print the best time per call.
+
+    :param name: A string describing the benchmark.
+    :param function: A function to time.
+    :param number: An integer describing how many times to call the function per repetition.
+    :param repeat: An integer describing how many times to repeat the timing.
+    """
+    seconds = min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+    print '%-60s %10.2f ms' % (name, seconds * 1000)
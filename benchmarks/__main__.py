@@ -0,0 +1,18 @@
+from benchmarks import setup
+from benchmarks import bench_xml
+from benchmarks import bench_fragments
+from benchmarks import bench_memo
+from benchmarks import bench_msgpack
+from benchmarks import bench_negotiation
+from benchmarks import bench_templates
+from benchmarks import bench_conditional
+from benchmarks import bench_responses
+from benchmarks import bench_pagination
+from benchmarks import bench_bulk
+
+setup()
+
+for benchmark in [bench_xml, bench_fragments, bench_memo, bench_msgpack, bench_negotiation, bench_templates, bench_conditional, bench_responses, bench_pagination, bench_bulk]:
+    print benchmark.__doc__.strip()
+    benchmark.run()
+    print
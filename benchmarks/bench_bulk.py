@@ -0,0 +1,39 @@
+"""Creation of 200 articles by a request each and by a single bulk request."""
+
+import json
+
+from django.test.client import RequestFactory
+
+from respite import Views, Resource
+from respite.middleware import JsonMiddleware
+
+from tests.project.app.models import Article, Author
+
+from benchmarks import report
+
+class ArticleViews(Views, Resource):
+    model = Article
+    supported_formats = ['json']
+    cache_fragments = False
+    bulk = True
+
+def post(data):
+    request = RequestFactory().post('/articles.json', json.dumps(data), content_type='application/json')
+    JsonMiddleware().process_request(request)
+
+    return ArticleViews().create(request)
+
+def run():
+    author = Author.objects.create(name='Author')
+
+    articles = [
+        {'title': 'Title %d' % i, 'content': 'Content', 'author': author.id, 'created_at': '1970-01-01 00:00:00'}
+        for i in range(200)
+    ]
+
+    def create_one_by_one():
+        for article in articles:
+            post(article)
+
+    report('A request per article', create_one_by_one)
+    report('A bulk request', lambda: post(articles))
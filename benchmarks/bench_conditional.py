@@ -0,0 +1,35 @@
+"""Responses to 10 requests for 1000 articles by 20 authors, with and without conditional requests."""
+
+from django.test.client import RequestFactory
+
+from respite import Views, Resource
+
+from tests.project.app.models import Article
+
+from benchmarks import report
+from benchmarks.bench_memo import populate
+
+class ArticleViews(Views, Resource):
+    model = Article
+    supported_formats = ['json']
+    cache_fragments = False
+
+class ConditionalArticleViews(ArticleViews):
+    last_modified_field = 'created_at'
+
+def run():
+    Article.objects.all().delete()
+
+    populate(1000, 20)
+
+    etag = ConditionalArticleViews().index(RequestFactory().get('/articles.json'))['ETag']
+
+    def get(views, **headers):
+        for i in range(10):
+            response = views.index(RequestFactory().get('/articles.json', **headers))
+
+            if not response.streaming:
+                response.content
+
+    report('Unconditional requests', lambda: get(ArticleViews()))
+    report('Conditional requests for unchanged articles', lambda: get(ConditionalArticleViews(), HTTP_IF_NONE_MATCH=etag))
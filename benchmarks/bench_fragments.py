@@ -0,0 +1,41 @@
+"""Serialization of 1000 articles with and without cached fragments."""
+
+from datetime import datetime
+
+from django.core.cache import get_cache
+from django.test.client import RequestFactory
+
+from respite.serializers.jsonserializer import JSONSerializer
+
+from tests.project.app.models import Article, Author, Tag
+
+from benchmarks import report
+
+def populate(articles):
+    """Create the given number of articles, each with an author and two tags."""
+    tags = [Tag.objects.create(name='tag %d' % i) for i in range(10)]
+
+    for i in range(articles):
+        article = Article.objects.create(
+            title = 'Title %d' % i,
+            content = 'Content ' * 50,
+            author = Author.objects.create(name='Author %d' % i),
+            created_at = datetime(1970, 1, 1)
+        )
+
+        article.tags.add(tags[i % 10], tags[(i + 1) % 10])
+
+def run():
+    request = RequestFactory().get('/')
+    cache = get_cache('django.core.cache.backends.locmem.LocMemCache', OPTIONS={'MAX_ENTRIES': 10000})
+
+    populate(1000)
+
+    def serialize(cache=None):
+        return JSONSerializer(Article.objects.all(), cache=cache).serialize(request)
+
+    assert serialize() == serialize(cache) == serialize(cache)
+
+    report('Uncached', serialize)
+    report('Cached, cold', lambda: cache.clear() or serialize(cache))
+    report('Cached, warm', lambda: serialize(cache))
@@ -0,0 +1,61 @@
+"""
+Serialization of 1000 articles by 20 authors, with and without memoization of embedded models, with their
+relations expanded and as primary keys (as ``Resource`` serializes them unless relations are expanded).
+"""
+
+from datetime import datetime
+
+from django.test.client import RequestFactory
+
+from respite.serializers.jsonserializer import JSONSerializer
+from respite.serializers.xmlserializer import XMLSerializer
+
+from tests.project.app.models import Article, Author, Tag
+
+from benchmarks import report
+
+class UnmemoizedJSONSerializer(JSONSerializer):
+    """A JSON serializer that serializes embedded models anew every time."""
+
+    def _serialize_model(self, model, plan):
+        return self._build_model(model, plan)
+
+class UnmemoizedXMLSerializer(XMLSerializer):
+    """An XML serializer that serializes embedded models anew every time."""
+
+    def _serialize_model(self, model, plan):
+        return self._build_model(model, plan)
+
+def populate(articles, authors):
+    """Create the given number of articles by the given number of authors, each with two tags."""
+    authors = [Author.objects.create(name='Author %d' % i) for i in range(authors)]
+    tags = [Tag.objects.create(name='Tag %d' % i) for i in range(10)]
+
+    for i in range(articles):
+        article = Article.objects.create(
+            title = 'Title %d' % i,
+            content = 'Content',
+            author = authors[i % len(authors)],
+            created_at = datetime(1970, 1, 1)
+        )
+
+        article.tags.add(tags[i % 10], tags[(i + 1) % 10])
+
+def run():
+    request = RequestFactory().get('/')
+
+    Article.objects.all().delete()
+
+    populate(1000, 20)
+
+    # Load the articles once, so that only their serialization is timed.
+    articles = list(Article.objects.select_related('author').prefetch_related('tags'))
+
+    for serializer, baseline in [(JSONSerializer, UnmemoizedJSONSerializer), (XMLSerializer, UnmemoizedXMLSerializer)]:
+        assert serializer(articles).serialize(request) == baseline(articles).serialize(request)
+
+        report(baseline.__name__, lambda: baseline(articles).serialize(request))
+        report(serializer.__name__, lambda: serializer(articles).serialize(request))
+
+        report('%s without expansion' % baseline.__name__, lambda: baseline(articles, expand={}).serialize(request))
+        report('%s without expansion' % serializer.__name__, lambda: serializer(articles, expand={}).serialize(request))
@@ -0,0 +1,30 @@
+"""Size and speed of MessagePack and JSON for 1000 articles with their authors and tags."""
+
+from django.test.client import RequestFactory
+
+from respite.serializers.base import Serializer
+from respite.serializers import jsonbackends, messagepack
+
+from tests.project.app.models import Article
+
+from benchmarks import report
+
+def run():
+    request = RequestFactory().get('/')
+
+    data = Serializer(Article.objects.all()[:1000]).serialize(request)
+
+    backend = jsonbackends.get()
+
+    string = backend.dumps(data).encode('utf-8')
+    binary = messagepack.packb(data)
+
+    assert messagepack.unpackb(binary) == backend.loads(string, 'utf-8')
+
+    print '%-60s %10d bytes' % ('JSON (%s), size' % backend.name, len(string))
+    print '%-60s %10d bytes' % ('MessagePack, size', len(binary))
+
+    report('JSON (%s), encoding' % backend.name, lambda: backend.dumps(data).encode('utf-8'))
+    report('MessagePack, encoding', lambda: messagepack.packb(data))
+    report('JSON (%s), decoding' % backend.name, lambda: backend.loads(string, 'utf-8'))
+    report('MessagePack, decoding', lambda: messagepack.unpackb(binary))
@@ -0,0 +1,57 @@
+"""Negotiation of 10000 requests among 300 distinct HTTP Accept headers."""
+
+import random
+
+from respite import formats
+from respite import negotiation
+from respite.negotiation import Negotiator
+from respite.utils import parse_http_accept_header
+
+from benchmarks import report
+
+SUPPORTED_FORMATS = ['html', 'json', 'xml']
+
+def linear_negotiate(supported_formats, accept):
+    """The negotiation of Respite 1.4, which only considers HTTP Accept headers with a single media range."""
+    supported_formats = [formats.find(format) for format in supported_formats]
+
+    content_types = parse_http_accept_header(accept)
+
+    if len(content_types) == 1:
+        if content_types[0] == '*/*':
+            return supported_formats[0]
+
+        try:
+            format = formats.find_by_content_type(content_types[0])
+        except formats.UnknownFormat:
+            return None
+
+        return format if format in supported_formats else None
+
+    return formats.find('html')
+
+def run():
+    random.seed(0)
+
+    media_ranges = ['text/html', 'application/xhtml+xml', 'application/json', 'application/xml', 'text/*', 'image/png']
+
+    accepts = []
+    for i in range(300):
+        accepts.append(', '.join(
+            '%s;q=0.%d' % (media_range, random.randint(1, 9))
+            for media_range in random.sample(media_ranges, random.randint(1, 4))
+        ) + ', */*;q=0.%02d' % i)
+
+    requests = [random.choice(accepts) for i in range(10000)]
+
+    def negotiate():
+        for accept in requests:
+            negotiation.negotiate(SUPPORTED_FORMATS, None, accept)
+
+    def uncached_negotiate():
+        for accept in requests:
+            Negotiator(SUPPORTED_FORMATS).negotiate(None, accept)
+
+    report('Respite 1.4 (single media ranges only)', lambda: [linear_negotiate(SUPPORTED_FORMATS, accept) for accept in requests])
+    report('Negotiator, uncached', uncached_negotiate)
+    report('Negotiator, cached', negotiate)
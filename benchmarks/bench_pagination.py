@@ -0,0 +1,30 @@
+"""Loading the last page of 20 of 20000 articles by keyset and by offset, 100 times."""
+
+from datetime import datetime, timedelta
+
+from respite import pagination
+
+from tests.project.app.models import Article, Author
+
+from benchmarks import report
+
+def run():
+    Article.objects.all().delete()
+
+    author = Author.objects.create(name='Author')
+
+    Article.objects.bulk_create([
+        Article(title='Title %d' % i, content='Content', author=author, created_at=datetime(1970, 1, 1) + timedelta(minutes=i))
+        for i in range(20000)
+    ])
+
+    last = list(Article.objects.order_by('-created_at', '-pk')[19980:19981])[0]
+    keyset_cursor = pagination.encode_cursor(['next', unicode(last.created_at), last.pk])
+    offset_cursor = pagination.encode_cursor(['offset', 19980])
+
+    def paginate(function, *args):
+        for i in range(100):
+            list(function(*args)[0])
+
+    report('Offset', lambda: paginate(pagination.paginate_by_offset, Article.objects.order_by('-created_at', '-pk'), 20, offset_cursor))
+    report('Keyset', lambda: paginate(pagination.paginate_by_keyset, Article.objects.all(), 20, '-created_at', keyset_cursor))
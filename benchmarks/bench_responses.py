@@ -0,0 +1,34 @@
+"""Responses to 10 requests for 1000 articles by 20 authors, with and without caching responses."""
+
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+
+from respite import Views, Resource
+
+from tests.project.app.models import Article
+
+from benchmarks import report
+from benchmarks.bench_memo import populate
+
+class ArticleViews(Views, Resource):
+    model = Article
+    supported_formats = ['json']
+    cache_fragments = False
+    compression_encodings = ['gzip']
+
+class CachedArticleViews(ArticleViews):
+    cache_responses = True
+
+def run():
+    Article.objects.all().delete()
+
+    populate(1000, 20)
+
+    def get(views):
+        for i in range(10):
+            views.index(RequestFactory().get('/articles.json', HTTP_ACCEPT_ENCODING='gzip')).content
+
+    report('Uncached responses', lambda: get(ArticleViews()))
+
+    with override_settings(RESPITE_RESPONSE_CACHE='default'):
+        report('Cached responses', lambda: get(CachedArticleViews()))
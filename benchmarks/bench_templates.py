@@ -0,0 +1,29 @@
+"""Rendering of 1000 JSON responses for a template that doesn't exist, with and without remembering so."""
+
+from django.test.client import RequestFactory
+
+from respite import Views, templating
+
+from benchmarks import report
+
+class ItemViews(Views):
+    supported_formats = ['json']
+
+    def index(self, request):
+        return self._render(request, template='items/index', context={'items': ['item']})
+
+def run():
+    request = RequestFactory().get('/items.json')
+    views = ItemViews()
+
+    def render(remember):
+        for i in range(1000):
+            if not remember:
+                templating.invalidate()
+
+            views.index(request)
+
+    report('Template lookup for every request', lambda: render(False))
+    report('Missing template remembered', lambda: render(True))
+
+    templating.invalidate()
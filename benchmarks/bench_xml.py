@@ -0,0 +1,71 @@
+"""XML serialization of documents with 10k and 100k elements."""
+
+from xml.etree import ElementTree as ET
+
+from django.test.client import RequestFactory
+
+from respite.inflector import singularize
+from respite.serializers.base import Serializer
+from respite.serializers.xmlserializer import XMLSerializer
+
+from benchmarks import report
+
+class ElementTreeXMLSerializer(Serializer):
+    """The XML serializer of Respite 1.4, which builds an element tree in memory."""
+
+    def serialize(self, request):
+        data = super(ElementTreeXMLSerializer, self).serialize(request)
+
+        root = ET.Element('response')
+
+        def serialize(key, value):
+            element = ET.Element(key)
+
+            if isinstance(value, bool):
+                element.text = 'true' if value else 'false'
+            elif isinstance(value, basestring):
+                element.text = value
+            elif isinstance(value, list):
+                for item in value:
+                    element.append(serialize(singularize(key), item))
+            elif isinstance(value, dict):
+                for subelement_key, subelement_value in value.items():
+                    element.append(serialize(subelement_key, subelement_value))
+            elif isinstance(value, int):
+                element.text = '%s' % value
+            elif value is None:
+                element.text = ''
+
+            return element
+
+        root.append(serialize('items', data))
+
+        return '<?xml version="1.0" encoding="UTF-8"?>' + ET.tostring(root)
+
+def document(elements):
+    """Return a document of roughly the given number of elements."""
+    return {
+        'articles': [
+            {
+                'id': i,
+                'title': u'Title & subtitle',
+                'content': u'Content <with> markup and non-ASCII characters: \xe6\xf8\xe5',
+                'is_published': bool(i % 2),
+                'created_at': '1970-01-01T00:00:00',
+                'author': None,
+                'tags': [1, 2]
+            } for i in range(elements / 10)
+        ]
+    }
+
+def run():
+    request = RequestFactory().get('/')
+
+    for elements in [10000, 100000]:
+        data = document(elements)
+
+        assert XMLSerializer(data).serialize(request) == ElementTreeXMLSerializer(data).serialize(request)
+
+        report('ElementTree, %d elements' % elements, lambda: ElementTreeXMLSerializer(data).serialize(request))
+        report('XMLSerializer, %d elements' % elements, lambda: XMLSerializer(data).serialize(request))
+        report('XMLSerializer (streamed), %d elements' % elements, lambda: list(XMLSerializer(data).stream(request)))
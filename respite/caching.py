@@ -0,0 +1,303 @@
+"""
+Caching of the serialized fragments of models, of whole responses and of the number of objects in querysets.
+
+Each model instance is cached in the backend given in ``RESPITE_FRAGMENT_CACHE`` as a dictionary
+of variants (i.e. serializers and fields) and their fragments. A fragment is valid for as long as
+its version token (the model's ``version`` field or the first of its dates that are set automatically
+upon saving) and the generations of the models it embeds remain the same.
+
+Fragments are invalidated as models are saved, deleted or have their many-to-many relations changed,
+and the generation of their model is advanced so that the fragments of any models that embed them
+are invalidated too.
+
+Responses of resources that opt in (see ``Resource.cache_responses``) are cached in the backend given
+in ``RESPITE_RESPONSE_CACHE`` along with the generations of the models they represent, and are valid
+for as long as those generations remain the same.
+"""
+
+import time
+import hashlib
+
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.test.signals import setting_changed
+
+from respite.settings import FRAGMENT_CACHE, RESPONSE_CACHE
+
+# The instances of the configured cache backends.
+_cache = None
+_response_cache = None
+
+def get_cache():
+    """Return the configured cache backend, or ``None`` if fragments are not to be cached."""
+    global _cache
+
+    if _cache is None and FRAGMENT_CACHE:
+        from django.core.cache import get_cache
+
+        _cache = get_cache(FRAGMENT_CACHE)
+
+    return _cache
+
+def get_response_cache():
+    """Return the configured cache backend for responses, or ``None`` if responses are not to be cached."""
+    global _response_cache
+
+    if RESPONSE_CACHE == FRAGMENT_CACHE:
+        return get_cache()
+
+    if _response_cache is None and RESPONSE_CACHE:
+        from django.core.cache import get_cache as get_backend
+
+        _response_cache = get_backend(RESPONSE_CACHE)
+
+    return _response_cache
+
+def get_caches():
+    """Return a list of the configured cache backends, whose generations must be advanced as models change."""
+    caches = []
+
+    for cache in [get_cache(), get_response_cache()]:
+        if cache is not None and cache not in caches:
+            caches.append(cache)
+
+    return caches
+
+def get_label(model):
+    """Return a string describing the given model class (or the concrete model it is a proxy for)."""
+    meta = model._meta.concrete_model._meta
+
+    return '%s.%s' % (meta.app_label, meta.object_name.lower())
+
+def get_fragment_key(model, pk):
+    """Return a string describing the cache key of fragments of the given model and primary key."""
+    return 'respite:fragment:%s:%s' % (get_label(model), pk)
+
+def get_response_key(key):
+    """Return a string describing the cache key of the response with the given key."""
+    return 'respite:response:%s' % hashlib.md5(key).hexdigest()
+
+def get_generation_key(model):
+    """Return a string describing the cache key of the generation of the given model."""
+    return 'respite:generation:%s' % get_label(model)
+
+def get_generations(cache, models, values):
+    """
+    Return a tuple of the generations of the given models.
+
+    :param cache: A cache backend.
+    :param models: A list of model classes.
+    :param values: A dictionary of cache keys and values already loaded from the cache.
+    """
+    generations = []
+
+    for model in models:
+        key = get_generation_key(model)
+
+        try:
+            generation = values[key]
+        except KeyError:
+            # Generations begin at the time they are first needed so that they don't repeat
+            # themselves when the cache is cleared.
+            generation = int(time.time() * 1000000)
+
+            if not cache.add(key, generation, None):
+                generation = cache.get(key, generation)
+
+        generations.append(generation)
+
+    return tuple(generations)
+
+def bump_generation(cache, model):
+    """Advance the generation of the given model, invalidating the fragments of models that embed it."""
+    key = get_generation_key(model)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000000), None)
+
+def get_version(plan, instance):
+    """Return the version token of the given instance, or ``None`` if its model has none."""
+    if plan.version_field:
+        return getattr(instance, plan.version_field)
+
+def get_fragments(cache, plan, variant, instances):
+    """
+    Find the cached fragments of the given instances.
+
+    Returns a tuple of a dictionary of primary keys and fragments of instances that were found,
+    and the state to pass to ``set_fragments`` to cache the rest.
+
+    :param cache: A cache backend.
+    :param plan: A ``respite.serializers.plans.Plan`` instance for the model of the instances.
+    :param variant: A string describing the serializer and fields the fragments were serialized with.
+    :param instances: A list of model instances.
+    """
+    keys = [get_fragment_key(plan.model, instance.pk) for instance in instances]
+    related_models = plan.related_models()
+
+    values = cache.get_many(keys + [get_generation_key(model) for model in related_models])
+    generations = get_generations(cache, related_models, values)
+
+    fragments = {}
+    for key, instance in zip(keys, instances):
+        try:
+            entry_generations, version, fragment = values[key][variant]
+        except KeyError:
+            continue
+
+        if entry_generations == generations and version == get_version(plan, instance):
+            fragments[instance.pk] = fragment
+
+    return fragments, (values, generations)
+
+def set_fragments(cache, plan, variant, fragments, state):
+    """
+    Cache the given fragments.
+
+    :param cache: A cache backend.
+    :param plan: A ``respite.serializers.plans.Plan`` instance for the model of the instances.
+    :param variant: A string describing the serializer and fields the fragments were serialized with.
+    :param fragments: A list of tuples of model instances and their fragments.
+    :param state: The state returned by ``get_fragments``.
+    """
+    values, generations = state
+
+    entries = {}
+    for instance, fragment in fragments:
+        key = get_fragment_key(plan.model, instance.pk)
+
+        entry = dict(values.get(key) or {})
+        entry[variant] = (generations, get_version(plan, instance), fragment)
+
+        entries[key] = entry
+
+    if entries:
+        cache.set_many(entries)
+
+def get_response(cache, models, key):
+    """
+    Find the cached response with the given key.
+
+    Returns a tuple of the response that was found (or ``None``) and the state to pass to ``set_response``
+    to cache it.
+
+    :param cache: A cache backend.
+    :param models: A list of the model classes the response represents.
+    :param key: A string describing the request (e.g. its path, format and query parameters).
+    """
+    response_key = get_response_key(key)
+
+    values = cache.get_many([response_key] + [get_generation_key(model) for model in models])
+    generations = get_generations(cache, models, values)
+
+    try:
+        entry_generations, response = values[response_key]
+    except KeyError:
+        response = None
+    else:
+        if entry_generations != generations:
+            response = None
+
+    return response, generations
+
+def set_response(cache, key, response, state, timeout=None):
+    """
+    Cache the given response.
+
+    :param cache: A cache backend.
+    :param key: A string describing the request (see ``get_response``).
+    :param response: Simple data types describing the response (e.g. a tuple of its status, content and headers).
+    :param state: The state returned by ``get_response``.
+    :param timeout: An integer describing the number of seconds to cache the response for, or ``None``
+                    for the default timeout of the cache backend.
+    """
+    if timeout is None:
+        cache.set(get_response_key(key), (state, response))
+    else:
+        cache.set(get_response_key(key), (state, response), timeout)
+
+def get_count(cache, queryset):
+    """
+    Return the number of objects in the given queryset, counting them only if the cached count is out of date.
+
+    :param cache: A cache backend.
+    :param queryset: A queryset.
+    """
+    key = 'respite:count:%s' % hashlib.md5(repr(queryset.query.sql_with_params())).hexdigest()
+
+    values = cache.get_many([key, get_generation_key(queryset.model)])
+    generations = get_generations(cache, [queryset.model], values)
+
+    try:
+        entry_generations, count = values[key]
+    except KeyError:
+        pass
+    else:
+        if entry_generations == generations:
+            return count
+
+    count = queryset.count()
+
+    cache.set(key, (generations, count))
+
+    return count
+
+def invalidate(sender, instance, **kwargs):
+    """Invalidate the fragments and responses of the given instance as it is saved or deleted."""
+    cache = get_cache()
+
+    if cache is not None:
+        cache.delete(get_fragment_key(sender, instance.pk))
+
+    for cache in get_caches():
+        bump_generation(cache, sender)
+
+def invalidate_many_to_many(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Invalidate the fragments and responses of the models whose many-to-many relations are changed."""
+    if reverse:
+        # The instance is on the far side of the relation, so it's the other models that change.
+        if action == 'pre_clear':
+            field = [field for field in model._meta.many_to_many if field.rel.through is sender][0]
+            pk_set = model._default_manager.filter(**{field.name: instance}).values_list('pk', flat=True)
+        elif action not in ('post_add', 'post_remove'):
+            return
+
+        changed_model, keys = model, [get_fragment_key(model, pk) for pk in pk_set]
+    else:
+        if action not in ('post_add', 'post_remove', 'post_clear'):
+            return
+
+        changed_model, keys = instance.__class__, [get_fragment_key(instance.__class__, instance.pk)]
+
+    cache = get_cache()
+
+    if cache is not None:
+        cache.delete_many(keys)
+
+    for cache in get_caches():
+        bump_generation(cache, changed_model)
+
+def connect():
+    """Invalidate fragments and responses as models change, if any are to be cached."""
+    if FRAGMENT_CACHE or RESPONSE_CACHE:
+        post_save.connect(invalidate, dispatch_uid='respite.caching.invalidate')
+        post_delete.connect(invalidate, dispatch_uid='respite.caching.invalidate')
+        m2m_changed.connect(invalidate_many_to_many, dispatch_uid='respite.caching.invalidate_many_to_many')
+
+def reconfigure(setting, value, **kwargs):
+    """Forget the configured cache backends as the settings that name them change (e.g. in tests)."""
+    global FRAGMENT_CACHE, RESPONSE_CACHE, _cache, _response_cache
+
+    if setting == 'RESPITE_FRAGMENT_CACHE':
+        FRAGMENT_CACHE, _cache = value, None
+    elif setting == 'RESPITE_RESPONSE_CACHE':
+        RESPONSE_CACHE, _response_cache = value, None
+    else:
+        return
+
+    connect()
+
+connect()
+
+setting_changed.connect(reconfigure, dispatch_uid='respite.caching.reconfigure')
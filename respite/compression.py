@@ -0,0 +1,153 @@
+"""
+Content codings that responses may be compressed with.
+
+Respite compresses responses with the most preferred of the codings given in ``Views.compression_encodings``
+(``RESPITE_COMPRESSION_ENCODINGS`` by default) that the client accepts. Streamed responses are compressed
+chunk by chunk, and each chunk is flushed so that the client may decompress it as soon as it arrives.
+
+Responses aren't compressed unless you list codings, since compressing responses that carry secrets
+(e.g. CSRF tokens in HTML) alongside input from the request exposes the secrets to attacks like BREACH.
+"""
+
+import zlib
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from .lib.ordereddict import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from respite.utils import parse_accept_encoding_header
+
+class Coding(object):
+    """
+    Base class for content codings, whose instances compress a single body.
+
+    :attribute name: A string describing the name of the coding in the HTTP Content-Encoding header.
+    """
+    name = None
+
+    @classmethod
+    def is_available(cls):
+        """Determine whether the coding is installed."""
+        return True
+
+    def compress(self, string):
+        """Compress the given string, returning as much of the compressed body as is ready."""
+        raise NotImplementedError
+
+    def flush(self):
+        """Return the rest of the compressed body so far, so that it may be decompressed as it is."""
+        raise NotImplementedError
+
+    def finish(self):
+        """Return the rest of the compressed body."""
+        raise NotImplementedError
+
+class GzipCoding(Coding):
+    """A coding that compresses bodies with ``zlib`` in the gzip format."""
+    name = 'gzip'
+    wbits = 16 + zlib.MAX_WBITS
+
+    def __init__(self):
+        self.compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, self.wbits)
+
+    def compress(self, string):
+        return self.compressor.compress(string)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush(zlib.Z_FINISH)
+
+class DeflateCoding(GzipCoding):
+    """A coding that compresses bodies with ``zlib`` in the zlib format, which HTTP calls 'deflate'."""
+    name = 'deflate'
+    wbits = zlib.MAX_WBITS
+
+class BrotliCoding(Coding):
+    """A coding that compresses bodies with ``brotli``."""
+    name = 'br'
+
+    @classmethod
+    def is_available(cls):
+        return brotli is not None
+
+    def __init__(self):
+        self.compressor = brotli.Compressor()
+
+    def compress(self, string):
+        return self.compressor.process(string)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+# Codings by name.
+CODINGS = OrderedDict()
+
+def register(coding):
+    """
+    Register a coding.
+
+    :param coding: A subclass of ``Coding``.
+    """
+    CODINGS[coding.name] = coding
+
+for coding in [BrotliCoding, GzipCoding, DeflateCoding]:
+    register(coding)
+
+def negotiate(header, encodings):
+    """
+    Find and return the coding to compress a response with, or ``None`` if it shouldn't be compressed.
+
+    :param header: A string describing the contents of the HTTP Accept-Encoding header.
+    :param encodings: A list of strings describing the names of codings in order of preference.
+
+    Codings the client accepts with a higher quality are preferred over codings that come first in
+    ``encodings``, which in turn are preferred over those that come later.
+    """
+    accepted = parse_accept_encoding_header(header)
+
+    best, best_quality = None, 0
+
+    for name in encodings:
+        quality = accepted.get(name, accepted.get('*', 0))
+
+        if quality > best_quality and name in CODINGS and CODINGS[name].is_available():
+            best, best_quality = CODINGS[name], quality
+
+    return best
+
+def compress(string, coding):
+    """
+    Compress the given string.
+
+    :param string: A byte string.
+    :param coding: A subclass of ``Coding``.
+    """
+    compressor = coding()
+
+    return compressor.compress(string) + compressor.finish()
+
+def compress_stream(strings, coding):
+    """
+    Compress the given strings incrementally, yielding the compressed body of each in turn.
+
+    :param strings: An iterable of byte strings.
+    :param coding: A subclass of ``Coding``.
+    """
+    compressor = coding()
+
+    for string in strings:
+        if string:
+            yield compressor.compress(string) + compressor.flush()
+
+    yield compressor.finish()
@@ -21,6 +21,21 @@ def override_supported_formats(formats):
         return wrapper
     return decorator
 
+def override_streaming_formats(formats):
+    """
+    Override the views class' streaming formats for the decorated function.
+
+    Arguments:
+    formats -- A list of strings describing formats, e.g. ``['json']``.
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(self, *args, **kwargs):
+            self.streaming_formats = formats
+            return function(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
 def route(regex, method, name):
     """
     Route the decorated view.
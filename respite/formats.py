@@ -1,9 +1,11 @@
+from django.dispatch import Signal
+
 class Format(object):
     """
     A format represents a file format.
     """
 
-    def __init__(self, name, acronym, extensions, content_types, default_encoding=None):
+    def __init__(self, name, acronym, extensions, content_types, default_encoding=None, binary=False):
         """
         Initialize a new format.
 
@@ -12,6 +14,7 @@ class Format(object):
         :param extensions: A list of strings describing the extensions of the format (e.g. 'html').
         :param content_types: A list of strings describing the internet media type* of the format (e.g. 'text/html').
         :param default_encoding: A string describing the default encoding of this format.
+        :param binary: A boolean describing whether the format is binary rather than text.
 
         * http://www.iana.org/assignments/media-types/index.html
         """
@@ -20,6 +23,7 @@ class Format(object):
         self.extensions = extensions
         self.content_types = content_types
         self.default_encoding = default_encoding
+        self.binary = binary
 
     @property
     def extension(self):
@@ -34,13 +38,162 @@ class Format(object):
     def __str__(self):
         return self.name
 
-FORMATS = [
+# Sent whenever a format is registered (e.g. for negotiated formats to be forgotten).
+registered = Signal(providing_args=['format'])
+
+class Registry(object):
+    """
+    A registry of formats, indexed by their names, acronyms, extensions and content types.
+
+    :attribute formats: A list of 'Format' instances in the order they were registered.
+    :attribute serializers: A dictionary of formats and the serializers of that format.
+    :attribute parsers: A dictionary of formats and functions that parse request bodies in that format,
+                        given the body and its encoding.
+    """
+
+    def __init__(self):
+        self.formats = []
+        self.serializers = {}
+        self.parsers = {}
+
+        self._identifiers = {}
+        self._names = {}
+        self._extensions = {}
+        self._content_types = {}
+
+    def register(self, format, serializer=None, parser=None):
+        """
+        Register a format, replacing any format that was registered with the same identifiers before.
+
+        :param format: A 'Format' instance.
+        :param serializer: A subclass of ``respite.serializers.base.Serializer``, or ``None``.
+        :param parser: A function that accepts a request body and its encoding and returns simple data
+                       types (e.g. lists, dictionaries, strings), or ``None``.
+        """
+        replaced = [other for other in self.formats if other is not format and self._collides(format, other)]
+
+        if format not in self.formats:
+            if replaced:
+                self.formats.insert(self.formats.index(replaced[0]), format)
+            else:
+                self.formats.append(format)
+
+        for other in replaced:
+            self._forget(other)
+
+        for identifier in [format.name, format.acronym] + format.extensions:
+            self._identifiers[identifier] = format
+
+        self._names[format.name] = format
+
+        for extension in format.extensions:
+            self._extensions[extension] = format
+
+        for content_type in format.content_types:
+            self._content_types[content_type] = format
+
+        if serializer:
+            self.serializers[format] = serializer
+
+        if parser:
+            self.parsers[format] = parser
+
+        registered.send(sender=self, format=format)
+
+    def _collides(self, format, other):
+        """Determine whether the given formats share a name, acronym, extension or content type."""
+        identifiers = set([format.name, format.acronym] + format.extensions + format.content_types)
+
+        return bool(identifiers.intersection([other.name, other.acronym] + other.extensions + other.content_types))
+
+    def _forget(self, format):
+        """Remove the given format and its serializer and parser from the registry."""
+        self.formats.remove(format)
+
+        for index in [self._identifiers, self._names, self._extensions, self._content_types]:
+            for key, value in index.items():
+                if value is format:
+                    del index[key]
+
+        self.serializers.pop(format, None)
+        self.parsers.pop(format, None)
+
+    def find(self, identifier):
+        """
+        Find and return a format by name, acronym or extension.
+
+        :param identifier: A string describing the format.
+        """
+        try:
+            return self._identifiers[identifier]
+        except KeyError:
+            raise UnknownFormat('No format found with name, acronym or extension "%s"' % identifier)
+
+    def find_by_name(self, name):
+        """
+        Find and return a format by name.
+
+        :param name: A string describing the name of the format.
+        """
+        try:
+            return self._names[name]
+        except KeyError:
+            raise UnknownFormat('No format found with name "%s"' % name)
+
+    def find_by_extension(self, extension):
+        """
+        Find and return a format by extension.
+
+        :param extension: A string describing the extension of the format.
+        """
+        try:
+            return self._extensions[extension]
+        except KeyError:
+            raise UnknownFormat('No format found with extension "%s"' % extension)
+
+    def find_by_content_type(self, content_type):
+        """
+        Find and return a format by content type.
+
+        :param content_type: A string describing the internet media type of the format.
+        """
+        try:
+            return self._content_types[content_type]
+        except KeyError:
+            raise UnknownFormat('No format found with content type "%s"' % content_type)
+
+registry = Registry()
+
+for format in [
     Format('HyperText Markup Language', 'HTML', ['html'], ['text/html']),
     Format('Extensible Markup Language', 'XML', ['xml'], ['application/xml', 'text/xml']),
     Format('JavaScript Object Notation', 'JSON', ['json'], ['application/json'], 'UTF-8'),
     Format('JavaScript', 'JS', ['js'], ['application/javascript'], 'UTF-8'),
-    Format('Yet Another Markup Language', 'YAML', ['yaml'], ['application/x-yaml'])
-]
+    Format('Yet Another Markup Language', 'YAML', ['yaml'], ['application/x-yaml']),
+    Format('MessagePack', 'MSGPACK', ['msgpack'], ['application/msgpack', 'application/x-msgpack'], binary=True),
+    Format('Comma-Separated Values', 'CSV', ['csv'], ['text/csv'], 'UTF-8'),
+    Format('Newline-Delimited JSON', 'NDJSON', ['ndjson'], ['application/x-ndjson'], 'UTF-8')
+]:
+    registry.register(format)
+
+# Formats in the order they were registered.
+FORMATS = registry.formats
+
+def register(format, serializer=None, parser=None):
+    """
+    Register a format (see ``Registry.register``).
+
+    Example usage::
+
+        from respite import formats
+
+        formats.register(
+            format = formats.Format('Tab-Separated Values', 'TSV', ['tsv'], ['text/tab-separated-values']),
+            serializer = TSVSerializer,
+            parser = parse_tsv
+        )
+    """
+    registry.register(format, serializer, parser)
 
 def find(identifier):
     """
@@ -48,11 +201,7 @@ def find(identifier):
 
     :param identifier: A string describing the format.
     """
-    for format in FORMATS:
-        if identifier in [format.name, format.acronym, format.extension]:
-            return format
-
-    raise UnknownFormat('No format found with name, acronym or extension "%s"' % identifier)
+    return registry.find(identifier)
 
 def find_by_name(name):
     """
@@ -60,11 +209,7 @@ def find_by_name(name):
 
     :param name: A string describing the name of the format.
     """
-    for format in FORMATS:
-        if name == format.name:
-            return format
-
-    raise UnknownFormat('No format found with name "%s"' % name)
+    return registry.find_by_name(name)
 
 def find_by_extension(extension):
     """
@@ -72,11 +217,7 @@ def find_by_extension(extension):
 
     :param extension: A string describing the extension of the format.
     """
-    for format in FORMATS:
-        if extension in format.extensions:
-            return format
-
-    raise UnknownFormat('No format found with extension "%s"' % extension)
+    return registry.find_by_extension(extension)
 
 def find_by_content_type(content_type):
     """
@@ -84,11 +225,7 @@ def find_by_content_type(content_type):
 
     :param content_type: A string describing the internet media type of the format.
     """
-    for format in FORMATS:
-        if content_type in format.content_types:
-            return format
-
-    raise UnknownFormat('No format found with content type "%s"' % content_type)
+    return registry.find_by_content_type(content_type)
 
 class UnknownFormat(Exception):
     pass
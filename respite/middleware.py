@@ -1,10 +1,10 @@
 import re
-import json
 
 from urllib import urlencode
 
 from django.http import QueryDict
 
+from respite import formats, serializers
 from respite.utils import parse_content_type, parse_multipart_data
 from respite.utils.datastructures import NestedQueryDict
 
@@ -60,17 +60,51 @@ class HttpPatchMiddleware:
             else:
                 request.PATCH = QueryDict(request.body)
 
-class JsonMiddleware:
+class ParserMiddleware:
     """
-    Parse JSON in POST, PUT and PATCH requests.
+    Parse POST, PUT, PATCH and DELETE requests in the formats that have parsers (see ``respite.formats.register``).
+
+    Parsed bodies are given in ``request.data``. Bodies that describe a dictionary are given in the attribute
+    of the request's method (e.g. ``request.POST``) as well, as a ``NestedQueryDict`` instance. Bodies that
+    describe a list (e.g. of objects to create in bulk) are parsed as a list of their items, in which
+    dictionaries are parsed as ``NestedQueryDict`` instances, and leave the attribute of the method empty,
+    since Django (e.g. ``CsrfViewMiddleware``) expects it to be a dictionary.
+
+    :attribute formats: A list of strings describing the formats to parse, or ``None`` for all of them.
     """
+    formats = None
 
     def process_request(self, request):
         if 'CONTENT_TYPE' in request.META:
             content_type, encoding = parse_content_type(request.META['CONTENT_TYPE'])
 
-            if content_type == 'application/json':
-                data = json.loads(request.body, encoding)
+            try:
+                format = formats.find_by_content_type(content_type)
+                parser = formats.registry.parsers[format]
+            except (formats.UnknownFormat, KeyError):
+                return
+
+            if self.formats is not None and format not in [formats.find(identifier) for identifier in self.formats]:
+                return
+
+            data = parser(request.body, encoding)
+
+            if isinstance(data, list):
+                request.data = [NestedQueryDict(item) if isinstance(item, dict) else item for item in data]
+            else:
+                request.data = NestedQueryDict(data)
+
+            if request.method in ['POST', 'PUT', 'PATCH', 'DELETE']:
+                setattr(request, request.method, request.data if not isinstance(request.data, list) else NestedQueryDict({}))
+
+class JsonMiddleware(ParserMiddleware):
+    """
+    Parse JSON in POST, PUT, PATCH and DELETE requests.
+    """
+    formats = ['json']
 
-                if request.method in ['POST', 'PUT', 'PATCH']:
-                    setattr(request, request.method, NestedQueryDict(data))
+class MessagePackMiddleware(ParserMiddleware):
+    """
+    Parse MessagePack in POST, PUT, PATCH and DELETE requests.
+    """
+    formats = ['msgpack']
@@ -0,0 +1,137 @@
+"""
+Negotiation of the formats to respond in.
+
+Each list of supported formats is compiled into a ``Negotiator`` once, and the format it negotiates for
+each combination of extension and HTTP Accept header is remembered in a cache of ``RESPITE_NEGOTIATION_CACHE_SIZE``
+items, so that requests from the clients one has seen before are negotiated by a dictionary lookup.
+"""
+
+from respite import formats
+from respite.settings import DEFAULT_FORMAT, NEGOTIATION_CACHE_SIZE
+from respite.utils import parse_accept_header
+from respite.utils.datastructures import LRUCache
+
+# Negotiators by tuples of supported formats.
+_negotiators = {}
+
+# Negotiated formats by tuples of supported formats, extensions and HTTP Accept headers.
+_formats = LRUCache(NEGOTIATION_CACHE_SIZE)
+
+def negotiate(supported_formats, extension=None, accept=None):
+    """
+    Determine and return a 'formats.Format' instance describing the most desired of the given formats,
+    or ``None`` if none of them are acceptable.
+
+    :param supported_formats: A list of strings describing formats (e.g. ``['html', 'json']``).
+    :param extension: A string describing the extension of the request path, or ``None``.
+    :param accept: A string describing the contents of the HTTP Accept header, or ``None``.
+    """
+    key = (tuple(supported_formats), extension, accept)
+
+    try:
+        return _formats[key]
+    except KeyError:
+        pass
+
+    format = get_negotiator(key[0]).negotiate(extension, accept)
+
+    _formats[key] = format
+
+    return format
+
+def get_negotiator(supported_formats):
+    """
+    Find and return the negotiator for the given formats, compiling it if necessary.
+
+    :param supported_formats: A tuple of strings describing formats.
+    """
+    try:
+        return _negotiators[supported_formats]
+    except KeyError:
+        negotiator = _negotiators[supported_formats] = Negotiator(supported_formats)
+
+        return negotiator
+
+def invalidate(**kwargs):
+    """Forget negotiators and negotiated formats (e.g. upon registering formats)."""
+    _negotiators.clear()
+    _formats.clear()
+
+formats.registered.connect(invalidate)
+
+class Negotiator(object):
+    """
+    A negotiator determines the format to respond in among a list of supported formats.
+
+    :attribute formats: A list of 'formats.Format' instances in order of preference.
+    :attribute extensions: A dictionary of extensions and the formats they describe.
+    :attribute default: The format to respond in if the request has no preference, or ``None``.
+    """
+
+    def __init__(self, supported_formats):
+        self.formats = [formats.find(format) for format in supported_formats]
+        self.extensions = {}
+        self.default = None
+
+        for format in self.formats:
+            for extension in format.extensions:
+                self.extensions.setdefault(extension, format)
+
+        if DEFAULT_FORMAT and formats.find(DEFAULT_FORMAT) in self.formats:
+            self.default = formats.find(DEFAULT_FORMAT)
+
+    def negotiate(self, extension=None, accept=None):
+        """
+        Determine and return the format to respond in, or ``None`` if none of the formats are acceptable.
+
+        :param extension: A string describing the extension of the request path, or ``None``.
+        :param accept: A string describing the contents of the HTTP Accept header, or ``None``.
+
+        Formats given by extension (e.g. '/articles/index.html') take precedence over formats given
+        in the HTTP Accept header. Formats are acceptable by the quality of the most specific media
+        range that matches any of their content types (see RFC 7231, section 5.3.2), and formats that
+        are equally acceptable are preferred in the order they are supported.
+
+        If the request gives neither an extension nor an HTTP Accept header, the format given in
+        ``RESPITE_DEFAULT_FORMAT`` is returned if it is supported.
+        """
+        if extension is not None:
+            return self.extensions.get(extension)
+
+        if not accept or not accept.strip():
+            return self.default
+
+        media_ranges = parse_accept_header(accept)
+
+        best_format, best_quality = None, 0
+
+        for format in self.formats:
+            quality = max([self._get_quality(content_type, media_ranges) for content_type in format.content_types])
+
+            if quality > best_quality:
+                best_format, best_quality = format, quality
+
+        return best_format
+
+    def _get_quality(self, content_type, media_ranges):
+        """Return the quality of the most specific of the given media ranges that matches the given content type."""
+        type, subtype = content_type.split('/', 1)
+
+        quality, best_specificity = 0, None
+
+        for media_range, parameters, media_range_quality in media_ranges:
+            range_type, range_subtype = media_range.split('/', 1)
+
+            if media_range == content_type:
+                specificity = (2, len(parameters))
+            elif range_type == type and range_subtype == '*':
+                specificity = (1, len(parameters))
+            elif media_range == '*/*':
+                specificity = (0, len(parameters))
+            else:
+                continue
+
+            if specificity > best_specificity:
+                quality, best_specificity = media_range_quality, specificity
+
+        return quality
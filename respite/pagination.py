@@ -0,0 +1,202 @@
+"""
+Pagination of querysets.
+
+Pages are given by opaque cursors, which describe the position of the page in the queryset. Querysets
+may be paginated by keyset (i.e. by the ordering field and primary key of the first or last object of
+the page), which takes the same time for every page however deep, or by offset, which takes longer
+the deeper the page but allows the queryset to be ordered in any way.
+
+Either way, the primary keys of the objects on the page are loaded first, and the page is returned as
+a queryset of those objects so that it may be restricted and serialized as any other queryset.
+"""
+
+import json
+import base64
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+# The greatest integer that databases accept in lookups, limits and offsets.
+MAX_INTEGER = 2 ** 63 - 1
+
+def encode_cursor(data):
+    """
+    Encode the given data as a cursor.
+
+    :param data: A list of simple data types describing the position of a page.
+    """
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':'))).rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Decode the given cursor.
+
+    :param cursor: A string describing a cursor (see ``encode_cursor``).
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(str(cursor) + '=' * (-len(cursor) % 4)))
+    except (TypeError, ValueError, UnicodeEncodeError):
+        raise InvalidCursor('The cursor "%s" is invalid' % cursor)
+
+    if not isinstance(data, list):
+        raise InvalidCursor('The cursor "%s" is invalid' % cursor)
+
+    return data
+
+def paginate_by_keyset(queryset, size, field='pk', cursor=None):
+    """
+    Paginate the given queryset by keyset.
+
+    Returns a tuple of a queryset of the objects on the page and the cursors of the next and previous
+    pages (or ``None`` if there are no such pages).
+
+    :param queryset: A queryset.
+    :param size: An integer describing the number of objects per page.
+    :param field: A string describing the name of the field to order the queryset by, prefixed with '-'
+                  for descending order (e.g. ``'-created_at'``). Objects with equal values are ordered by
+                  primary key. The field mustn't be nullable.
+    :param cursor: A string describing the cursor of the page, or ``None`` for the first page.
+    """
+    descending = field.startswith('-')
+    name = field.lstrip('-')
+
+    if name == 'pk':
+        ordering = [field]
+    else:
+        ordering = [field, '-pk' if descending else 'pk']
+
+    if cursor:
+        # Cursors are given by clients, so their values are validated like any other input.
+        try:
+            direction, value, pk = decode_cursor(cursor)
+
+            value = _decode_value(_get_field(queryset.model, name), value)
+            pk = _decode_value(queryset.model._meta.pk, pk)
+        except (ValidationError, TypeError, ValueError, OverflowError):
+            raise InvalidCursor('The cursor "%s" is invalid' % cursor)
+
+        if direction not in ('next', 'previous'):
+            raise InvalidCursor('The cursor "%s" is invalid' % cursor)
+
+        backwards = direction == 'previous'
+
+        # Objects after the cursor are greater in ascending order and lesser in descending order.
+        lookup = 'lt' if backwards != descending else 'gt'
+
+        if name == 'pk':
+            condition = Q(**{'pk__%s' % lookup: pk})
+        else:
+            condition = Q(**{'%s__%s' % (name, lookup): value}) | Q(**{name: value, 'pk__%s' % lookup: pk})
+
+        queryset = queryset.filter(condition)
+    else:
+        backwards = False
+
+    if backwards:
+        keys = queryset.order_by(*[_reverse(ordering_field) for ordering_field in ordering])
+    else:
+        keys = queryset.order_by(*ordering)
+
+    keys = list(keys.values_list(name, 'pk')[:size + 1])
+
+    more = len(keys) > size
+    keys = keys[:size]
+
+    if backwards:
+        keys.reverse()
+
+    next_cursor = previous_cursor = None
+
+    if keys and (more or backwards):
+        next_cursor = encode_cursor(['next', _encode_value(keys[-1][0]), keys[-1][1]])
+
+    if keys and (more if backwards else cursor):
+        previous_cursor = encode_cursor(['previous', _encode_value(keys[0][0]), keys[0][1]])
+
+    return queryset.filter(pk__in=[pk for value, pk in keys]).order_by(*ordering), next_cursor, previous_cursor
+
+def paginate_by_offset(queryset, size, cursor=None):
+    """
+    Paginate the given queryset by offset.
+
+    Returns a tuple of a queryset of the objects on the page and the cursors of the next and previous
+    pages (or ``None`` if there are no such pages).
+
+    :param queryset: A queryset, which should be ordered.
+    :param size: An integer describing the number of objects per page.
+    :param cursor: A string describing the cursor of the page, or ``None`` for the first page.
+    """
+    if cursor:
+        try:
+            direction, offset = decode_cursor(cursor)
+        except ValueError:
+            raise InvalidCursor('The cursor "%s" is invalid' % cursor)
+
+        if direction != 'offset' or not _is_integer(offset) or not 0 <= offset <= MAX_INTEGER - size - 1:
+            raise InvalidCursor('The cursor "%s" is invalid' % cursor)
+    else:
+        offset = 0
+
+    if not queryset.ordered:
+        queryset = queryset.order_by('pk')
+
+    keys = list(queryset.values_list('pk', flat=True)[offset:offset + size + 1])
+
+    next_cursor = previous_cursor = None
+
+    if len(keys) > size:
+        next_cursor = encode_cursor(['offset', offset + size])
+
+    if offset > 0:
+        previous_cursor = encode_cursor(['offset', max(offset - size, 0)])
+
+    return queryset.filter(pk__in=keys[:size]), next_cursor, previous_cursor
+
+def _reverse(ordering_field):
+    """Reverse the direction of the given ordering field (e.g. 'pk' to '-pk')."""
+    if ordering_field.startswith('-'):
+        return ordering_field[1:]
+    else:
+        return '-' + ordering_field
+
+def _encode_value(value):
+    """Encode the given value of the ordering field in a form that lookups of the field accept."""
+    if value is None or isinstance(value, (bool, int, long, float, basestring)):
+        return value
+
+    # Dates, times and decimals are given by their string representations, which retain their precision.
+    return unicode(value)
+
+def _decode_value(field, value):
+    """
+    Convert the given value of a cursor to a value that lookups of the given field accept.
+
+    Raises ValueError, TypeError, OverflowError or django.core.exceptions.ValidationError if the value isn't one
+    that ``_encode_value`` could have given for the field.
+
+    :param field: A django.db.models.Field instance.
+    :param value: A simple data type describing a value of the field.
+    """
+    if value is None or not isinstance(value, (bool, int, long, float, basestring)):
+        raise TypeError('%r is not a value of a cursor' % value)
+
+    value = field.get_prep_value(field.to_python(value))
+
+    if _is_integer(value) and not -MAX_INTEGER - 1 <= value <= MAX_INTEGER:
+        raise ValueError('%r is out of range' % value)
+
+    return value
+
+def _get_field(model, name):
+    """Return the field of the given model by the given name, or its primary key for 'pk'."""
+    if name == 'pk':
+        return model._meta.pk
+
+    return model._meta.get_field(name)
+
+def _is_integer(value):
+    """Determine whether the given value is an integer (rather than a boolean)."""
+    return isinstance(value, (int, long)) and not isinstance(value, bool)
+
+class InvalidCursor(ValueError):
+    pass
@@ -1,13 +1,39 @@
 from respite.serializers.jsonserializer import JSONSerializer
 from respite.serializers.jsonpserializer import JSONPSerializer
 from respite.serializers.xmlserializer import XMLSerializer
+from respite.serializers.msgpackserializer import MessagePackSerializer
+from respite.serializers.csvserializer import CSVSerializer
+from respite.serializers.ndjsonserializer import NDJSONSerializer
+from respite.serializers import jsonbackends, messagepack
 from respite import formats
 
-SERIALIZERS = {
-    formats.find('JavaScript Object Notation'): JSONSerializer,
-    formats.find('JavaScript'): JSONPSerializer,
-    formats.find('Extensible Markup Language'): XMLSerializer
-}
+def parse_json(body, encoding=None):
+    """
+    Parse the given JSON request body.
+
+    :param body: A string describing the request body.
+    :param encoding: A string describing the encoding of the request body, or ``None``.
+    """
+    return jsonbackends.get().loads(body, encoding)
+
+def parse_msgpack(body, encoding=None):
+    """
+    Parse the given MessagePack request body.
+
+    :param body: A string describing the request body.
+    :param encoding: Ignored; MessagePack is binary.
+    """
+    return messagepack.unpackb(body)
+
+formats.register(formats.find('JavaScript Object Notation'), JSONSerializer, parse_json)
+formats.register(formats.find('JavaScript'), JSONPSerializer)
+formats.register(formats.find('Extensible Markup Language'), XMLSerializer)
+formats.register(formats.find('MessagePack'), MessagePackSerializer, parse_msgpack)
+formats.register(formats.find('Comma-Separated Values'), CSVSerializer)
+formats.register(formats.find('Newline-Delimited JSON'), NDJSONSerializer)
+
+# Serializers by format (see ``respite.formats.register``).
+SERIALIZERS = formats.registry.serializers
 
 def find(format):
     """
@@ -8,218 +8,619 @@ import django.core.files
 import django.forms
 import datetime
 from decimal import Decimal
+from itertools import islice
+
+from respite.serializers import plans
+from respite import caching
+from respite.settings import STREAMING_CHUNK_SIZE
+
+def handles(*types):
+    """
+    Register the decorated serializer method as the handler for the given types.
+
+    Handlers are resolved by the type of the object being serialized and the
+    first match in its method resolution order wins, so a handler for ``dict``
+    will serialize subclasses of ``dict`` too unless they have a handler of their own.
+
+    :param types: Any number of types.
+
+    Example usage::
+
+        class PointSerializer(JSONSerializer):
+
+            @handles(Point)
+            def serialize_point(self, point):
+                return [point.x, point.y]
+    """
+    def decorator(function):
+        function.handles = types
+        return function
+    return decorator
+
+class SerializerType(type):
+    """
+    Metaclass for serializers that collects the handlers of each class.
+
+    Every class gets its own table of handlers and its own cache of resolved types, so that
+    handlers registered on a subclass never leak into its parents.
+    """
+
+    def __init__(cls, name, bases, attributes):
+        super(SerializerType, cls).__init__(name, bases, attributes)
+
+        cls._handlers = {}
+        cls._dispatch = {}
+
+        for attribute, value in attributes.items():
+            for type in getattr(value, 'handles', ()):
+                cls._handlers[type] = attribute
+
+class Stream(object):
+    """
+    A list that is serialized lazily, in chunks.
+
+    :attribute chunks: An iterable of lists of serialized items.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            for item in chunk:
+                yield item
+
+def contains_stream(items):
+    """Determine whether any of the given items are or contain streams."""
+    for item in items:
+        if isinstance(item, Stream):
+            return True
+
+        if isinstance(item, dict) and contains_stream(item.values()):
+            return True
+
+        if isinstance(item, list) and contains_stream(item):
+            return True
+
+    return False
 
 class Serializer(object):
-    """Base class for serializers."""
+    """
+    Base class for serializers.
+
+    :attribute chunk_size: An integer describing the number of models to serialize at a time when streaming.
+    """
+
+    __metaclass__ = SerializerType
+
+    chunk_size = STREAMING_CHUNK_SIZE
 
-    def __init__(self, source):
+    def __init__(self, source, optimize_queries=True, fields=None, expand=None, cache=None):
+        """
+        Initialize a new serializer.
+
+        :param source: Anything to serialize.
+        :param optimize_queries: A boolean describing whether to select and prefetch the relations
+                                 of querysets before serializing them.
+        :param fields: A tree of dictionaries describing the fields of models to serialize (see
+                       ``respite.utils.parse_field_paths``), or ``None`` to serialize every field.
+        :param expand: A tree of dictionaries describing the relations of models to serialize in full (see
+                       ``respite.utils.parse_field_paths``), or ``None`` to expand every relation. Relations
+                       that aren't expanded are serialized as the primary keys of their related models.
+        :param cache: A cache backend to cache the serialized fragments of models in (see ``respite.caching``),
+                      or ``None``. Serializers whose handlers depend on the request mustn't be given a cache.
+        """
         self.source = source
+        self.optimize_queries = optimize_queries
+        self.fields = fields
+        self.expand = expand
+        self.cache = cache
+        self.streaming = False
+
+    @classmethod
+    def register(cls, types, handler):
+        """
+        Register a handler for the given types.
+
+        :param types: A type or a tuple of types.
+        :param handler: A function that accepts the serializer and the object to serialize, or a string
+                        describing the name of a method of the serializer.
+        """
+        if not isinstance(types, tuple):
+            types = (types,)
+
+        for type in types:
+            cls._handlers[type] = handler
+
+        # Forget resolved types for this class and any of its subclasses.
+        classes = [cls]
+        while classes:
+            klass = classes.pop()
+            klass._dispatch.clear()
+            classes.extend(klass.__subclasses__())
+
+    @classmethod
+    def resolve(cls, type):
+        """
+        Return the function that serializes objects of the given type.
+
+        :param type: A type.
+        """
+        try:
+            return cls._dispatch[type]
+        except KeyError:
+            pass
+
+        handler = 'serialize_object'
+
+        for base in getattr(type, '__mro__', (type,)):
+            for klass in cls.__mro__:
+                if base in getattr(klass, '_handlers', ()):
+                    handler = klass._handlers[base]
+                    break
+            else:
+                continue
+            break
+
+        if isinstance(handler, basestring):
+            handler = getattr(cls, handler).im_func
+
+        cls._dispatch[type] = handler
+
+        return handler
 
     def serialize(self, request):
         """
         Serialize the given object into into simple
         data types (e.g. lists, dictionaries, strings).
         """
+        self.request = request
 
-        def serialize(anything):
+        # The fields to serialize and relations to expand of the models at hand, which narrow as related
+        # models are serialized.
+        self._fields = self.fields
+        self._expand = self.expand
 
-            def serialize_dictionary(dictionary):
-                """Dictionaries are serialized recursively."""
-                data = OrderedDict()
+        # Models are cached as whole fragments, so those embedded in another aren't cached on their own.
+        self._fragment = False
 
-                # Serialize each of the dictionary's keys
-                for key, value in dictionary.items():
-                    data.update({ key: serialize(value) })
+        # Models embedded in others by their key (see ``_serialize_model``), the keys of models that are being
+        # serialized and the identities of embedded models that have been reused.
+        self._memo = {}
+        self._ancestors = set()
+        self._shared = set()
 
-                return data
+        return self._serialize(self.source)
 
-            def serialize_list(list):
-                """Lists are serialized recursively."""
-                data = []
+    def stream(self, request):
+        """
+        Serialize the given object into an iterable of strings.
 
-                # Serialize each of the list's items
-                for item in list:
-                    data.append(serialize(item))
+        Serializers that can't encode their data incrementally yield it all at once.
+        """
+        yield self.serialize(request)
 
-                return data
+    def _iterrows(self, data):
+        """
+        Iterate over chunks of the rows of the given data, for formats that are written row by row.
+
+        Data is expected to be a list or stream of rows or a single row, or a dictionary of exactly
+        one such item (e.g. the context of ``Resource.index`` or ``Resource.show``). The pagination
+        of ``Resource.index`` is given in the Link header instead, so its 'pagination' item is disregarded.
+        Dictionaries of a single value that isn't a row (e.g. ``{'error': 'The article could not be found.'}``)
+        are a row of their own, and anything else is a row of one value.
+        """
+        if isinstance(data, dict) and len(data) == 2 and 'pagination' in data:
+            data = dict((key, value) for key, value in data.items() if key != 'pagination')
 
-            def serialize_queryset(queryset):
-                """Querysets are serialized as lists of models."""
-                data = []
+        if isinstance(data, dict) and len(data) == 1 and isinstance(data.values()[0], (Stream, dict, list)):
+            data = data.values()[0]
 
-                # Serialize queryset as a list of models
-                for model in queryset:
-                    data.append(serialize_model(model))
+        if isinstance(data, Stream):
+            return data.chunks
 
-                return data
+        if isinstance(data, dict):
+            return [[data]]
 
-            def serialize_datequeryset(datequeryset):
-                """DateQuerysets are serialized as lists of dates."""
-                data = []
+        if isinstance(data, list):
+            return [data]
 
-                # Serialize datequeryset as a list of datetime objects
-                for date in datequeryset:
-                    data.append(serialize_date(date))
+        return [[[data]]]
 
-                return data
+    def _serialize(self, anything):
+        """Serialize anything by delegating it to the handler for its type."""
+        try:
+            handler = self._dispatch[anything.__class__]
+        except KeyError:
+            handler = self.resolve(anything.__class__)
 
-            def serialize_valueslistqueryset(valueslistqueryset):
-                """DateQuerysets are serialized as lists of values."""
-                data = []
+        return handler(self, anything)
 
-                # Serialize valueslistqueryset as a list of values
-                for value in valueslistqueryset:
-                    if isinstance(value, tuple):
-                        data.append(serialize_list(value))
-                    else:
-                        data.append(serialize(value))
+    @handles(dict)
+    def serialize_dictionary(self, dictionary):
+        """Dictionaries are serialized recursively."""
+        data = OrderedDict()
 
-                return data
+        # Serialize each of the dictionary's keys
+        for key, value in dictionary.items():
+            data[key] = self._serialize(value)
 
-            def serialize_manager(manager):
-                """Managers are serialized as list of models."""
-                data = []
+        return data
 
-                for model in manager.all():
-                    data.append(serialize_model(model))
+    @handles(list, set)
+    def serialize_list(self, list):
+        """Lists are serialized recursively."""
+        return [self._serialize(item) for item in list]
 
-                return data
+    @handles(django.db.models.query.QuerySet)
+    def serialize_queryset(self, queryset):
+        """Querysets are serialized as lists of models."""
+        if self.optimize_queries:
+            queryset = self._optimize_queryset(queryset)
 
-            def serialize_model(model):
-                """
-                Models are serialized by calling their 'serialize' method.
+        if self.streaming:
+            return Stream(self._iterate_queryset(queryset, self._serialize_models))
 
-                Models that don't define a 'serialize' method are
-                serialized as a dictionary of fields.
+        # Cached fragments are loaded for a chunk of models at a time.
+        if self.cache is not None:
+            return list(Stream(self._iterate_queryset(queryset, self._serialize_models)))
 
-                Example:
+        return [self.serialize_model(model) for model in queryset]
 
-                    {
-                        'id': 1,
-                        'title': 'Mmmm pie',
-                        'content: 'Pie is good!'
-                    }
+    def _iterate_queryset(self, queryset, serialize):
+        """
+        Serialize the given queryset in chunks of ``chunk_size`` rows, yielding each as a list.
 
-                """
+        Rows are loaded with ``QuerySet.iterator`` so that they aren't cached, and their
+        relations are prefetched for each chunk in turn.
 
-                if hasattr(model, 'serialize'):
-                    return serialize(model.serialize())
-                else:
-                    data = OrderedDict()
-                    for field in model._meta.fields + model._meta.many_to_many:
-                        data.update({
-                            field.name: serialize(getattr(model, field.name ))
-                        })
+        :param queryset: A queryset.
+        :param serialize: A function that serializes a list of rows of the queryset, given a list of
+                          lookups to prefetch for them.
+        """
 
-                    return data
+        # Streams are only iterated once everything around them has been serialized, so anything
+        # from here on is serialized in its entirety.
+        self.streaming = False
 
-            def serialize_form(form):
-                """
-                Forms are serialized as a dictionary of fields and errors (if any).
+        if queryset._result_cache is not None:
+            rows, lookups = iter(queryset), []
+        else:
+            rows, lookups = queryset.iterator(), queryset._prefetch_related_lookups
 
-                Example:
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
 
-                    {
-                        'fields': ['title', 'content'],
-                        'errors': {
-                            'content': 'Must describe pie.'
-                        }
-                    }
+            if not chunk:
+                break
 
-                """
-                data = OrderedDict()
-
-                # Serialize form fields as a list of strings
-                data['fields'] = []
-                for field in form.fields:
-                    data['fields'].append(field)
-
-                # Serialize form errors as a dictionary with keys 'field' and 'error'
-                if form.errors:
-                    data['errors'] = []
-                    for field in form:
-                        data['errors'].append(
-                            {
-                                'field': field.name,
-                                'error': field.errors.as_text()
-                            }
-                        )
+            yield serialize(chunk, lookups)
 
-                return data
+    def _optimize_queryset(self, queryset):
+        """
+        Select and prefetch the relations that serializing the given queryset will follow, so that
+        its models can be serialized with a constant number of queries.
+
+        Querysets that have already been evaluated are returned as they are.
+        """
+        if queryset._result_cache is not None:
+            return queryset
 
-            def serialize_date(datetime):
-                """Dates are serialized as ISO 8601-compatible strings."""
-                return datetime.isoformat()
+        plan = plans.find(queryset.model)
 
-            def serialize_field_file(field_file):
-                """Filefields are serialized as strings describing their URL."""
-                try:
-                    return field_file.url
-                except ValueError:
-                    return None
+        if plan.custom:
+            return queryset
 
-            def serialize_image_field_file(image_field_file):
-                """Imagefields are serialized as strings describing their URL."""
-                try:
-                    return image_field_file.url
-                except ValueError:
-                    return None
+        select_related, prefetch_related = plan.relations(expand=self._expand, fields=self._fields)
 
-            def serialize_decimal_field(decimal_field):
-                """Decimal fields are serialized as strings."""
-                try:
-                    return str(decimal_field)
-                except ValueError:
-                    return None
+        # Don't narrow querysets that already select every relation.
+        if select_related and queryset.query.select_related is not True:
+            queryset = queryset.select_related(*select_related)
 
-            if isinstance(anything, dict):
-                return serialize_dictionary(anything)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
 
-            if isinstance(anything, (list, set)):
-                return serialize_list(anything)
+        return queryset
 
-            if isinstance(anything, django.db.models.query.DateQuerySet):
-                return serialize_datequeryset(anything)
+    @handles(django.db.models.query.DateQuerySet, django.db.models.query.DateTimeQuerySet)
+    def serialize_datequeryset(self, datequeryset):
+        """DateQuerysets are serialized as lists of dates."""
+        return [self.serialize_date(date) for date in datequeryset]
 
-            if isinstance(anything, django.db.models.query.DateTimeQuerySet):
-                return serialize_datequeryset(anything)
+    @handles(django.db.models.query.ValuesQuerySet)
+    def serialize_valuesqueryset(self, valuesqueryset):
+        """
+        ValuesQuerysets are serialized as lists of dictionaries of values,
+        ordered like the fields they were given.
+        """
+        names = list(valuesqueryset.query.extra_select) + \
+                list(valuesqueryset.field_names) + \
+                list(valuesqueryset.query.aggregate_select)
+
+        if self._fields:
+            names = [name for name in names if name in self._fields]
+
+        def serialize(row):
+            data = OrderedDict()
+            for name in names:
+                data[name] = self._serialize(row[name])
+
+            return data
+
+        if self.streaming:
+            return Stream(self._iterate_queryset(valuesqueryset, lambda rows, lookups: [serialize(row) for row in rows]))
+
+        return [serialize(row) for row in valuesqueryset]
+
+    @handles(django.db.models.query.ValuesListQuerySet)
+    def serialize_valueslistqueryset(self, valueslistqueryset):
+        """ValuesListQuerysets are serialized as lists of values."""
+        data = []
+
+        # Serialize valueslistqueryset as a list of values
+        for value in valueslistqueryset:
+            if isinstance(value, tuple):
+                data.append(self.serialize_list(value))
+            else:
+                data.append(self._serialize(value))
+
+        return data
+
+    @handles(django.db.models.manager.Manager)
+    def serialize_manager(self, manager):
+        """Managers are serialized as list of models."""
+        return self._serialize_models(list(manager.all()))
+
+    @handles(django.db.models.Model)
+    def serialize_model(self, model):
+        """
+        Models are serialized by calling their 'serialize' method.
+
+        Models that don't define a 'serialize' method are
+        serialized as a dictionary of fields according to
+        a plan that is compiled once for each model.
+
+        Either way, only the fields given in ``fields`` are
+        serialized if any are given, relations that aren't
+        given in ``expand`` are serialized as primary keys
+        and models are served from and stored in the cache
+        if one is given.
 
-            if isinstance(anything, django.db.models.query.ValuesListQuerySet):
-                return serialize_valueslistqueryset(anything)
+        Example:
 
-            if isinstance(anything, django.db.models.query.QuerySet):
-                return serialize_queryset(anything)
+            {
+                'id': 1,
+                'title': 'Mmmm pie',
+                'content: 'Pie is good!'
+            }
 
-            if isinstance(anything, django.db.models.Model):
-                return serialize_model(anything)
+        """
+        if self.cache is not None and not self._fragment and model.pk is not None:
+            return self._serialize_models([model])[0]
+
+        return self._serialize_model(model, plans.find(model.__class__))
+
+    def _serialize_models(self, models, lookups=()):
+        """
+        Serialize the given instances of a model.
+
+        Models whose fragments are cached are served from the cache, and the relations of the
+        rest are prefetched before they are serialized and stored in the cache.
+
+        :param models: A list of instances of the same model.
+        :param lookups: A list of lookups to pass to ``prefetch_related_objects``.
+        """
+        if not models:
+            return []
+
+        plan = plans.find(models[0].__class__)
 
-            if isinstance(anything, (django.forms.Form, django.forms.ModelForm)):
-                return serialize_form(anything)
+        if self.cache is None or self._fragment or plan.custom:
+            if lookups:
+                django.db.models.query.prefetch_related_objects(models, lookups)
 
-            if isinstance(anything, (str, unicode)):
-                return anything
+            return [self._serialize_model(model, plan) for model in models]
 
-            if isinstance(anything, (int, float, long)):
-                return anything
+        variant = self._get_variant()
 
-            if isinstance(anything, (datetime.date, datetime.datetime)):
-                return serialize_date(anything)
+        fragments, state = caching.get_fragments(self.cache, plan, variant, models)
 
-            if isinstance(anything, django.db.models.manager.Manager):
-                return serialize_manager(anything)
+        misses = [model for model in models if model.pk not in fragments]
 
-            if isinstance(anything, Decimal):
-                return serialize_decimal_field(anything)
+        if lookups and misses:
+            django.db.models.query.prefetch_related_objects(misses, lookups)
 
-            if isinstance(anything, django.core.files.base.File):
-                return serialize_field_file(anything)
+        self._fragment = True
 
-            if anything is None:
+        try:
+            for model in misses:
+                fragments[model.pk] = self._serialize_model(model, plan)
+        finally:
+            self._fragment = False
+
+        caching.set_fragments(self.cache, plan, variant, [(model, fragments[model.pk]) for model in misses], state)
+
+        return [fragments[model.pk] for model in models]
+
+    def _get_variant(self):
+        """
+        Return a string describing the serializer and the fields and relations to expand of the models
+        at hand, to cache fragments by.
+        """
+        def canonicalize(tree):
+            if tree is None:
                 return None
 
-            if hasattr(anything, 'serialize'):
-                return serialize(anything.serialize())
+            return tuple((name, canonicalize(tree[name])) for name in sorted(tree))
+
+        return '%s.%s:%r:%r' % (
+            self.__class__.__module__,
+            self.__class__.__name__,
+            canonicalize(self._fields or {}),
+            canonicalize(self._expand)
+        )
+
+    def _serialize_model(self, model, plan):
+        """
+        Serialize the given model according to the given plan.
+
+        Models embedded in other models are memoized for the rest of the serialization, so that those
+        that recur (e.g. the author of many articles) are only serialized once. Models that recur
+        within themselves (e.g. by way of a self-referential foreign key) are serialized as their
+        primary key where they recur.
+        """
+        if model.pk is None:
+            return self._build_model(model, plan)
+
+        # Models that expand none of their relations embed no models of their own, so unless they're
+        # embedded themselves there's nothing to memoize or recur (e.g. articles that are serialized with
+        # their relations as primary keys).
+        if not self._ancestors and not self._expand and self._expand is not None and not plan.custom:
+            return self._build_model(model, plan)
+
+        key = (plan.model, model.pk, id(self._fields), id(self._expand))
+
+        if self._ancestors:
+            try:
+                data = self._memo[key]
+            except KeyError:
+                pass
+            else:
+                self._shared.add(id(data))
+                return data
+
+        if key in self._ancestors:
+            return model.pk
+
+        self._ancestors.add(key)
+
+        try:
+            data = self._build_model(model, plan)
+        finally:
+            self._ancestors.remove(key)
+
+        if self._ancestors:
+            self._memo[key] = data
+
+        return data
+
+    def _build_model(self, model, plan):
+        """Serialize the given model according to the given plan, regardless of the memo."""
+        fields = self._fields
+        expand = self._expand
+
+        if plan.custom:
+            self._fields = None
+            self._expand = None
+
+            try:
+                data = self._serialize(model.serialize())
+            finally:
+                self._fields = fields
+                self._expand = expand
+
+            # The data may be memoized, so it's copied rather than narrowed in place.
+            if fields and isinstance(data, dict):
+                data = OrderedDict((key, value) for key, value in data.items() if key in fields)
+
+            return data
+
+        data = OrderedDict()
 
-            raise TypeError("Respite doesn't know how to serialize %s" % anything.__class__.__name__)
+        if not fields and expand is None:
+            for name, serialize in plan.steps:
+                data[name] = serialize(self, getattr(model, name))
 
-        return serialize(self.source)
+            return data
+
+        try:
+            for name, serialize in plan.steps:
+                if fields:
+                    if name not in fields:
+                        continue
+
+                    self._fields = fields[name]
+
+                if expand is not None and name in plan.collapsed:
+                    if name not in expand:
+                        data[name] = plan.collapsed[name](model)
+                        continue
+
+                    self._expand = expand[name]
+
+                data[name] = serialize(self, getattr(model, name))
+
+                self._expand = expand
+        finally:
+            self._fields = fields
+            self._expand = expand
+
+        return data
+
+    @handles(django.forms.Form, django.forms.ModelForm)
+    def serialize_form(self, form):
+        """
+        Forms are serialized as a dictionary of fields and errors (if any).
+
+        Example:
+
+            {
+                'fields': ['title', 'content'],
+                'errors': {
+                    'content': 'Must describe pie.'
+                }
+            }
+
+        """
+        data = OrderedDict()
+
+        # Serialize form fields as a list of strings
+        data['fields'] = []
+        for field in form.fields:
+            data['fields'].append(field)
+
+        # Serialize form errors as a dictionary with keys 'field' and 'error'
+        if form.errors:
+            data['errors'] = []
+            for field in form:
+                data['errors'].append(
+                    {
+                        'field': field.name,
+                        'error': field.errors.as_text()
+                    }
+                )
+
+        return data
+
+    @handles(str, unicode, int, long, float, type(None))
+    def serialize_primitive(self, primitive):
+        """Strings, numbers and ``None`` are serialized as they are."""
+        return primitive
+
+    @handles(datetime.date, datetime.datetime)
+    def serialize_date(self, datetime):
+        """Dates are serialized as ISO 8601-compatible strings."""
+        return datetime.isoformat()
+
+    @handles(Decimal)
+    def serialize_decimal_field(self, decimal_field):
+        """Decimal fields are serialized as strings."""
+        try:
+            return str(decimal_field)
+        except ValueError:
+            return None
+
+    @handles(django.core.files.base.File)
+    def serialize_field_file(self, field_file):
+        """Filefields and imagefields are serialized as strings describing their URL."""
+        try:
+            return field_file.url
+        except ValueError:
+            return None
+
+    def serialize_object(self, object):
+        """Any other object is serialized by calling its 'serialize' method."""
+        if hasattr(object, 'serialize'):
+            return self._serialize(object.serialize())
+
+        raise TypeError("Respite doesn't know how to serialize %s" % object.__class__.__name__)
@@ -0,0 +1,80 @@
+import csv
+
+from respite.serializers.base import Serializer
+from respite.serializers import jsonbackends
+
+class CSVSerializer(Serializer):
+    """
+    Serializer for comma-separated values.
+
+    Models are serialized as rows of their fields, with relations as the primary keys of their
+    related models (see ``expand``) and lists of values as the values separated by ``list_separator``.
+
+    :attribute list_separator: A string describing the separator of values of lists.
+    """
+
+    list_separator = ';'
+
+    def __init__(self, *args, **kwargs):
+        super(CSVSerializer, self).__init__(*args, **kwargs)
+
+        # Columns can't nest, so relations are never expanded.
+        self.expand = {}
+
+    def serialize(self, request):
+        return ''.join(self.stream(request))
+
+    def stream(self, request):
+        self.streaming = True
+
+        data = super(CSVSerializer, self).serialize(request)
+
+        buffer = []
+        writer = csv.writer(Buffer(buffer))
+
+        header = None
+
+        for rows in self._iterrows(data):
+            if not rows:
+                continue
+
+            if header is None:
+                header = rows[0].keys() if isinstance(rows[0], dict) else None
+
+                if header:
+                    writer.writerow([self._encode(key) for key in header])
+
+            for row in rows:
+                if header:
+                    writer.writerow([self._encode(row.get(key)) for key in header])
+                else:
+                    writer.writerow([self._encode(value) for value in row])
+
+            yield ''.join(buffer)
+
+            del buffer[:]
+
+    def _encode(self, value):
+        """Encode the given value as a UTF-8 encoded cell."""
+        if value is None:
+            return ''
+
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+
+        if isinstance(value, unicode):
+            return value.encode('utf-8')
+
+        if isinstance(value, list):
+            return self.list_separator.join([self._encode(item) for item in value])
+
+        if isinstance(value, dict):
+            return jsonbackends.get().dumps(value).encode('utf-8')
+
+        return str(value)
+
+class Buffer(object):
+    """A file-like object that appends what is written to it to the given list."""
+
+    def __init__(self, buffer):
+        self.write = buffer.append
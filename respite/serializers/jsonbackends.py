@@ -0,0 +1,196 @@
+"""
+Backends that encode and decode JSON.
+
+Respite uses the backend given in ``RESPITE_JSON_BACKEND``, or the fastest of the backends
+that are installed and encode JSON exactly like the standard library if it's ``None``. Those
+backends encode JSON identically; with the separators of the standard library, with non-ASCII
+characters and slashes as they are and with the keys of dictionaries in the order they are given.
+"""
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ..lib.ordereddict import OrderedDict
+
+from django.core.exceptions import ImproperlyConfigured
+
+from respite.settings import JSON_BACKEND
+
+# Strings describing the separators between items and between keys and values (as in the standard library).
+ITEM_SEPARATOR = ', '
+KEY_SEPARATOR = ': '
+
+class Backend(object):
+    """
+    Base class for JSON backends.
+
+    :attribute name: A string describing the name of the backend.
+    :attribute exact: A boolean describing whether the backend encodes every value exactly like
+                      the standard library, and so may be chosen automatically.
+    """
+    name = None
+    exact = True
+
+    @classmethod
+    def is_available(cls):
+        """Determine whether the backend is installed."""
+        raise NotImplementedError
+
+    def dumps(self, data):
+        """
+        Encode the given data as JSON.
+
+        :param data: Simple data types (e.g. lists, dictionaries, strings).
+        """
+        raise NotImplementedError
+
+    def loads(self, string, encoding=None):
+        """
+        Decode the given JSON.
+
+        :param string: A string describing JSON.
+        :param encoding: A string describing the encoding of the JSON, if it isn't unicode.
+        """
+        raise NotImplementedError
+
+class StandardBackend(Backend):
+    """A backend that uses the ``json`` module of Python's standard library."""
+    name = 'json'
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+    def __init__(self):
+        import json
+
+        self.json = json
+        self.encoder = json.JSONEncoder(
+            ensure_ascii = False,
+            separators = (ITEM_SEPARATOR, KEY_SEPARATOR)
+        )
+
+    def dumps(self, data):
+        return self.encoder.encode(data)
+
+    def loads(self, string, encoding=None):
+        return self.json.loads(string, encoding)
+
+class SimpleJSONBackend(Backend):
+    """A backend that uses ``simplejson``, provided it has been compiled with its C extension."""
+    name = 'simplejson'
+
+    @classmethod
+    def is_available(cls):
+        try:
+            from simplejson import _speedups
+        except ImportError:
+            return False
+        else:
+            return True
+
+    def __init__(self):
+        import simplejson
+
+        self.simplejson = simplejson
+        self.encoder = simplejson.JSONEncoder(
+            ensure_ascii = False,
+            separators = (ITEM_SEPARATOR, KEY_SEPARATOR)
+        )
+
+    def dumps(self, data):
+        return self.encoder.encode(data)
+
+    def loads(self, string, encoding=None):
+        return self.simplejson.loads(string, encoding)
+
+class UltraJSONBackend(Backend):
+    """
+    A backend that uses ``ujson``.
+
+    Please note that ``ujson`` formats very large and very small floats in positional rather than
+    exponential notation (e.g. ``10000000000000000.0`` rather than ``1e+16``), can't encode or
+    decode integers beyond 64 bits and encodes JSON without whitespace between items or between keys
+    and values, so it's only used if it's given in ``RESPITE_JSON_BACKEND``.
+    """
+    name = 'ujson'
+    exact = False
+
+    @classmethod
+    def is_available(cls):
+        try:
+            import ujson
+        except ImportError:
+            return False
+        else:
+            return True
+
+    def __init__(self):
+        import ujson
+
+        self.ujson = ujson
+
+    def dumps(self, data):
+        string = self.ujson.dumps(data, ensure_ascii=False, escape_forward_slashes=False)
+
+        if isinstance(string, str):
+            string = string.decode('utf-8')
+
+        return string
+
+    def loads(self, string, encoding=None):
+        if encoding and isinstance(string, str):
+            string = string.decode(encoding)
+
+        return self.ujson.loads(string)
+
+# Backends by name, in order of preference.
+BACKENDS = OrderedDict()
+
+# The instance of the configured backend.
+_backend = None
+
+def register(backend):
+    """
+    Register a backend.
+
+    :param backend: A subclass of ``Backend``.
+    """
+    global _backend
+
+    BACKENDS[backend.name] = backend
+
+    _backend = None
+
+for backend in [UltraJSONBackend, SimpleJSONBackend, StandardBackend]:
+    register(backend)
+
+def get():
+    """Return an instance of the configured backend."""
+    global _backend
+
+    if _backend is None:
+        _backend = find(JSON_BACKEND)()
+
+    return _backend
+
+def find(name=None):
+    """
+    Find and return a backend by name, or the first of the exact backends that is installed.
+
+    :param name: A string describing the name of the backend, or ``None``.
+    """
+    if name is None:
+        for backend in BACKENDS.values():
+            if backend.exact and backend.is_available():
+                return backend
+
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ImproperlyConfigured('No JSON backend found with name "%s"' % name)
+
+    if not backend.is_available():
+        raise ImproperlyConfigured('The JSON backend "%s" is not installed' % name)
+
+    return backend
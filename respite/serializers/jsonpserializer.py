@@ -7,9 +7,19 @@ class JSONPSerializer(JSONSerializer):
     def serialize(self, request):
         data = super(JSONPSerializer, self).serialize(request)
 
+        return '%s(%s)' % (self._get_callback(request), data)
+
+    def stream(self, request):
+        yield '%s(' % self._get_callback(request)
+
+        for string in super(JSONPSerializer, self).stream(request):
+            yield string
+
+        yield ')'
+
+    def _get_callback(self, request):
+        """Return the name of the function to wrap the data in."""
         if 'callback' in request.GET:
-            callback = request.GET['callback']
+            return request.GET['callback']
         else:
-            callback = 'callback'
-
-        return '%s(%s)' % (callback, data)
+            return 'callback'
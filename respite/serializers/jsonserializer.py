@@ -1,10 +1,66 @@
-import json
-
-from respite.serializers.base import Serializer
+from respite.serializers.base import Serializer, Stream, contains_stream
+from respite.serializers import jsonbackends
+from respite.serializers.jsonbackends import ITEM_SEPARATOR, KEY_SEPARATOR
 
 class JSONSerializer(Serializer):
 
     def serialize(self, request):
         data = super(JSONSerializer, self).serialize(request)
 
-        return json.dumps(data, ensure_ascii=False)
+        return jsonbackends.get().dumps(data)
+
+    def stream(self, request):
+        self.streaming = True
+
+        data = super(JSONSerializer, self).serialize(request)
+
+        return self._iterencode(data, jsonbackends.get())
+
+    def _iterencode(self, data, backend):
+        """
+        Encode the given data incrementally, yielding the same document as ``serialize``
+        piece by piece and each chunk of its streams as soon as it is serialized.
+        """
+        if isinstance(data, Stream):
+            yield '['
+
+            separator = ''
+            for chunk in data.chunks:
+                if chunk:
+                    yield separator + ITEM_SEPARATOR.join([backend.dumps(item) for item in chunk])
+                    separator = ITEM_SEPARATOR
+
+            yield ']'
+
+        elif isinstance(data, dict) and contains_stream(data.values()):
+            yield '{'
+
+            separator = ''
+            for key, value in data.items():
+                # Keys that aren't strings are converted to strings as they are encoded.
+                if not isinstance(key, basestring):
+                    key = backend.dumps(key)
+
+                yield separator + backend.dumps(key) + KEY_SEPARATOR
+                separator = ITEM_SEPARATOR
+
+                for string in self._iterencode(value, backend):
+                    yield string
+
+            yield '}'
+
+        elif isinstance(data, list) and contains_stream(data):
+            yield '['
+
+            separator = ''
+            for item in data:
+                yield separator
+                separator = ITEM_SEPARATOR
+
+                for string in self._iterencode(item, backend):
+                    yield string
+
+            yield ']'
+
+        else:
+            yield backend.dumps(data)
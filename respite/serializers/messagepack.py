@@ -0,0 +1,299 @@
+"""
+An encoder and decoder of MessagePack (see https://github.com/msgpack/msgpack/blob/master/spec.md).
+
+Strings of either type are encoded as MessagePack strings (byte strings are taken to be UTF-8),
+and MessagePack strings and binaries are decoded as unicode and byte strings respectively.
+Extension types are not supported.
+"""
+
+import struct
+
+UINT8 = struct.Struct('>B')
+UINT16 = struct.Struct('>H')
+UINT32 = struct.Struct('>I')
+UINT64 = struct.Struct('>Q')
+INT8 = struct.Struct('>b')
+INT16 = struct.Struct('>h')
+INT32 = struct.Struct('>i')
+INT64 = struct.Struct('>q')
+FLOAT32 = struct.Struct('>f')
+FLOAT64 = struct.Struct('>d')
+
+# Integers between -32 and 127 are encoded as a single byte.
+_fixints = dict((integer, chr(integer & 0xff)) for integer in range(-32, 128))
+
+# Maps are keyed by few distinct keys, so their encodings are memoized.
+_keys = {}
+
+# An integer describing the number of keys to memoize.
+MEMOIZED_KEYS = 1024
+
+# An integer describing the number of arrays and maps that may be nested in one another when decoding.
+MAX_DEPTH = 256
+
+def packb(data):
+    """
+    Encode the given data as MessagePack.
+
+    :param data: Simple data types (e.g. lists, dictionaries, strings).
+    """
+    buffer = []
+    _pack(data, buffer.append)
+
+    return ''.join(buffer)
+
+def _pack(value, write):
+    """Encode the given value, writing it to the given function."""
+    if value is None:
+        write('\xc0')
+
+    elif value is True:
+        write('\xc3')
+
+    elif value is False:
+        write('\xc2')
+
+    elif isinstance(value, unicode):
+        _pack_string(value.encode('utf-8'), write)
+
+    elif isinstance(value, str):
+        _pack_string(value, write)
+
+    elif isinstance(value, (int, long)):
+        try:
+            write(_fixints[value])
+        except KeyError:
+            _pack_integer(value, write)
+
+    elif isinstance(value, dict):
+        length = len(value)
+
+        if length < 0x10:
+            write(chr(0x80 | length))
+        elif length <= 0xffff:
+            write('\xde' + UINT16.pack(length))
+        else:
+            write('\xdf' + UINT32.pack(length))
+
+        for key, item in value.items():
+            try:
+                write(_keys[key])
+            except KeyError:
+                _pack_key(key, write)
+
+            _pack(item, write)
+
+    elif isinstance(value, (list, tuple)):
+        length = len(value)
+
+        if length < 0x10:
+            write(chr(0x90 | length))
+        elif length <= 0xffff:
+            write('\xdc' + UINT16.pack(length))
+        else:
+            write('\xdd' + UINT32.pack(length))
+
+        for item in value:
+            _pack(item, write)
+
+    elif isinstance(value, float):
+        write('\xcb' + FLOAT64.pack(value))
+
+    else:
+        raise TypeError("Respite doesn't know how to encode %s as MessagePack" % value.__class__.__name__)
+
+def _pack_key(key, write):
+    """Encode the given key of a map, memoizing the encoding of strings."""
+    buffer = []
+    _pack(key, buffer.append)
+
+    encoding = ''.join(buffer)
+
+    # Numbers that are equal encode differently (e.g. 1 and True), so only strings are memoized.
+    if isinstance(key, basestring) and len(_keys) < MEMOIZED_KEYS:
+        _keys[key] = encoding
+
+    write(encoding)
+
+def _pack_string(string, write):
+    """Encode the given UTF-8 encoded string."""
+    length = len(string)
+
+    if length < 0x20:
+        write(chr(0xa0 | length) + string)
+    elif length <= 0xff:
+        write('\xd9' + UINT8.pack(length) + string)
+    elif length <= 0xffff:
+        write('\xda' + UINT16.pack(length) + string)
+    else:
+        write('\xdb' + UINT32.pack(length) + string)
+
+def _pack_integer(integer, write):
+    """Encode the given integer in as few bytes as possible."""
+    if integer >= 0:
+        if integer <= 0xff:
+            write('\xcc' + UINT8.pack(integer))
+        elif integer <= 0xffff:
+            write('\xcd' + UINT16.pack(integer))
+        elif integer <= 0xffffffff:
+            write('\xce' + UINT32.pack(integer))
+        elif integer <= 0xffffffffffffffff:
+            write('\xcf' + UINT64.pack(integer))
+        else:
+            raise OverflowError('%d is too large to encode as MessagePack' % integer)
+    else:
+        if integer >= -0x80:
+            write('\xd0' + INT8.pack(integer))
+        elif integer >= -0x8000:
+            write('\xd1' + INT16.pack(integer))
+        elif integer >= -0x80000000:
+            write('\xd2' + INT32.pack(integer))
+        elif integer >= -0x8000000000000000:
+            write('\xd3' + INT64.pack(integer))
+        else:
+            raise OverflowError('%d is too small to encode as MessagePack' % integer)
+
+def unpackb(string):
+    """
+    Decode the given MessagePack.
+
+    :param string: A byte string describing MessagePack.
+    """
+    try:
+        value, position = _unpack(string, 0, MAX_DEPTH)
+    except (IndexError, struct.error):
+        raise ValueError('Truncated MessagePack')
+    except RuntimeError:
+        # The stack may run out before ``MAX_DEPTH`` is reached if the decoder is itself deeply nested.
+        raise ValueError('MessagePack is nested too deeply')
+
+    if position != len(string):
+        raise ValueError('Extra data after MessagePack')
+
+    return value
+
+def _unpack(string, position, depth):
+    """
+    Decode the value at the given position of the given string, returning it and the position after it.
+
+    :param string: A byte string describing MessagePack.
+    :param position: An integer describing the position of the value.
+    :param depth: An integer describing the number of arrays and maps the value may yet be nested in.
+    """
+    byte = ord(string[position])
+    position += 1
+
+    # Positive fixint
+    if byte <= 0x7f:
+        return byte, position
+
+    # Fixmap
+    if byte <= 0x8f:
+        return _unpack_map(string, position, byte & 0x0f, depth)
+
+    # Fixarray
+    if byte <= 0x9f:
+        return _unpack_array(string, position, byte & 0x0f, depth)
+
+    # Fixstr
+    if byte <= 0xbf:
+        end = position + (byte & 0x1f)
+        return _decode(string, position, end), end
+
+    # Negative fixint
+    if byte >= 0xe0:
+        return byte - 0x100, position
+
+    if byte == 0xc0:
+        return None, position
+
+    if byte == 0xc2:
+        return False, position
+
+    if byte == 0xc3:
+        return True, position
+
+    try:
+        structure = _structures[byte]
+    except KeyError:
+        raise ValueError('Unsupported MessagePack type 0x%x' % byte)
+
+    value = structure.unpack_from(string, position)[0]
+    position += structure.size
+
+    # Numbers
+    if byte in _numbers:
+        return value, position
+
+    # Strings
+    if byte in (0xd9, 0xda, 0xdb):
+        end = position + value
+        return _decode(string, position, end), end
+
+    # Binaries
+    if byte in (0xc4, 0xc5, 0xc6):
+        end = position + value
+
+        if end > len(string):
+            raise IndexError
+
+        return string[position:end], end
+
+    # Arrays
+    if byte in (0xdc, 0xdd):
+        return _unpack_array(string, position, value, depth)
+
+    # Maps
+    return _unpack_map(string, position, value, depth)
+
+def _decode(string, start, end):
+    """Decode the UTF-8 encoded string between the given positions."""
+    if end > len(string):
+        raise IndexError
+
+    return string[start:end].decode('utf-8')
+
+def _unpack_array(string, position, length, depth):
+    """Decode an array of the given length at the given position (see ``_unpack``)."""
+    if not depth:
+        raise ValueError('MessagePack is nested too deeply')
+
+    depth -= 1
+    array = []
+
+    for i in xrange(length):
+        item, position = _unpack(string, position, depth)
+        array.append(item)
+
+    return array, position
+
+def _unpack_map(string, position, length, depth):
+    """Decode a map of the given length at the given position (see ``_unpack``)."""
+    if not depth:
+        raise ValueError('MessagePack is nested too deeply')
+
+    depth -= 1
+    map = {}
+
+    # Arrays and maps may be keys in MessagePack, but they can't be keys of dictionaries.
+    try:
+        for i in xrange(length):
+            key, position = _unpack(string, position, depth)
+            map[key], position = _unpack(string, position, depth)
+    except TypeError:
+        raise ValueError('MessagePack map keys must be hashable, not %s' % key.__class__.__name__)
+
+    return map, position
+
+# Structures of the values or lengths that follow the first byte of types that aren't fixed.
+_structures = {
+    0xc4: UINT8, 0xc5: UINT16, 0xc6: UINT32,
+    0xca: FLOAT32, 0xcb: FLOAT64,
+    0xcc: UINT8, 0xcd: UINT16, 0xce: UINT32, 0xcf: UINT64,
+    0xd0: INT8, 0xd1: INT16, 0xd2: INT32, 0xd3: INT64,
+    0xd9: UINT8, 0xda: UINT16, 0xdb: UINT32,
+    0xdc: UINT16, 0xdd: UINT32,
+    0xde: UINT16, 0xdf: UINT32
+}
+
+_numbers = frozenset([0xca, 0xcb, 0xcc, 0xcd, 0xce, 0xcf, 0xd0, 0xd1, 0xd2, 0xd3])
@@ -0,0 +1,9 @@
+from respite.serializers.base import Serializer
+from respite.serializers import messagepack
+
+class MessagePackSerializer(Serializer):
+
+    def serialize(self, request):
+        data = super(MessagePackSerializer, self).serialize(request)
+
+        return messagepack.packb(data)
@@ -0,0 +1,19 @@
+from respite.serializers.base import Serializer
+from respite.serializers import jsonbackends
+
+class NDJSONSerializer(Serializer):
+    """Serializer for newline-delimited JSON, which writes each row as JSON on a line of its own."""
+
+    def serialize(self, request):
+        return ''.join(self.stream(request))
+
+    def stream(self, request):
+        self.streaming = True
+
+        data = super(NDJSONSerializer, self).serialize(request)
+
+        backend = jsonbackends.get()
+
+        for rows in self._iterrows(data):
+            if rows:
+                yield ''.join([backend.dumps(row) + '\n' for row in rows])
@@ -0,0 +1,226 @@
+import datetime
+
+from decimal import Decimal
+
+from django.db import models
+from django.db.models.signals import class_prepared
+
+# Plans are compiled once for each model class and reused for every instance thereof.
+_plans = {}
+
+def find(model):
+    """
+    Find and return the plan for the given model class, compiling it if necessary.
+
+    :param model: A model class.
+    """
+    try:
+        return _plans[model]
+    except KeyError:
+        pass
+
+    # Deferred models (see ``QuerySet.only`` and ``QuerySet.defer``) share the plan of the model they defer.
+    if getattr(model, '_deferred', False):
+        plan = find(model._meta.proxy_for_model)
+    else:
+        plan = Plan(model)
+
+    _plans[model] = plan
+
+    return plan
+
+def invalidate(sender, **kwargs):
+    """Forget the plans of models that have been replaced by the given model (e.g. upon reloading)."""
+    for model in list(_plans):
+        if model is not sender \
+        and model._meta.app_label == sender._meta.app_label \
+        and model._meta.object_name == sender._meta.object_name:
+            del _plans[model]
+
+class_prepared.connect(invalidate)
+
+def serialize_date(serializer, value):
+    """
+    Dates are serialized as ISO 8601-compatible strings. Fields may hold anything until they're saved,
+    so values that aren't dates are serialized according to their type.
+    """
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+
+    return serializer._serialize(value)
+
+def serialize_decimal(serializer, value):
+    """Decimals are serialized as strings, and values that aren't decimals according to their type."""
+    if isinstance(value, Decimal):
+        return str(value)
+
+    return serializer._serialize(value)
+
+def serialize_file(serializer, value):
+    """Files are serialized as strings describing their URL."""
+    try:
+        return value.url
+    except ValueError:
+        return None
+
+def serialize_anything(serializer, value):
+    """Anything else is serialized according to its type."""
+    return serializer._serialize(value)
+
+def collapse_foreign_key(attname):
+    """Return a function that serializes a foreign key as the value of its column, without loading the related model."""
+    def collapse(model):
+        return getattr(model, attname)
+
+    return collapse
+
+def collapse_many_to_many(name):
+    """Return a function that serializes a many-to-many field as a list of the primary keys of its related models."""
+    def collapse(model):
+        return [related.pk for related in getattr(model, name).all()]
+
+    return collapse
+
+class Plan(object):
+    """
+    A plan describes how to serialize instances of a model that doesn't define a 'serialize' method.
+
+    :attribute model: A reference to a model.
+    :attribute custom: A boolean describing whether the model defines a 'serialize' method.
+    :attribute steps: A list of tuples of field names and functions that serialize their values.
+    :attribute foreign_keys: A list of tuples of names and related models of foreign keys.
+    :attribute many_to_many: A list of tuples of names and related models of many-to-many fields.
+    :attribute collapsed: A dictionary of names of relations and functions that serialize them as primary keys.
+    :attribute version_field: A string describing the name of a field that changes whenever an instance
+                              of the model is saved (i.e. a field named 'version' or the first date that
+                              is set automatically), or ``None``.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.custom = hasattr(model, 'serialize')
+        self.steps = []
+        self.foreign_keys = []
+        self.many_to_many = []
+        self.collapsed = {}
+        self.version_field = None
+
+        for field in model._meta.fields + model._meta.many_to_many:
+            self.steps.append((field.name, self._compile(field)))
+
+            if field.name == 'version':
+                self.version_field = field.name
+
+            if isinstance(field, (models.DateTimeField, models.DateField)) and field.auto_now:
+                self.version_field = self.version_field or field.name
+
+            if isinstance(field, models.ForeignKey):
+                self.foreign_keys.append((field.name, field.rel.to))
+                self.collapsed[field.name] = collapse_foreign_key(field.attname)
+
+            if isinstance(field, models.ManyToManyField):
+                self.many_to_many.append((field.name, field.rel.to))
+                self.collapsed[field.name] = collapse_many_to_many(field.name)
+
+    def relations(self, prefix='', visited=(), expand=None, fields=None):
+        """
+        Return a tuple of lists of lookups to pass to ``QuerySet.select_related`` and
+        ``QuerySet.prefetch_related`` in order to serialize instances of the model without
+        querying the database for each of their relations.
+
+        :param prefix: A string to prefix lookups with.
+        :param visited: A tuple of models that have already been traversed.
+        :param expand: A tree of dictionaries describing the relations to expand, or ``None``
+                       to expand every relation.
+        :param fields: A tree of dictionaries describing the fields to serialize, or ``None`` (or an
+                       empty dictionary) to serialize every field.
+        """
+        select_related, prefetch_related = [], []
+
+        visited = visited + (self.model,)
+
+        relations = [(name, model, True) for name, model in self.foreign_keys] + \
+                    [(name, model, False) for name, model in self.many_to_many]
+
+        for name, model, selectable in relations:
+            lookup = prefix + name
+
+            # Relations that aren't serialized needn't be loaded (and may well have been deferred).
+            if fields and name not in fields:
+                continue
+
+            # Foreign keys that aren't expanded are serialized from their column, and many-to-many
+            # fields that aren't expanded are serialized from their prefetched models.
+            if expand is not None and name not in expand:
+                if not selectable:
+                    prefetch_related.append(lookup)
+
+                continue
+
+            if selectable:
+                select_related.append(lookup)
+            else:
+                prefetch_related.append(lookup)
+
+            plan = find(model)
+
+            # Models that define a 'serialize' method may do anything, so there's no telling which of
+            # their relations to follow. Models that have been traversed already would send us in circles.
+            if plan.custom or model in visited:
+                continue
+
+            related_select_related, related_prefetch_related = plan.relations(
+                prefix = lookup + '__',
+                visited = visited,
+                expand = expand[name] if expand is not None else None,
+                fields = fields[name] if fields else None
+            )
+
+            # Relations of many-to-many fields may only be prefetched.
+            if selectable:
+                select_related.extend(related_select_related)
+            else:
+                prefetch_related.extend(related_select_related)
+
+            prefetch_related.extend(related_prefetch_related)
+
+        return select_related, prefetch_related
+
+    def related_models(self, visited=()):
+        """
+        Return a list of the models that serializing instances of the model may embed.
+
+        :param visited: A tuple of models that have already been traversed.
+        """
+        related_models = []
+
+        visited = visited + (self.model,)
+
+        for name, model in self.foreign_keys + self.many_to_many:
+            if model not in related_models:
+                related_models.append(model)
+
+            plan = find(model)
+
+            # See ``relations``.
+            if plan.custom or model in visited:
+                continue
+
+            for related_model in plan.related_models(visited):
+                if related_model not in related_models:
+                    related_models.append(related_model)
+
+        return related_models
+
+    def _compile(self, field):
+        """Return a function that serializes the value of the given field."""
+        if isinstance(field, (models.DateTimeField, models.DateField)):
+            return serialize_date
+
+        if isinstance(field, models.DecimalField):
+            return serialize_decimal
+
+        if isinstance(field, models.FileField):
+            return serialize_file
+
+        return serialize_anything
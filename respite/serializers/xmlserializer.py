@@ -1,81 +1,193 @@
-from xml.etree import ElementTree as ET
-
 from respite.inflector import singularize, pluralize
-from respite.serializers.base import Serializer
+from respite.serializers.base import Serializer, Stream, contains_stream
 
 class XMLSerializer(Serializer):
 
+    prolog = '<?xml version="1.0" encoding="UTF-8"?>'
+
     def serialize(self, request):
         data = super(XMLSerializer, self).serialize(request)
 
-        root = ET.Element('response')
+        self._encoded = {}
+
+        buffer = [self.prolog, '<response>']
+        self._write(buffer.append, 'items', data)
+        buffer.append('</response>')
+
+        return ''.join(buffer)
 
-        def serialize(key, value):
+    def stream(self, request):
+        self.streaming = True
 
-            def serialize_boolean(boolean):
-                element = ET.Element(key)
-                element.text = 'true' if boolean else 'false'
+        data = super(XMLSerializer, self).serialize(request)
+
+        self._encoded = {}
 
-                return element
+        yield self.prolog + '<response>'
 
-            def serialize_string(string):
-                element = ET.Element(key)
-                element.text = string
+        for string in self._iterencode('items', data):
+            yield string
 
-                return element
+        yield '</response>'
 
-            def serialize_list(list):
-                element = ET.Element(key)
+    def _write(self, write, key, value):
+        """
+        Write the given value as an element named by the given key.
 
-                for item in list:
-                    subelement = serialize(singularize(key), item)
-                    element.append(subelement)
+        :param write: A function that accepts strings to write.
+        :param key: A string describing the name of the element.
+        :param value: Anything to write as the contents of the element.
+        """
+        tag = encode_tag(key)
 
-                return element
+        if isinstance(value, bool):
+            write('<%s>%s</%s>' % (tag, 'true' if value else 'false', tag))
 
-            def serialize_dictionary(dictionary):
-                element = ET.Element(key)
+        elif isinstance(value, basestring):
+            if value:
+                write('<%s>%s</%s>' % (tag, escape(value), tag))
+            else:
+                write('<%s />' % tag)
 
-                for subelement_key, subelement_value in dictionary.items():
-                    subelements = serialize(subelement_key, subelement_value)
-                    element.append(subelements)
+        elif isinstance(value, list):
+            if value:
+                write('<%s>' % tag)
 
-                return element
+                singular_key = singularize_key(key)
+                for item in value:
+                    self._write(write, singular_key, item)
 
-            def serialize_integer(integer):
-                element = ET.Element(key)
-                element.text = '%s' % integer
+                write('</%s>' % tag)
+            else:
+                write('<%s />' % tag)
 
-                return element
+        elif isinstance(value, dict):
+            # Models that recur throughout the document are encoded once.
+            if id(value) in self._shared:
+                try:
+                    string = self._encoded[tag, id(value)]
+                except KeyError:
+                    buffer = []
+                    self._write_dictionary(buffer.append, tag, value)
+                    string = self._encoded[tag, id(value)] = ''.join(buffer)
 
-            def serialize_none(none):
-                element = ET.Element(key)
-                element.text = ''
+                write(string)
+            else:
+                self._write_dictionary(write, tag, value)
 
-                return element
+        elif isinstance(value, int):
+            write('<%s>%s</%s>' % (tag, value, tag))
 
-            if isinstance(value, bool):
-                return serialize_boolean(value)
+        elif value is None:
+            write('<%s />' % tag)
 
-            if isinstance(value, basestring):
-                return serialize_string(value)
+        else:
+            raise TypeError("Respite doesn't know how to serialize %s as XML" % value.__class__.__name__)
 
-            if isinstance(value, list):
-                return serialize_list(value)
+    def _write_dictionary(self, write, tag, dictionary):
+        """Write the given dictionary as an element with the given tag."""
+        if dictionary:
+            write('<%s>' % tag)
 
-            if isinstance(value, dict):
-                return serialize_dictionary(value)
+            for subelement_key, subelement_value in dictionary.items():
+                self._write(write, subelement_key, subelement_value)
 
-            if isinstance(value, int):
-                return serialize_integer(value)
+            write('</%s>' % tag)
+        else:
+            write('<%s />' % tag)
 
-            if value is None:
-                return serialize_none(value)
+    def _iterencode(self, key, value):
+        """
+        Encode the given value as an element named by the given key incrementally, yielding
+        the same document as ``serialize`` piece by piece and each chunk of its streams as
+        soon as it is serialized.
+        """
+        if isinstance(value, Stream):
+            tag = encode_tag(key)
+            singular_key = singularize_key(key)
 
-            raise TypeError("Respite doesn't know how to serialize %s as XML" % value.__class__.__name__)
+            empty = True
+            for chunk in value.chunks:
+                if not chunk:
+                    continue
+
+                buffer = ['<%s>' % tag] if empty else []
+                for item in chunk:
+                    self._write(buffer.append, singular_key, item)
+
+                empty = False
+
+                yield ''.join(buffer)
+
+            yield '<%s />' % tag if empty else '</%s>' % tag
+
+        elif isinstance(value, dict) and contains_stream(value.values()):
+            tag = encode_tag(key)
+
+            yield '<%s>' % tag
+
+            for subelement_key, subelement_value in value.items():
+                for string in self._iterencode(subelement_key, subelement_value):
+                    yield string
+
+            yield '</%s>' % tag
+
+        elif isinstance(value, list) and contains_stream(value):
+            tag = encode_tag(key)
+            singular_key = singularize_key(key)
+
+            yield '<%s>' % tag
+
+            for item in value:
+                for string in self._iterencode(singular_key, item):
+                    yield string
+
+            yield '</%s>' % tag
+
+        else:
+            buffer = []
+            self._write(buffer.append, key, value)
+
+            yield ''.join(buffer)
+
+# Elements are named by few distinct keys, so their encodings and singular forms are memoized.
+_tags = {}
+_singular_keys = {}
+
+# An integer describing the number of keys to memoize.
+MEMOIZED_KEYS = 1024
+
+def encode_tag(key):
+    """Encode the given key as the name of an element."""
+    try:
+        return _tags[key]
+    except KeyError:
+        tag = key.encode('ascii') if isinstance(key, unicode) else key
+
+        if len(_tags) < MEMOIZED_KEYS:
+            _tags[key] = tag
+
+        return tag
+
+def singularize_key(key):
+    """Return the name of the elements of a list named by the given key."""
+    try:
+        return _singular_keys[key]
+    except KeyError:
+        singular_key = singularize(key)
+
+        if len(_singular_keys) < MEMOIZED_KEYS:
+            _singular_keys[key] = singular_key
+
+        return singular_key
 
-        root.append(
-            serialize("items", data)
-        )
+def escape(text):
+    """Escape the given text for use as the contents of an element."""
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
 
-        return '<?xml version="1.0" encoding="UTF-8"?>' + ET.tostring(root)
+    return text.encode('ascii', 'xmlcharrefreplace')
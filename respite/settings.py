@@ -9,3 +9,63 @@ from django.core.exceptions import ImproperlyConfigured
 # DEFAULT_FORMAT = 'HTML'
 # DEFAULT_FORMAT = 'html
 DEFAULT_FORMAT = getattr(settings, 'RESPITE_DEFAULT_FORMAT', 'html')
+
+# An integer describing the number of models to load from the database and
+# serialize at a time when streaming responses.
+STREAMING_CHUNK_SIZE = getattr(settings, 'RESPITE_STREAMING_CHUNK_SIZE', 1000)
+
+# A string describing the name of the backend to encode and decode JSON with, or
+# None to use the fastest backend that is installed and encodes JSON exactly like
+# the standard library (i.e. 'simplejson' or 'json').
+#
+# Examples:
+# JSON_BACKEND = 'json'
+# JSON_BACKEND = 'simplejson'
+# JSON_BACKEND = 'ujson'
+JSON_BACKEND = getattr(settings, 'RESPITE_JSON_BACKEND', None)
+
+# A string describing the name of the cache (see Django's ``CACHES`` setting) to cache the serialized
+# fragments of models in, or None to serialize models anew for every response.
+#
+# Models whose fragments aren't cached yet take longer to serialize than they would without the cache
+# (some 40-70% longer in ``benchmarks/bench_fragments.py``), since their fragments are looked up and
+# stored as well, so this pays off for models that are serialized more often than they change.
+#
+# Examples:
+# FRAGMENT_CACHE = 'default'
+FRAGMENT_CACHE = getattr(settings, 'RESPITE_FRAGMENT_CACHE', None)
+
+# An integer describing the number of relations deep that clients may expand
+# relations of models to (e.g. '?expand=author.articles' is two relations deep).
+MAX_EXPANSION_DEPTH = getattr(settings, 'RESPITE_MAX_EXPANSION_DEPTH', 3)
+
+# A list of strings describing the content codings that Respite may compress responses
+# with, in order of preference, or an empty list not to compress responses. Codings that
+# aren't installed (i.e. 'br' without the 'brotli' package) are disregarded.
+#
+# Responses that carry secrets (e.g. CSRF tokens in HTML) alongside input from the request
+# shouldn't be compressed, since that exposes the secrets to attacks like BREACH.
+#
+# Examples:
+# COMPRESSION_ENCODINGS = ['br', 'gzip', 'deflate']
+COMPRESSION_ENCODINGS = getattr(settings, 'RESPITE_COMPRESSION_ENCODINGS', [])
+
+# An integer describing the size in bytes below which responses aren't compressed.
+COMPRESSION_MIN_SIZE = getattr(settings, 'RESPITE_COMPRESSION_MIN_SIZE', 200)
+
+# An integer describing the number of combinations of supported formats, extensions
+# and HTTP Accept headers to remember the negotiated format of.
+NEGOTIATION_CACHE_SIZE = getattr(settings, 'RESPITE_NEGOTIATION_CACHE_SIZE', 1024)
+
+# A boolean describing whether to determine the templates that exist once by scanning the directories
+# in TEMPLATE_DIRS and the 'templates' directories of installed applications, rather than by asking
+# the template loaders for each template the first time it is needed. Don't enable this if you load
+# templates from elsewhere (e.g. from the database).
+SCAN_TEMPLATES = getattr(settings, 'RESPITE_SCAN_TEMPLATES', False)
+
+# A string describing the name of the cache (see Django's ``CACHES`` setting) to cache the responses
+# of resources that opt in to it (see ``Resource.cache_responses``) in, or None to cache no responses.
+#
+# Examples:
+# RESPONSE_CACHE = 'default'
+RESPONSE_CACHE = getattr(settings, 'RESPITE_RESPONSE_CACHE', None)
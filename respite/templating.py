@@ -0,0 +1,72 @@
+"""
+Lookups of the templates that responses may be rendered with.
+
+Views that serialize their responses would otherwise ask every template loader for a template
+that doesn't exist on every request, so Respite remembers the templates that don't exist and
+serializes responses for them straight away. Templates are looked up anew for every request
+while ``DEBUG`` is on, so that templates that are added during development are picked up.
+
+If ``RESPITE_SCAN_TEMPLATES`` is on, the templates that exist are instead determined once by scanning
+the directories in ``TEMPLATE_DIRS`` and the ``templates`` directories of installed applications.
+"""
+
+import os
+
+from django.conf import settings
+
+from respite.settings import SCAN_TEMPLATES
+
+# Names of templates that don't exist.
+_missing = set()
+
+# Names of templates that exist, or None if template directories haven't been scanned.
+_templates = None
+
+def exists(template_name):
+    """
+    Determine whether the given template may exist.
+
+    :param template_name: A string describing the name of a template (e.g. ``'blog/posts/index.html'``).
+    """
+    if settings.DEBUG:
+        return True
+
+    if SCAN_TEMPLATES and _templates is None:
+        scan()
+
+    if _templates is not None:
+        return template_name in _templates
+
+    return template_name not in _missing
+
+def forget(template_name):
+    """
+    Remember that the given template doesn't exist.
+
+    :param template_name: A string describing the name of a template.
+    """
+    if not settings.DEBUG:
+        _missing.add(template_name)
+
+def scan():
+    """Determine the templates that exist by scanning the template directories."""
+    global _templates
+
+    from django.template.loaders.app_directories import app_template_dirs
+
+    templates = set()
+
+    for directory in list(settings.TEMPLATE_DIRS) + list(app_template_dirs):
+        for root, directories, filenames in os.walk(directory):
+            for filename in filenames:
+                path = os.path.relpath(os.path.join(root, filename), directory)
+                templates.add(path.replace(os.sep, '/'))
+
+    _templates = templates
+
+def invalidate():
+    """Forget the templates that were found not to exist or found by scanning."""
+    global _templates
+
+    _missing.clear()
+    _templates = None
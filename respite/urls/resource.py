@@ -81,6 +81,9 @@ def resource(views, routes, prefix=''):
 
             return views().options(request, map, **kwargs)
 
+    # The views of resources are known by their URL patterns (e.g. to ``respite.views.batch.Batch``).
+    dispatch.views = views
+
     def urlify(routes):
         """
         Transform routes into urlpatterns.
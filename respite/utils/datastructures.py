@@ -1,4 +1,10 @@
 import json
+import threading
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ..lib.ordereddict import OrderedDict
 
 from django.conf import settings
 from django.utils.datastructures import MultiValueDict
@@ -33,3 +39,45 @@ class NestedQueryDict(QueryDict):
                                     force_unicode(value, encoding, errors='replace'))
 
         self._mutable = mutable
+
+class LRUCache(object):
+    """
+    A dictionary-like cache of a bounded number of items, which discards the least recently used
+    items to make room for new ones.
+    """
+
+    def __init__(self, size):
+        """
+        Initialize a new cache.
+
+        :param size: An integer describing the number of items to keep.
+        """
+        self.size = size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __getitem__(self, key):
+        with self.lock:
+            value = self.items.pop(key)
+            self.items[key] = value
+
+        return value
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            self.items.pop(key, None)
+            self.items[key] = value
+
+            while len(self.items) > self.size:
+                self.items.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def __len__(self):
+        return len(self.items)
+
+    def clear(self):
+        """Discard every item."""
+        with self.lock:
+            self.items.clear()
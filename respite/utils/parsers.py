@@ -28,6 +28,49 @@ def parse_content_type(content_type):
 
         return (content_type, encoding)
 
+def parse_accept_header(header):
+    """
+    Return a list of tuples of media ranges listed in the HTTP Accept header, dictionaries
+    of their parameters and their quality, in the order they are listed.
+
+    :param header: A string describing the contents of the HTTP Accept header.
+
+    Example::
+
+        >>> parse_accept_header('text/html;level=1, text/*;q=0.5')
+        [('text/html', {'level': '1'}, 1.0), ('text/*', {}, 0.5)]
+    """
+    media_ranges = []
+
+    for component in header.split(','):
+        parts = component.split(';')
+        media_range = parts[0].strip().lower()
+
+        if media_range == '*':
+            media_range = '*/*'
+
+        if '/' not in media_range:
+            continue
+
+        parameters = {}
+        quality = 1.0
+
+        for part in parts[1:]:
+            name, _, value = part.partition('=')
+            name, value = name.strip().lower(), value.strip().strip('"')
+
+            if name == 'q':
+                try:
+                    quality = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    quality = 0.0
+            elif name:
+                parameters[name] = value
+
+        media_ranges.append((media_range, parameters, quality))
+
+    return media_ranges
+
 def parse_http_accept_header(header):
     """
     Return a list of content types listed in the HTTP Accept header
@@ -35,31 +78,68 @@ def parse_http_accept_header(header):
 
     :param header: A string describing the contents of the HTTP Accept header.
     """
-    components = [item.strip() for item in header.split(',')]
-
-    l = []
-    for component in components:
-        if ';' in component:
-            subcomponents = [item.strip() for item in component.split(';')]
-            l.append(
-                (
-                    subcomponents[0], # eg. 'text/html'
-                    subcomponents[1][2:] # eg. 'q=0.9'
-                )
-            )
-        else:
-            l.append((component, '1'))
+    media_ranges = sorted(parse_accept_header(header), key=lambda media_range: media_range[2], reverse=True)
 
-    l.sort(
-        key = lambda i: i[1],
-        reverse = True
-    )
+    return [media_range for media_range, parameters, quality in media_ranges]
+
+def parse_accept_encoding_header(header):
+    """
+    Return a dictionary of content codings listed in the HTTP Accept-Encoding header
+    and their quality.
+
+    :param header: A string describing the contents of the HTTP Accept-Encoding header.
+
+    Example::
+
+        >>> parse_accept_encoding_header('gzip, deflate;q=0.5, *;q=0')
+        {'gzip': 1.0, 'deflate': 0.5, '*': 0.0}
+    """
+    codings = {}
+
+    for component in header.split(','):
+        coding, _, parameters = component.partition(';')
+        coding = coding.strip().lower()
+
+        if not coding:
+            continue
+
+        quality = 1.0
+
+        for parameter in parameters.split(';'):
+            name, _, value = parameter.partition('=')
+
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        codings[coding] = quality
+
+    return codings
+
+def parse_field_paths(paths, max_depth=None):
+    """
+    Return a tree of dictionaries describing the given field paths.
+
+    :param paths: A list of strings describing fields, separated by periods for fields of related models.
+    :param max_depth: An integer describing the number of fields of each path to consider, or ``None``
+                      to consider every field.
+
+    Example::
+
+        >>> parse_field_paths(['title', 'author.name'])
+        {'title': {}, 'author': {'name': {}}}
+    """
+    tree = {}
 
-    content_types = []
-    for i in l:
-        content_types.append(i[0])
+    for path in paths:
+        node = tree
+        for name in path.strip().split('.')[:max_depth]:
+            if name:
+                node = node.setdefault(name, {})
 
-    return content_types
+    return tree
 
 def parse_multipart_data(request):
     """
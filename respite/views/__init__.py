@@ -1,2 +1,3 @@
 from views import Views
-from resource import Resource
\ No newline at end of file
+from resource import Resource
+from batch import Batch
@@ -0,0 +1,287 @@
+from StringIO import StringIO
+from multiprocessing.pool import ThreadPool
+
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.urlresolvers import resolve, Resolver404, get_urlconf, set_urlconf, get_script_prefix, set_script_prefix
+from django.db import connections
+from django.http import HttpResponseNotFound
+from django.utils import translation
+from django.utils.translation import string_concat, ugettext_lazy as _
+
+from respite import formats
+from respite.serializers import jsonbackends
+from respite.utils import parse_content_type
+from respite.urls import templates
+
+from respite.decorators import route
+
+# The handler that runs the requests of batches through middleware, once it has loaded the middleware.
+_handler = None
+
+def get_handler():
+    """Return a handler that runs requests through every middleware in ``MIDDLEWARE_CLASSES``."""
+    global _handler
+
+    if _handler is None:
+        handler = BaseHandler()
+        handler.load_middleware()
+
+        _handler = handler
+
+    return _handler
+
+class Batch(object):
+    """
+    A view that runs a list of requests to resources in a single request.
+
+    :attribute max_requests: An integer describing the number of requests a batch may have, or ``50`` by default.
+    :attribute threads: An integer describing the number of threads to run the requests of batches that don't
+                        change anything (i.e. whose requests are all GET, HEAD or OPTIONS requests) on
+                        concurrently, or ``0`` by default to run every request in turn.
+
+    Example usage::
+
+        class BatchViews(Views, Batch):
+            supported_formats = ['json']
+
+        urlpatterns = resource(
+            prefix = 'batch/',
+            views = BatchViews,
+            routes = BatchViews.routes
+        )
+
+    Clients post a list of requests, each a dictionary of its method, path and (optionally) body and
+    headers, and get a list of responses, each a dictionary of its status, headers, cookies and body::
+
+        POST /batch/
+        [
+            {"method": "GET", "path": "/articles/1"},
+            {"method": "PATCH", "path": "/articles/2", "body": {"title": "Title"}}
+        ]
+
+    Requests are resolved by the URL patterns of resources (see ``respite.urls.resource``) and run in-process
+    through every middleware in ``MIDDLEWARE_CLASSES``, with the cookies and headers of the batch. They're
+    authenticated and checked for CSRF tokens as any other request, so clients that send their CSRF token
+    in the X-CSRFToken header of the batch send it with each of its requests. Bodies are given to them as
+    JSON, and responses are given in the format of the batch; bodies in formats that can be parsed are
+    embedded as they are, and the rest as strings. Cookies are given as the values of their Set-Cookie
+    headers, since headers may only be given once each.
+
+    Requests that run concurrently do so on database connections of their own, which don't see changes that
+    the batch hasn't committed. Batches that change anything are therefore always run in turn, so that
+    each request sees the changes of those before it.
+    """
+    max_requests = 50
+    threads = 0
+
+    # Methods of requests that don't change anything.
+    safe_methods = ['GET', 'HEAD', 'OPTIONS']
+
+    @route(
+        regex = lambda prefix: string_concat('^', prefix, '(?:$|', _('index'), templates.format, '$)'),
+        method = 'POST',
+        name = lambda views: 'batch'
+    )
+    def batch(self, request):
+        """Run a list of requests."""
+        format = self._get_format(request)
+
+        if not format:
+            return self._render(request)
+
+        try:
+            items = self._parse_batch(request)
+        except ValueError as exception:
+            return self._error(request, 400, message=unicode(exception))
+
+        requests = [self._get_subrequest(request, format, item) for item in items]
+
+        handler = get_handler()
+
+        if self.threads and len(requests) > 1 and all(subrequest.method in self.safe_methods for subrequest in requests):
+            # Threads don't share the URLconf, script prefix and language of the batch, so they're given them.
+            state = get_urlconf(), get_script_prefix(), translation.get_language()
+
+            pool = ThreadPool(self.threads)
+
+            try:
+                responses = pool.map(lambda subrequest: self._run_concurrently(handler, subrequest, state), requests)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            responses = [self._run(handler, subrequest) for subrequest in requests]
+
+        return self._render(
+            request = request,
+            template = 'batch',
+            context = {
+                'responses': [self._describe_response(format, response) for response in responses]
+            },
+            status = 200
+        )
+
+    def _parse_batch(self, request):
+        """
+        Parse the list of requests in the body of the given batch.
+
+        :param request: A django.http.HttpRequest instance.
+
+        The body is parsed anew rather than taken from ``request.POST``, so that the bodies of requests
+        are given to them as they are.
+        """
+        content_type, encoding = parse_content_type(request.META.get('CONTENT_TYPE', ''))
+
+        try:
+            parser = formats.registry.parsers[formats.find_by_content_type(content_type)]
+        except (formats.UnknownFormat, KeyError):
+            raise ValueError('The batch must be given in a format that Respite can parse.')
+
+        items = parser(request.body, encoding)
+
+        if not isinstance(items, list) or not all(isinstance(item, dict) and 'path' in item for item in items):
+            raise ValueError('The batch must be a list of requests with a method, a path and (optionally) a body.')
+
+        if len(items) > self.max_requests:
+            raise ValueError('The batch may have at most %d requests.' % self.max_requests)
+
+        return items
+
+    def _get_subrequest(self, request, format, item):
+        """
+        Build a request of the given batch.
+
+        :param request: A django.http.HttpRequest instance describing the batch.
+        :param format: A 'formats.Format' instance describing the format of the batch.
+        :param item: A dictionary describing the method, path and (optionally) body and headers of the request.
+        """
+        path, separator, query_string = unicode(item['path']).encode('utf-8').partition('?')
+
+        body = '' if item.get('body') is None else jsonbackends.get().dumps(item['body'])
+
+        if isinstance(body, unicode):
+            body = body.encode('utf-8')
+
+        environ = dict(request.META)
+        environ.update({
+            'REQUEST_METHOD': str(item.get('method', 'GET')).upper(),
+            'PATH_INFO': path,
+            'SCRIPT_NAME': '',
+            'QUERY_STRING': query_string,
+            'CONTENT_TYPE': 'application/json' if body else '',
+            'CONTENT_LENGTH': str(len(body)),
+            'HTTP_ACCEPT': format.content_type,
+            'wsgi.input': StringIO(body)
+        })
+
+        # Responses are compressed as a whole (if at all), and the conditions and method override of the batch
+        # don't apply to its requests.
+        for header in environ.keys():
+            if header in ['HTTP_ACCEPT_ENCODING', 'HTTP_X_HTTP_METHOD_OVERRIDE'] or header.startswith('HTTP_IF_'):
+                del environ[header]
+
+        # The method of a request is given by its method alone, so that requests can't pass for safe ones.
+        for header, value in (item.get('headers') or {}).items():
+            header = 'HTTP_%s' % str(header).upper().replace('-', '_')
+
+            if header != 'HTTP_X_HTTP_METHOD_OVERRIDE':
+                environ[header] = str(value)
+
+        subrequest = WSGIRequest(environ)
+
+        # Batches that are exempt from CSRF checks (e.g. those of Django's test client) exempt their requests, too.
+        if getattr(request, '_dont_enforce_csrf_checks', False):
+            subrequest._dont_enforce_csrf_checks = True
+
+        return subrequest
+
+    def _run(self, handler, request):
+        """
+        Run the given request of a batch, returning its response.
+
+        :param handler: A django.core.handlers.base.BaseHandler instance that has loaded its middleware.
+        :param request: A django.http.HttpRequest instance.
+        """
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return HttpResponseNotFound()
+
+        # Only resources may be requested, and batches can't be nested.
+        views = getattr(match.func, 'views', None)
+
+        if views is None or issubclass(views, Batch):
+            return HttpResponseNotFound()
+
+        # The handler sets the URLconf of the thread for the request, and middleware may activate another
+        # language, so both are restored for the batch.
+        urlconf, language = get_urlconf(), translation.get_language()
+
+        try:
+            return handler.get_response(request)
+        finally:
+            set_urlconf(urlconf)
+            translation.activate(language)
+
+    def _run_concurrently(self, handler, request, state):
+        """
+        Run the given request of a batch on a thread of its own (see ``_run``).
+
+        :param handler: A django.core.handlers.base.BaseHandler instance that has loaded its middleware.
+        :param request: A django.http.HttpRequest instance.
+        :param state: A tuple of the URLconf, script prefix and language of the batch.
+        """
+        urlconf, prefix, language = state
+
+        set_urlconf(urlconf)
+        set_script_prefix(prefix)
+        translation.activate(language)
+
+        try:
+            return self._run(handler, request)
+        finally:
+            translation.deactivate()
+            set_urlconf(None)
+
+            for connection in connections.all():
+                connection.close()
+
+    def _describe_response(self, format, response):
+        """
+        Return a dictionary describing the status, headers, cookies and body of the given response of a batch.
+
+        :param format: A 'formats.Format' instance describing the format of the batch.
+        :param response: A django.http.HttpResponse or django.http.StreamingHttpResponse instance.
+        """
+        if response.streaming:
+            content = ''.join(response.streaming_content)
+        else:
+            content = response.content
+
+        content_type, encoding = parse_content_type(response.get('Content-Type', ''))
+
+        try:
+            parser = formats.registry.parsers[formats.find_by_content_type(content_type)]
+        except (formats.UnknownFormat, KeyError):
+            parser = None
+
+        body = None
+
+        if content and parser:
+            try:
+                body = parser(content, encoding)
+            except ValueError:
+                parser = None
+
+        if content and not parser:
+            body = content.decode(encoding, 'replace')
+
+        return {
+            'status': response.status_code,
+            'headers': dict(response.items()),
+            'cookies': [morsel.OutputString() for morsel in response.cookies.values()],
+            'body': body
+        }
+
+    routes = [batch.route]
@@ -1,12 +1,23 @@
+import hashlib
+import calendar
+import warnings
+
 from django.shortcuts import render
 from django.http import HttpResponse
 from django.core.urlresolvers import reverse
 from django.forms import CharField, HiddenInput
 from django.forms.models import model_to_dict
-from django.db.models import FieldDoesNotExist
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import FieldDoesNotExist, Count, Max, Sum
 from django.utils.translation import string_concat, ugettext_lazy as _
+from django.utils.http import quote_etag, http_date
 
 from respite.utils import generate_form
+from respite.serializers import plans
+from respite import caching
+from respite import pagination
 from respite.inflector import pluralize, cc2us
 from respite.views.views import Views
 from respite.urls import templates
@@ -19,9 +30,72 @@ class Resource(object):
 
     :attribute model: A reference to a model.
     :attribute form: A reference to a form, or ``None`` to generate one automatically.
+    :attribute values_only: A boolean describing whether ``index`` loads dictionaries of values rather than models,
+                            or ``False`` by default. Models that define a 'serialize' method are always loaded.
+    :attribute last_modified_field: A string describing the name of a date field that is set whenever an object is
+                                    saved (e.g. ``'updated_at'``), or ``None`` by default.
+    :attribute version_field: A string describing the name of an integer field that is incremented whenever an object
+                              is saved, or ``None`` by default.
+    :attribute cache_responses: A boolean describing whether to cache the responses of ``index`` and ``show`` in the
+                                cache given in ``RESPITE_RESPONSE_CACHE`` (if any), or ``False`` by default. Don't
+                                enable this for resources whose responses depend on anything but the request's host,
+                                scheme, path, format, query parameters and ``cache_vary_headers`` (e.g. the user).
+    :attribute cache_vary_headers: A list of strings describing HTTP request headers that responses vary by besides
+                                   Accept and Accept-Encoding (e.g. ``['Accept-Language']``), or ``[]`` by default.
+    :attribute cache_dependencies: A list of model classes that responses embed besides the model and the models of its
+                                   relations, or ``[]`` by default. Responses are invalidated as the model or its
+                                   relations change, but relations that are embedded in other ways (e.g. reverse
+                                   relations, or the relations of models that define a 'serialize' method) must
+                                   be given here.
+    :attribute cache_timeout: An integer describing the number of seconds to cache responses for, or ``None`` by
+                              default for the default timeout of the cache.
+    :attribute page_size: An integer describing the number of objects per page of ``index``, or ``None`` by default
+                          to render every object at once.
+    :attribute pagination: A string describing how to paginate ``index``; ``'keyset'`` (by default) to paginate
+                           by ``pagination_field`` in the same time for every page, or ``'offset'`` to paginate
+                           small tables in the model's default ordering (see ``respite.pagination``).
+    :attribute pagination_field: A string describing the name of a field that isn't nullable to order and paginate
+                                 ``index`` by, prefixed with '-' for descending order (e.g. ``'-created_at'``), or
+                                 ``'pk'`` by default.
+    :attribute bulk: A boolean describing whether objects may be created, updated and deleted in bulk by
+                     POST, PATCH and DELETE requests to the collection with lists of objects (or, to delete
+                     them, of their ids), or ``False`` by default. Bulk updates and deletions must also be
+                     routed (i.e. ``routes = Resource.routes + [Resource.bulk_update.route, Resource.bulk_destroy.route]``).
+    :attribute filterable_fields: A list of strings describing the query parameters that ``index`` may be filtered by,
+                                  each a field and optionally a lookup (e.g. ``['author', 'created_at__gte']``), or
+                                  ``[]`` by default not to filter ``index`` at all. If any are given, requests with
+                                  query parameters that filter by other fields are rejected with HTTP 400 Bad Request.
+    :attribute orderable_fields: A list of strings describing the fields that ``index`` may be ordered by in the
+                                 ``order`` query parameter (e.g. ``?order=-created_at``), or ``[]`` by default not
+                                 to order ``index`` by the query at all. If any are given, requests that order by
+                                 other fields are rejected with HTTP 400 Bad Request. If ``index`` is paginated by
+                                 keyset, it may be ordered by one of them at a time (which then mustn't be nullable)
+                                 instead of by ``pagination_field``.
+    :attribute count_objects: A boolean describing whether to give the number of objects ``index`` paginates in the
+                              X-Total-Count header, or ``False`` by default. The number is cached in the cache given
+                              in ``RESPITE_RESPONSE_CACHE`` or ``RESPITE_FRAGMENT_CACHE`` (if any) until objects of
+                              the model are saved or deleted.
+
+    Resources that have a ``last_modified_field`` or ``version_field`` respond to conditional requests (i.e.
+    requests with If-None-Match or If-Modified-Since headers) for representations that haven't changed with
+    HTTP 304 Not Modified, without loading or serializing any objects (see ``_get_validators``).
     """
     model = None
     form = None
+    values_only = False
+    last_modified_field = None
+    version_field = None
+    cache_responses = False
+    cache_vary_headers = []
+    cache_dependencies = []
+    cache_timeout = None
+    bulk = False
+    filterable_fields = []
+    orderable_fields = []
+    page_size = None
+    pagination = 'keyset'
+    pagination_field = 'pk'
+    count_objects = False
 
     @route(
         regex = lambda prefix: string_concat('^', prefix, '(?:$|', _('index'), templates.format, '$)'),
@@ -30,17 +104,52 @@ class Resource(object):
     )
     def index(self, request):
         """Render a list of objects."""
-        objects = self.model.objects.all()
+        try:
+            objects = self._filter(request, self.model.objects.all())
+            ordering = self._get_ordering(request)
+        except self.InvalidQuery as exception:
+            return self._error(request, 400, message=unicode(exception))
 
-        return self._render(
+        if ordering:
+            objects = objects.order_by(*ordering)
+
+        validators = self._get_validators(request, objects, aggregate=True)
+
+        if validators:
+            response = self._not_modified(request, *validators)
+
+            if response:
+                return response
+
+        response, state = self._get_cached_response(request)
+
+        if response:
+            return response
+
+        headers = self._get_validator_headers(validators)
+
+        context = {}
+
+        if self.page_size:
+            try:
+                objects, context['pagination'], pagination_headers = self._paginate(request, objects, ordering)
+            except pagination.InvalidCursor:
+                return self._error(request, 400, message='The cursor is invalid.')
+
+            headers.update(pagination_headers)
+
+        context[cc2us(pluralize(self.model.__name__))] = self._restrict_fields(request, objects, values=self.values_only)
+
+        response = self._render(
             request = request,
             template = 'index',
-            context = {
-                cc2us(pluralize(self.model.__name__)): objects,
-            },
-            status = 200
+            context = context,
+            status = 200,
+            headers = headers
         )
 
+        return self._cache_response(request, response, state)
+
     @route(
         regex = lambda prefix: string_concat('^', prefix, '(?P<id>[0-9]+)', templates.format, '$'),
         method = 'GET',
@@ -48,8 +157,21 @@ class Resource(object):
     )
     def show(self, request, id):
         """Render a single object."""
+        validators = self._get_validators(request, self.model.objects.filter(id=id))
+
+        if validators:
+            response = self._not_modified(request, *validators)
+
+            if response:
+                return response
+
+        response, state = self._get_cached_response(request)
+
+        if response:
+            return response
+
         try:
-            object = self.model.objects.get(id=id)
+            object = self._select_relations(request, self._restrict_fields(request, self.model.objects.all())).get(id=id)
         except self.model.DoesNotExist:
             return self._render(
                 request = request,
@@ -61,15 +183,18 @@ class Resource(object):
                 prefix_template_path = False
             )
 
-        return self._render(
+        response = self._render(
             request = request,
             template = 'show',
             context = {
                 cc2us(self.model.__name__): object
             },
-            status = 200
+            status = 200,
+            headers = self._get_validator_headers(validators)
         )
 
+        return self._cache_response(request, response, state)
+
     @route(
         regex = lambda prefix: string_concat('^', prefix, _('new'), templates.format, '$'),
         method = 'GET',
@@ -95,6 +220,9 @@ class Resource(object):
     )
     def create(self, request):
         """Create a new object."""
+        if isinstance(getattr(request, 'data', None), list):
+            return self._bulk_create(request)
+
         form = (self.form or generate_form(self.model))(request.POST)
 
         if form.is_valid():
@@ -267,6 +395,567 @@ class Resource(object):
             status = 200
         )
 
+    def _get_validators(self, request, queryset, aggregate=False):
+        """
+        Determine the validators of the representation of the given objects, or ``None`` if the resource has none
+        or there are no such objects.
+
+        Returns a tuple of a string describing the entity tag of the representation and an integer describing
+        the time its objects were last modified in seconds since the epoch (or ``None``).
+
+        :param request: A django.http.HttpRequest instance.
+        :param queryset: A queryset of the object or objects to represent.
+        :param aggregate: A boolean describing whether the representation is of every object in the queryset
+                          rather than of its only object.
+
+        Validators are loaded from the database without loading the objects themselves. Collections are
+        validated by the latest of their ``last_modified_field`` and the sum of their ``version_field``
+        along with the number of objects, so that objects that are created or deleted change the entity
+        tag too. Since they may be deleted without changing the latest time any of them were modified,
+        collections are validated by entity tag only.
+        """
+        if not self.last_modified_field and not self.version_field:
+            return None
+
+        if aggregate:
+            aggregates = {'count': Count('pk')}
+
+            if self.last_modified_field:
+                aggregates['last_modified'] = Max(self.last_modified_field)
+
+            if self.version_field:
+                aggregates['version'] = Sum(self.version_field)
+
+            values = queryset.order_by().aggregate(**aggregates)
+        else:
+            names = [name for name in [self.last_modified_field, self.version_field] if name]
+
+            try:
+                values = dict(zip(names, queryset.values_list(*names)[0]))
+            except IndexError:
+                return None
+
+        format = self._get_format(request)
+
+        # Each representation of the objects (e.g. in other formats or with other fields) has its own entity tag.
+        etag = hashlib.md5(repr((
+            sorted(values.items()),
+            format and format.name,
+            sorted(request.GET.lists())
+        ))).hexdigest()
+
+        last_modified = values.get(self.last_modified_field) if not aggregate else None
+
+        if last_modified is not None:
+            last_modified = calendar.timegm(getattr(last_modified, 'utctimetuple', last_modified.timetuple)())
+
+        return etag, last_modified
+
+    def _get_validator_headers(self, validators):
+        """
+        Return a dictionary of HTTP headers describing the given validators (see ``_get_validators``).
+
+        :param validators: A tuple of an entity tag and the time of last modification, or ``None``.
+        """
+        headers = {}
+
+        if validators:
+            etag, last_modified = validators
+
+            headers['ETag'] = quote_etag(etag)
+
+            if last_modified is not None:
+                headers['Last-Modified'] = http_date(last_modified)
+
+        return headers
+
+    @route(
+        regex = lambda prefix: string_concat('^', prefix, '(?:$|', _('index'), templates.format, '$)'),
+        method = 'PATCH',
+        name = lambda views: pluralize(cc2us(views.model.__name__))
+    )
+    def bulk_update(self, request):
+        """Update a list of objects."""
+        if not self.bulk:
+            return self._bulk_not_allowed()
+
+        items = request.data if isinstance(getattr(request, 'data', None), list) else []
+
+        # Ids are validated before they're looked up, so that invalid ones don't fail the query.
+        ids = [self._get_bulk_id(item.get('id')) if hasattr(item, 'get') else None for item in items]
+
+        objects = self.model.objects.in_bulk([id for id in ids if id is not None])
+
+        results = []
+        for item, id in zip(items, ids):
+            if id is None:
+                results.append((None, self._bulk_invalid_id()))
+                continue
+
+            try:
+                object = objects[id]
+            except KeyError:
+                results.append((None, self._bulk_not_found()))
+                continue
+
+            fields = []
+            for field in item:
+                try:
+                    self.model._meta.get_field_by_name(field)
+                except FieldDoesNotExist:
+                    continue
+                else:
+                    fields.append(field)
+
+            Form = generate_form(
+                model = self.model,
+                form = self.form,
+                fields = fields
+            )
+
+            results.append((Form(item, instance=object), None))
+
+        return self._bulk_save(request, results, status=200)
+
+    @route(
+        regex = lambda prefix: string_concat('^', prefix, '(?:$|', _('index'), templates.format, '$)'),
+        method = 'DELETE',
+        name = lambda views: pluralize(cc2us(views.model.__name__))
+    )
+    def bulk_destroy(self, request):
+        """Delete a list of objects."""
+        if not self.bulk:
+            return self._bulk_not_allowed()
+
+        # Clients that can't send bodies with DELETE requests may give the ids in the query string instead.
+        if isinstance(getattr(request, 'data', None), list):
+            ids = request.data
+        else:
+            ids = [id for id in request.GET.get('ids', '').split(',') if id]
+
+        valid_ids = [self._get_bulk_id(id) for id in ids]
+
+        objects = self.model.objects.in_bulk([id for id in valid_ids if id is not None])
+
+        results = []
+        for id, valid_id in zip(ids, valid_ids):
+            if valid_id is None:
+                results.append(self._bulk_invalid_id(id))
+            elif valid_id in objects:
+                results.append({'status': 200, 'id': valid_id})
+            else:
+                results.append(self._bulk_not_found(valid_id))
+
+        if all(result['status'] == 200 for result in results):
+            with transaction.atomic():
+                self.model.objects.filter(pk__in=valid_ids).delete()
+
+            status = 200
+        else:
+            status = 400
+
+        return self._render(
+            request = request,
+            template = 'bulk',
+            context = {
+                'results': results
+            },
+            status = status
+        )
+
+    def _bulk_create(self, request):
+        """Create a list of objects."""
+        if not self.bulk:
+            return self._error(request, 400, message='The %s can\'t be created in bulk.' % pluralize(self.model.__name__.lower()))
+
+        Form = self.form or generate_form(self.model)
+
+        results = []
+        for item in request.data:
+            if hasattr(item, 'getlist'):
+                results.append((Form(item), None))
+            else:
+                results.append((None, {'status': 400, 'error': 'The %s is invalid.' % self.model.__name__.lower()}))
+
+        return self._bulk_save(request, results, status=201)
+
+    def _bulk_save(self, request, results, status):
+        """
+        Validate and save the given forms, and render their results.
+
+        :param request: A django.http.HttpRequest instance.
+        :param results: A list of tuples of a form (or ``None``) and the result of items that have no form (or ``None``).
+        :param status: An integer describing the HTTP status code of objects that are saved.
+
+        Every form is validated before any of them are saved, and they're all saved in a single transaction
+        or, if any item is invalid, not at all (in which case valid items are given HTTP 424 Failed Dependency).
+        Objects are saved one by one so that they're given primary keys, and so that their many-to-many
+        relations are saved and signals (e.g. to invalidate caches) are sent.
+        """
+        valid = all([form is not None and form.is_valid() for form, result in results])
+
+        if valid:
+            with transaction.atomic():
+                for form, result in results:
+                    form.save()
+
+        items = []
+        for form, result in results:
+            if form is None:
+                items.append(result)
+            elif not form.is_valid():
+                items.append({'status': 400, 'form': form})
+            elif not valid:
+                items.append({'status': 424})
+            else:
+                items.append({'status': status, cc2us(self.model.__name__): form.instance})
+
+        return self._render(
+            request = request,
+            template = 'bulk',
+            context = {
+                'results': items
+            },
+            status = status if valid else 400
+        )
+
+    def _get_bulk_id(self, id):
+        """
+        Convert the given id of an item of a bulk request to a primary key of the resource's model, or
+        return ``None`` if it isn't one.
+
+        :param id: Anything the client gave as an id.
+        """
+        try:
+            id = self.model._meta.pk.to_python(id)
+        except ValidationError:
+            return None
+
+        if isinstance(id, (int, long)) and not -pagination.MAX_INTEGER - 1 <= id <= pagination.MAX_INTEGER:
+            return None
+
+        return id
+
+    def _bulk_invalid_id(self, id=None):
+        """Return the result of an item of a bulk request whose id is invalid."""
+        result = {'status': 400, 'error': 'The id of the %s is invalid.' % self.model.__name__.lower()}
+
+        if id is not None:
+            result['id'] = id
+
+        return result
+
+    def _bulk_not_found(self, id=None):
+        """Return the result of an item of a bulk request whose object doesn't exist."""
+        result = {'status': 404, 'error': 'The %s could not be found.' % self.model.__name__.lower()}
+
+        if id is not None:
+            result['id'] = id
+
+        return result
+
+    def _bulk_not_allowed(self):
+        """Render HTTP 405 Method Not Allowed for bulk requests to resources that don't allow them."""
+        response = HttpResponse(status=405)
+        response['Allow'] = 'GET, POST'
+
+        return response
+
+    def _filter(self, request, queryset):
+        """
+        Filter the given queryset by the query parameters of the given request (see ``filterable_fields``).
+
+        :param request: A django.http.HttpRequest instance.
+        :param queryset: A queryset of the resource's model.
+
+        Query parameters that don't name a field of the model and those Respite gives other meanings (i.e.
+        ``fields``, ``expand``, ``order`` and ``cursor``) are disregarded, as are all of them if there are
+        no ``filterable_fields``.
+        Values of ``in`` lookups are separated by commas, and values of ``isnull`` lookups are 'true' or 'false'.
+        """
+        if not self.filterable_fields:
+            return queryset
+
+        names = [field.name for field in self.model._meta.fields + self.model._meta.many_to_many]
+
+        filters = {}
+
+        for parameter, value in request.GET.items():
+            if parameter.split('__')[0] not in names or parameter in ['fields', 'expand', 'order', 'cursor']:
+                continue
+
+            if parameter not in self.filterable_fields:
+                raise self.InvalidQuery('The %s can\'t be filtered by "%s".' % (self.model.__name__.lower(), parameter))
+
+            if parameter.endswith('__in'):
+                value = value.split(',')
+
+            if parameter.endswith('__isnull'):
+                value = value.lower() in ['true', '1']
+
+            filters[parameter] = value
+
+            if settings.DEBUG:
+                self._check_index(parameter)
+
+        try:
+            return queryset.filter(**filters)
+        except (ValueError, TypeError, ValidationError):
+            raise self.InvalidQuery('The %s can\'t be filtered by the given values.' % self.model.__name__.lower())
+
+    def _get_ordering(self, request):
+        """
+        Determine and return a list of the fields to order the resource's objects by (see ``orderable_fields``),
+        or ``[]`` if the request doesn't give any.
+
+        :param request: A django.http.HttpRequest instance.
+
+        The ``order`` query parameter is disregarded if there are no ``orderable_fields``.
+        """
+        if not self.orderable_fields:
+            return []
+
+        ordering = [field for field in request.GET.get('order', '').split(',') if field]
+
+        for field in ordering:
+            if field.lstrip('-') not in self.orderable_fields:
+                raise self.InvalidQuery('The %s can\'t be ordered by "%s".' % (self.model.__name__.lower(), field))
+
+            if settings.DEBUG:
+                self._check_index(field.lstrip('-'))
+
+        if len(ordering) > 1 and self.page_size and self.pagination == 'keyset':
+            raise self.InvalidQuery('The %s can only be ordered by one field at a time.' % self.model.__name__.lower())
+
+        return ordering
+
+    def _check_index(self, lookup):
+        """
+        Warn if the field of the given lookup (e.g. ``'created_at__gte'``) has no database index.
+
+        :param lookup: A string describing a field and optionally a lookup.
+
+        Fields of related models are not checked.
+        """
+        try:
+            field = self.model._meta.get_field(lookup.split('__')[0])
+        except FieldDoesNotExist:
+            return
+
+        if field.db_index or field.unique or field.primary_key:
+            return
+
+        for fields in self.model._meta.index_together:
+            if fields[0] == field.name:
+                return
+
+        warnings.warn(
+            '%s.%s has no database index, so filtering or ordering %s by it scans the table.' % (
+                self.model.__name__, field.name, self.__class__.__name__
+            ),
+            RuntimeWarning
+        )
+
+    def _paginate(self, request, queryset, ordering=None):
+        """
+        Paginate the given queryset by the cursor in the ``cursor`` query parameter (see ``page_size``).
+
+        Returns a tuple of a queryset of the objects on the page, a dictionary describing the URLs of the
+        next and previous pages (or ``None``) and the number of objects (if ``count_objects``), and a
+        dictionary of HTTP headers describing the same in the Link and X-Total-Count headers.
+
+        :param request: A django.http.HttpRequest instance.
+        :param queryset: A queryset of the resource's model.
+        :param ordering: A list of strings describing the fields the request orders the objects by (see
+                         ``_get_ordering``), or ``None``.
+        """
+        cursor = request.GET.get('cursor')
+
+        if self.pagination == 'offset':
+            page, next_cursor, previous_cursor = pagination.paginate_by_offset(queryset, self.page_size, cursor)
+        else:
+            page, next_cursor, previous_cursor = pagination.paginate_by_keyset(
+                queryset, self.page_size, ordering[0] if ordering else self.pagination_field, cursor
+            )
+
+        context, headers, links = {}, {}, []
+
+        for relation, cursor in [('next', next_cursor), ('previous', previous_cursor)]:
+            if cursor:
+                query = request.GET.copy()
+                query['cursor'] = cursor
+
+                context[relation] = request.build_absolute_uri('%s?%s' % (request.path, query.urlencode()))
+                links.append('<%s>; rel="%s"' % (context[relation], relation))
+            else:
+                context[relation] = None
+
+        if links:
+            headers['Link'] = ', '.join(links)
+
+        if self.count_objects:
+            cache = caching.get_response_cache() or caching.get_cache()
+
+            if cache is not None:
+                context['count'] = caching.get_count(cache, queryset)
+            else:
+                context['count'] = queryset.count()
+
+            headers['X-Total-Count'] = str(context['count'])
+
+        return page, context, headers
+
+    def _get_cached_response(self, request):
+        """
+        Find the cached response to the given request (see ``cache_responses``).
+
+        Returns a tuple of the response that was found (or ``None``) and the state to pass to
+        ``_cache_response``, which is ``None`` if the response isn't to be cached.
+
+        :param request: A django.http.HttpRequest instance.
+
+        Responses are cached by the request's host, scheme, path, negotiated format and content coding, query
+        parameters and ``cache_vary_headers``, and are invalidated as objects of the resource's model or the models
+        they embed are saved or deleted (see ``respite.caching``).
+        """
+        cache = caching.get_response_cache()
+
+        if not self.cache_responses or cache is None or request.method not in ['GET', 'HEAD']:
+            return None, None
+
+        format = self._get_format(request)
+
+        if not format:
+            return None, None
+
+        coding = self._get_coding(request)
+
+        # Responses link to pages by their absolute URLs, so they vary by the host and scheme of the request.
+        key = repr((
+            request.get_host(),
+            request.is_secure(),
+            request.path,
+            format.name,
+            coding and coding.name,
+            sorted(request.GET.lists()),
+            [request.META.get('HTTP_%s' % header.upper().replace('-', '_')) for header in self.cache_vary_headers]
+        ))
+
+        models = [self.model] + plans.find(self.model).related_models()
+        models += [model for model in self.cache_dependencies if model not in models]
+
+        entry, generations = caching.get_response(cache, models, key)
+
+        state = (cache, key, generations)
+
+        if entry is None:
+            return None, state
+
+        status, content, headers = entry
+
+        # Responses to HEAD requests have no body, but they do have the length of the body they would have.
+        response = HttpResponse(content if request.method == 'GET' else '', status=status)
+
+        for header, value in headers:
+            response[header] = value
+
+        return response, state
+
+    def _cache_response(self, request, response, state):
+        """
+        Cache the given response (see ``_get_cached_response``) and return it.
+
+        :param request: A django.http.HttpRequest instance.
+        :param response: A django.http.HttpResponse or django.http.StreamingHttpResponse instance.
+        :param state: The state returned by ``_get_cached_response``.
+
+        Only successful responses to GET requests are cached, and streamed responses aren't cached at all.
+        Responses are cached as they are sent (i.e. compressed).
+        """
+        if state is None or request.method != 'GET' or response.status_code != 200 or response.streaming:
+            return response
+
+        cache, key, generations = state
+
+        response['Content-Length'] = str(len(response.content))
+
+        caching.set_response(
+            cache = cache,
+            key = key,
+            response = (response.status_code, response.content, response.items()),
+            state = generations,
+            timeout = self.cache_timeout
+        )
+
+        return response
+
+    def _restrict_fields(self, request, queryset, values=False):
+        """
+        Restrict the given queryset to load only the fields that will be serialized (see ``Views._get_fields``).
+
+        :param request: A django.http.HttpRequest instance.
+        :param queryset: A queryset of the resource's model.
+        :param values: A boolean describing whether to load dictionaries of values rather than models.
+
+        Querysets of models that define a 'serialize' method are returned as they are, since there's no
+        telling which fields they will serialize. Values of many-to-many fields are never loaded.
+        """
+        if plans.find(self.model).custom:
+            return queryset
+
+        format = self._get_format(request)
+
+        if format:
+            fields = self._get_fields(request, format)
+        else:
+            fields = None
+
+        names = [field.name for field in self.model._meta.fields if not fields or field.name in fields]
+
+        if values:
+            return queryset.values(*names)
+
+        if fields:
+            return queryset.only(self.model._meta.pk.name, *names)
+
+        return queryset
+
+    def _select_relations(self, request, queryset):
+        """
+        Select and prefetch the relations of the given queryset that will be expanded (see ``Views._get_expand``).
+
+        :param request: A django.http.HttpRequest instance.
+        :param queryset: A queryset of the resource's model.
+
+        Querysets that are serialized as they are have their relations selected by the serializer, so this
+        is only needed for models that are loaded from them.
+        """
+        plan = plans.find(self.model)
+
+        if plan.custom or not self.optimize_queries:
+            return queryset
+
+        format = self._get_format(request)
+
+        if format:
+            fields = self._get_fields(request, format)
+        else:
+            fields = None
+
+        # Relations that aren't loaded can't be selected (see ``_restrict_fields``).
+        select_related, prefetch_related = plan.relations(expand=self._get_expand(request), fields=fields)
+
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+
+        return queryset
+
+    class InvalidQuery(Exception):
+        pass
+
     routes = [
         index.route, show.route, new.route, create.route,
         edit.route, update.route, replace.route, destroy.route
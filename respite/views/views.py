@@ -1,13 +1,19 @@
 from django.shortcuts import render
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 from django.template import TemplateDoesNotExist
 from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, parse_http_date_safe, quote_etag, http_date
 
 from respite.decorators import override_supported_formats
-from respite.settings import DEFAULT_FORMAT
-from respite.utils import parse_http_accept_header
+from respite.settings import MAX_EXPANSION_DEPTH, COMPRESSION_ENCODINGS, COMPRESSION_MIN_SIZE
+from respite.utils import parse_field_paths
 from respite import serializers
 from respite import formats
+from respite import negotiation
+from respite import caching
+from respite import compression
+from respite import templating
 
 class Views(object):
     """
@@ -15,9 +21,30 @@ class Views(object):
 
     :attribute template_path: A string describing a path to prefix templates with, or ``''`` by default.
     :attribute supported_formats: A list of strings describing formats supported by these views, or ``['html']`` by default.
+    :attribute streaming_formats: A list of strings describing formats whose serialized responses are streamed
+                                  to the client as they are serialized, or ``['csv', 'ndjson']`` by default.
+    :attribute optimize_queries: A boolean describing whether to select and prefetch the relations of querysets
+                                 before serializing them, or ``True`` by default.
+    :attribute default_fields: A dictionary of strings describing formats and lists of strings describing the fields
+                               of models to serialize in that format unless the request gives its own in the ``fields``
+                               query parameter (e.g. ``?fields=title,author.name``), or ``{}`` by default.
+    :attribute max_expansion_depth: An integer describing the number of relations deep that requests may expand
+                                    relations of models to in the ``expand`` query parameter (e.g.
+                                    ``?expand=author,tags``), or ``RESPITE_MAX_EXPANSION_DEPTH`` by default.
+    :attribute cache_fragments: A boolean describing whether to cache the serialized fragments of models in the
+                                cache given in ``RESPITE_FRAGMENT_CACHE`` (if any), or ``True`` by default.
+    :attribute compression_encodings: A list of strings describing the content codings to compress responses with
+                                      in order of preference (see ``respite.compression``), or
+                                      ``RESPITE_COMPRESSION_ENCODINGS`` (which is empty unless you set it) by default.
     """
     template_path = ''
     supported_formats = ['html']
+    streaming_formats = ['csv', 'ndjson']
+    optimize_queries = True
+    default_fields = {}
+    max_expansion_depth = MAX_EXPANSION_DEPTH
+    cache_fragments = True
+    compression_encodings = COMPRESSION_ENCODINGS
 
     @override_supported_formats(['json', 'xml'])
     def options(self, request, map, *args, **kwargs):
@@ -41,7 +68,7 @@ class Views(object):
     def _get_format(self, request):
         """
         Determine and return a 'formats.Format' instance describing the most desired response format
-        that is supported by these views.
+        that is supported by these views, or ``None`` if none of them are acceptable.
 
         :param request: A django.http.HttpRequest instance.
 
@@ -49,60 +76,102 @@ class Views(object):
         given in the HTTP Accept header, even if it's a format that isn't known by Respite.
 
         If the request doesn't specify a format by extension (e.g. '/articles/' or '/articles/new')
-        and none of the formats in the HTTP Accept header are supported, Respite will fall back
-        on the format given in DEFAULT_FORMAT.
+        the format is negotiated by the HTTP Accept header (see ``respite.negotiation``), and if it
+        has no HTTP Accept header either, Respite will fall back on the format given in DEFAULT_FORMAT.
         """
-
-        # Derive a list of 'formats.Format' instances from the list of formats these views support.
-        supported_formats = [formats.find(format) for format in self.supported_formats]
-
-        # Determine format by extension...
         if '.' in request.path:
             extension = request.path.split('.')[-1]
+        else:
+            extension = None
 
-            try:
-                format = formats.find_by_extension(extension)
-            except formats.UnknownFormat:
-                return None
+        return negotiation.negotiate(self.supported_formats, extension, request.META.get('HTTP_ACCEPT'))
 
-            if format in supported_formats:
-                return format
-            else:
-                return None
+    def _get_fields(self, request, format):
+        """
+        Determine and return a tree of the fields of models to serialize (see ``respite.utils.parse_field_paths``),
+        or ``None`` if every field should be serialized.
 
-        # Determine format by HTTP Accept header...
-        if 'HTTP_ACCEPT' in request.META:
-            content_types = parse_http_accept_header(request.META['HTTP_ACCEPT'])
+        :param request: A django.http.HttpRequest instance.
+        :param format: A 'formats.Format' instance.
 
-            # Only consider 'accept' headers with a single format in an attempt to play nice
-            # with browsers that ask for formats they really should not want.
-            if len(content_types) == 1:
-                content_type = content_types[0]
+        Fields given in the ``fields`` query parameter take precedence over those given for the format
+        in ``default_fields``.
+        """
+        if request.GET.get('fields'):
+            return parse_field_paths(request.GET['fields'].split(','))
 
-                # If the request has no preference as to the format of its response, prefer the
-                # first of the view's supported formats.
-                if content_type == '*/*':
-                    return supported_formats[0]
+        for default_format, fields in self.default_fields.items():
+            if formats.find(default_format) == format:
+                return parse_field_paths(fields)
 
-                try:
-                    format = formats.find_by_content_type(content_type)
-                except formats.UnknownFormat:
-                    return None
-
-                if format in supported_formats:
-                    return format
-                else:
-                    return None
-
-        # If no format is given by either extension or header, default to the format given in
-        # RESPITE_DEFAULT_FORMAT (given, of course, that it's supported by the view).
-        if DEFAULT_FORMAT:
-            format = formats.find(DEFAULT_FORMAT)
-
-            if format in supported_formats:
-                return format
-            else:
-                return None
+        return None
+
+    def _get_expand(self, request):
+        """
+        Determine and return a tree of the relations of models to expand (see ``respite.utils.parse_field_paths``).
+
+        :param request: A django.http.HttpRequest instance.
+
+        Relations are given in the ``expand`` query parameter (e.g. ``?expand=author,tags.articles``), and
+        relations deeper than ``max_expansion_depth`` are disregarded. Relations that aren't expanded are
+        serialized as primary keys.
+        """
+        return parse_field_paths(request.GET.get('expand', '').split(','), self.max_expansion_depth)
+
+    def _get_serializer(self, request, format, context):
+        """
+        Return a serializer for the given request, format and context.
+
+        :param request: A django.http.HttpRequest instance.
+        :param format: A 'formats.Format' instance.
+        :param context: A dictionary describing variables to serialize.
+        """
+        return serializers.find(format)(
+            source = context,
+            optimize_queries = self.optimize_queries,
+            fields = self._get_fields(request, format),
+            expand = self._get_expand(request),
+            cache = caching.get_cache() if self.cache_fragments else None
+        )
+
+    def _get_content_type(self, format):
+        """
+        Return a string describing the HTTP Content-Type header of responses in the given format.
+
+        :param format: A 'formats.Format' instance.
+        """
+        if format.binary:
+            return format.content_type
+        else:
+            return '%s; charset=%s' % (format.content_type, settings.DEFAULT_CHARSET)
+
+    def _serialize(self, request, format, context, status):
+        """
+        Render a HTTP response by serializing the given context.
+
+        :param request: A django.http.HttpRequest instance.
+        :param format: A 'formats.Format' instance.
+        :param context: A dictionary describing variables to serialize.
+        :param status: An integer describing the HTTP status code to respond with.
+
+        Responses in any of the formats given in ``streaming_formats`` are streamed, so that querysets
+        are loaded and serialized in chunks as the response is sent rather than all at once.
+        """
+        serializer = self._get_serializer(request, format, context)
+        content_type = self._get_content_type(format)
+
+        if format in [formats.find(streaming_format) for streaming_format in self.streaming_formats]:
+            return StreamingHttpResponse(
+                streaming_content = serializer.stream(request),
+                content_type = content_type,
+                status = status
+            )
+        else:
+            return HttpResponse(
+                content = serializer.serialize(request),
+                content_type = content_type,
+                status = status
+            )
 
     def _render(self, request, template=None, status=200, context={}, headers={}, prefix_template_path=True):
         """
@@ -146,6 +215,11 @@ class Views(object):
         if not format:
             return HttpResponse(status=406)
 
+        # Responses to HEAD requests have no body, so there's no need to render or serialize one unless
+        # it may be compressed; whether it is (and thus its Content-Encoding and ETag) depends on the body.
+        if request.method == 'HEAD' and not self._get_coding(request):
+            return self._head(request, format, status, headers)
+
         if template:
 
             if prefix_template_path:
@@ -153,21 +227,26 @@ class Views(object):
             else:
                 template_path = '%s.%s' % (template, format.extension)
 
-            try:
-                response = render(
-                    request = request,
-                    template_name = template_path,
-                    dictionary = context,
-                    status = status,
-                    content_type = '%s; charset=%s' % (format.content_type, settings.DEFAULT_CHARSET)
-                )
-            except TemplateDoesNotExist:
+            response = None
+
+            # Templates that don't exist are remembered (see ``respite.templating``).
+            if templating.exists(template_path):
                 try:
-                    response = HttpResponse(
-                        content = serializers.find(format)(context).serialize(request),
-                        content_type = '%s; charset=%s' % (format.content_type, settings.DEFAULT_CHARSET),
-                        status = status
+                    response = render(
+                        request = request,
+                        template_name = template_path,
+                        dictionary = context,
+                        status = status,
+                        content_type = '%s; charset=%s' % (format.content_type, settings.DEFAULT_CHARSET)
                     )
+                except TemplateDoesNotExist as exception:
+                    # Templates that include templates that don't exist do exist themselves.
+                    if str(exception) == template_path:
+                        templating.forget(template_path)
+
+            if response is None:
+                try:
+                    response = self._serialize(request, format, context, status)
                 except serializers.UnknownSerializer:
                     raise self.Error(
                         'No template exists at %(template_path)s, and no serializer found for %(format)s' % {
@@ -176,15 +255,151 @@ class Views(object):
                         }
                     )
         else:
-            response = HttpResponse(
-                content = serializers.find(format)(context).serialize(request),
-                content_type = '%s; charset=%s' % (format.content_type, settings.DEFAULT_CHARSET),
-                status = status
-            )
+            response = self._serialize(request, format, context, status)
 
         for header, value in headers.items():
             response[header] = value
 
+        response = self._compress(request, response)
+
+        if request.method == 'HEAD':
+            if response.streaming:
+                response.streaming_content = []
+            else:
+                response.content = ''
+
+        return response
+
+    def _head(self, request, format, status=200, headers={}):
+        """
+        Render a HTTP response to a HEAD request, with the headers of the response to the equivalent GET request
+        but without rendering or serializing its body.
+
+        :param request: A django.http.HttpRequest instance.
+        :param format: A 'formats.Format' instance.
+        :param status: An integer describing the HTTP status code to respond with.
+        :param headers: A dictionary describing HTTP headers.
+
+        The Content-Length header is omitted, since it would depend on the body. Responses that may be compressed
+        aren't rendered here (see ``_get_coding``), since their Content-Encoding and ETag headers depend on it too.
+        """
+        response = HttpResponse(
+            content_type = self._get_content_type(format),
+            status = status
+        )
+
+        for header, value in headers.items():
+            response[header] = value
+
+        if self.compression_encodings:
+            patch_vary_headers(response, ['Accept-Encoding'])
+
+        return response
+
+    def _get_coding(self, request):
+        """
+        Return the most preferred of ``compression_encodings`` that the client accepts (see ``respite.compression``),
+        or ``None`` if there is none.
+
+        :param request: A django.http.HttpRequest instance.
+        """
+        if not self.compression_encodings:
+            return None
+
+        return compression.negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.compression_encodings)
+
+    def _compress(self, request, response):
+        """
+        Compress the given response with the most preferred of ``compression_encodings`` that the client accepts.
+
+        :param request: A django.http.HttpRequest instance.
+        :param response: A django.http.HttpResponse or django.http.StreamingHttpResponse instance.
+
+        Responses that are smaller than ``RESPITE_COMPRESSION_MIN_SIZE`` aren't compressed, and neither
+        are responses that don't get any smaller. Streamed responses are compressed as they are streamed.
+        """
+        if not self.compression_encodings or response.has_header('Content-Encoding'):
+            return response
+
+        if not response.streaming and len(response.content) < COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ['Accept-Encoding'])
+
+        coding = self._get_coding(request)
+
+        if not coding:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(response.streaming_content, coding)
+
+            if response.has_header('Content-Length'):
+                del response['Content-Length']
+        else:
+            content = compression.compress(response.content, coding)
+
+            if len(content) >= len(response.content):
+                return response
+
+            response.content = content
+
+            if response.has_header('Content-Length'):
+                response['Content-Length'] = str(len(content))
+
+        # Representations that are encoded differently mustn't share entity tags.
+        if response.has_header('ETag') and response['ETag'].endswith('"'):
+            response['ETag'] = '%s-%s"' % (response['ETag'][:-1], coding.name)
+
+        response['Content-Encoding'] = coding.name
+
+        return response
+
+    def _not_modified(self, request, etag=None, last_modified=None):
+        """
+        Determine whether the client already has the current representation of the resource, returning
+        a HTTP 304 Not Modified response if it does or ``None`` if it doesn't.
+
+        :param request: A django.http.HttpRequest instance.
+        :param etag: A string describing the entity tag of the current representation (without quotes), or ``None``.
+        :param last_modified: An integer describing the time the resource was last modified in seconds since
+                              the epoch, or ``None``.
+
+        The If-None-Match header takes precedence over the If-Modified-Since header. Entity tags the client
+        got for compressed responses (see ``_compress``) match the entity tag of the uncompressed response.
+        """
+        if request.method not in ['GET', 'HEAD']:
+            return None
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+
+        if if_none_match:
+            if etag is None:
+                return None
+
+            for tag in parse_etags(if_none_match):
+                for name in compression.CODINGS:
+                    if tag == '%s-%s' % (etag, name):
+                        # Respond with the entity tag of the representation the client has.
+                        etag = tag
+
+                if tag == etag or tag == '*':
+                    break
+            else:
+                return None
+
+        elif if_modified_since is None or last_modified is None or last_modified > if_modified_since:
+            return None
+
+        response = HttpResponseNotModified()
+
+        if etag is not None:
+            response['ETag'] = quote_etag(etag)
+
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+
         return response
 
     def _error(self, request, status, headers={}, prefix_template_path=False, **kwargs):
@@ -19,3 +19,7 @@ class Article(models.Model):
     created_at = models.DateTimeField()
     tags = models.ManyToManyField(Tag, blank=True)
     author = models.ForeignKey(Author, related_name='articles')
+
+class Category(models.Model):
+    name = models.CharField(max_length=255)
+    parent = models.ForeignKey('self', null=True, blank=True)
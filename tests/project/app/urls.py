@@ -2,7 +2,7 @@ from django.utils.translation import ugettext_lazy as _
 
 from respite.urls import resource
 
-from .views import ArticleViews
+from .views import ArticleViews, BatchViews
 
 urlpatterns = resource(
     prefix = _('articles/'),
@@ -11,3 +11,9 @@ urlpatterns = resource(
         ArticleViews.preview.route
     ]
 )
+
+urlpatterns += resource(
+    prefix = 'batch/',
+    views = BatchViews,
+    routes = BatchViews.routes
+)
@@ -2,7 +2,7 @@ from django.shortcuts import render
 from django.utils.translation import string_concat
 from django.utils.translation import ugettext_lazy as _
 
-from respite import Views, Resource
+from respite import Views, Resource, Batch
 from respite.decorators import route, before
 from respite.urls import templates
 
@@ -53,3 +53,6 @@ class ArticleViews(Views, Resource):
             return request, Article.objects.get(id=id)
         except Article.DoesNotExist:
             return self._error(request, 404, message='The article could not be found.')
+
+class BatchViews(Views, Batch):
+    supported_formats = ['json']
@@ -16,7 +16,8 @@ MIDDLEWARE_CLASSES = [
     'respite.middleware.HttpPutMiddleware',
     'respite.middleware.HttpPatchMiddleware',
     'respite.middleware.HttpMethodOverrideMiddleware',
-    'respite.middleware.JsonMiddleware'
+    'respite.middleware.JsonMiddleware',
+    'respite.middleware.MessagePackMiddleware'
 ]
 
 INSTALLED_APPS = [
@@ -40,3 +41,10 @@ ROOT_URLCONF = 'tests.project.urls'
 SECRET_KEY = 'much-secret'
 
 ALLOWED_HOSTS = ['*']
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+    }
+}
+
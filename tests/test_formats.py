@@ -32,3 +32,56 @@ def test_preferred_content_type():
     format = formats.find('HTML')
 
     assert_equal('text/html', format.content_type)
+
+def test_find_binary_format():
+    format = formats.find_by_content_type('application/x-msgpack')
+
+    assert_equal('MessagePack', format.name)
+    assert_equal('msgpack', format.extension)
+    assert format.binary
+    assert not formats.find('JSON').binary
+
+def test_find_unknown_format():
+    assert_raises(formats.UnknownFormat, formats.find, 'unknown')
+    assert_raises(formats.UnknownFormat, formats.find_by_content_type, 'application/unknown')
+
+def test_register():
+    from respite import negotiation, serializers
+    from respite.serializers import JSONSerializer
+
+    format = formats.Format('Test Object Notation', 'TON', ['ton'], ['application/x-ton'], 'UTF-8')
+
+    assert_raises(formats.UnknownFormat, negotiation.negotiate, ['json', 'ton'], accept='application/x-ton')
+    negotiation.negotiate(['json'], accept='application/json')
+
+    def parse(body, encoding):
+        return {'body': body}
+
+    formats.register(format, JSONSerializer, parse)
+
+    # Formats negotiated before the format was registered are forgotten.
+    assert_equal({}, negotiation._negotiators)
+
+    assert_equal(format, formats.find('TON'))
+    assert_equal(format, formats.find_by_name('Test Object Notation'))
+    assert_equal(format, formats.find_by_extension('ton'))
+    assert_equal(format, formats.find_by_content_type('application/x-ton'))
+    assert_equal(JSONSerializer, serializers.find(format))
+    assert_equal(parse, formats.registry.parsers[format])
+
+    assert_equal(format, negotiation.negotiate(['json', 'ton'], accept='application/x-ton'))
+
+    # Formats that share identifiers with a format that is registered replace it.
+    replacement = formats.Format('Test Object Notation', 'TON', ['ton', 'tn'], ['application/ton'], 'UTF-8')
+
+    index = formats.FORMATS.index(format)
+
+    formats.register(replacement, JSONSerializer)
+
+    assert format not in formats.FORMATS
+    assert_equal(formats.FORMATS.index(replacement), index)
+    assert_equal(replacement, formats.find('tn'))
+    assert_equal(replacement, formats.find_by_content_type('application/ton'))
+    assert_raises(formats.UnknownFormat, formats.find_by_content_type, 'application/x-ton')
+    assert format not in formats.registry.serializers
+    assert format not in formats.registry.parsers
@@ -66,3 +66,40 @@ def test_http_put_middleware():
     assert_equal(request.PUT, {
         'foo': ['bar']
     })
+
+def test_messagepack_middleware():
+    from respite.serializers import messagepack
+
+    request = RequestFactory().post(
+        path = '/',
+        data = messagepack.packb({
+            'foo': 'foo',
+            'hogera': [
+                {'hoge': 'hoge'}
+            ]
+        }),
+        content_type = 'application/msgpack'
+    )
+
+    MessagePackMiddleware().process_request(request)
+
+    assert_equal(request.POST, {
+        'foo': ['foo'],
+        'hogera': [
+            {'hoge': ['hoge']}
+        ]
+    })
+
+def test_json_middleware_with_list():
+    request = RequestFactory().post(
+        path = '/',
+        data = json.dumps([{'foo': 'foo'}, {'bar': 'bar'}]),
+        content_type = 'application/json'
+    )
+
+    JsonMiddleware().process_request(request)
+
+    assert_equal(request.data, [{'foo': ['foo']}, {'bar': ['bar']}])
+
+    # Django expects the body of the method to be a dictionary.
+    assert_equal(request.POST, {})
@@ -0,0 +1,40 @@
+"""Tests for respite.negotiation."""
+
+from nose.tools import *
+
+from respite import formats
+from respite import negotiation
+
+def test_negotiate():
+    supported_formats = ['html', 'json', 'xml']
+
+    def negotiate(extension=None, accept=None):
+        format = negotiation.negotiate(supported_formats, extension, accept)
+
+        return format and format.extension
+
+    assert_equal(negotiate(), 'html')
+    assert_equal(negotiate(accept=''), 'html')
+    assert_equal(negotiate('json'), 'json')
+    assert_equal(negotiate('yaml'), None)
+    assert_equal(negotiate('unknown'), None)
+    assert_equal(negotiate(accept='application/xml'), 'xml')
+    assert_equal(negotiate(accept='text/xml'), 'xml')
+    assert_equal(negotiate(accept='*/*'), 'html')
+    assert_equal(negotiate(accept='application/*'), 'json')
+    assert_equal(negotiate(accept='application/json;q=0.5, application/xml'), 'xml')
+    assert_equal(negotiate(accept='application/json;q=0.5, application/xml;q=0.50'), 'json')
+    assert_equal(negotiate(accept='*/*;q=0.1, text/html;q=0'), 'json')
+    assert_equal(negotiate(accept='image/png'), None)
+    assert_equal(negotiate(accept='text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'), 'html')
+
+def test_negotiation_cache():
+    negotiation.invalidate()
+
+    format = negotiation.negotiate(['json'], None, 'application/json')
+
+    assert_equal(len(negotiation._formats), 1)
+    assert negotiation.negotiate(['json'], None, 'application/json') is format
+    assert_equal(negotiation.negotiate(['json', 'xml'], None, 'application/xml'), formats.find('xml'))
+    assert_equal(len(negotiation._formats), 2)
+    assert_equal(len(negotiation._negotiators), 2)
@@ -5,6 +5,7 @@ from nose.tools import *
 from datetime import datetime
 
 from django.test.client import RequestFactory
+from django.test.utils import override_settings
 
 from respite.serializers.base import Serializer
 from respite.serializers.jsonserializer import JSONSerializer
@@ -12,7 +13,7 @@ from respite.serializers.jsonpserializer import JSONPSerializer
 from respite.serializers.xmlserializer import XMLSerializer
 from respite.utils import generate_form
 
-from .project.app.models import Article, Author, Tag
+from .project.app.models import Article, Author, Tag, Category
 
 factory = RequestFactory()
 
@@ -193,3 +194,435 @@ def test_form_serialization():
     assert JSONSerializer(form).serialize(request)
     assert JSONPSerializer(form).serialize(request)
     assert XMLSerializer(form).serialize(request)
+
+def test_handler_registration():
+    """Verify that serializers may register handlers for new types."""
+    from respite.serializers.base import handles
+
+    request = factory.get('/')
+
+    class Point(object):
+
+        def __init__(self, x, y):
+            self.x, self.y = x, y
+
+    class PointSerializer(JSONSerializer):
+
+        @handles(Point)
+        def serialize_point(self, point):
+            return [point.x, point.y]
+
+    assert_equal(PointSerializer([Point(1, 2)]).serialize(request), '[[1, 2]]')
+    assert_raises(TypeError, JSONSerializer([Point(1, 2)]).serialize, request)
+
+    PointSerializer.register(Point, lambda serializer, point: {'x': point.x})
+
+    assert_equal(PointSerializer(Point(1, 2)).serialize(request), '{"x": 1}')
+    assert_raises(TypeError, JSONSerializer(Point(1, 2)).serialize, request)
+
+def test_model_plans():
+    """Verify that models are serialized according to plans that are compiled once per model."""
+    from respite.serializers import plans
+
+    plan = plans.find(Article)
+
+    assert plans.find(Article) is plan
+    assert plans.find(Article.objects.only('title')[0].__class__) is plan
+    assert_equal([name for name, serialize in plan.steps], [
+        'id', 'title', 'content', 'is_published', 'created_at', 'author', 'tags'
+    ])
+
+    # Reloading a model discards the plans of its predecessor
+    class Reloaded(object):
+        _meta = Article._meta
+
+    plans.invalidate(sender=Reloaded)
+
+    assert plans.find(Article) is not plan
+
+    # Fields may hold values of other types until they're saved
+    from decimal import Decimal
+
+    article = Article(title='Title', content='Content', created_at='1970-01-01 00:00:00')
+
+    assert_equal(Serializer(article, fields={'created_at': {}}).serialize(factory.get('/')), {
+        'created_at': '1970-01-01 00:00:00'
+    })
+
+    serializer = Serializer(None)
+
+    assert_equal(plans.serialize_decimal(serializer, Decimal('0.50')), '0.50')
+    assert_equal(plans.serialize_decimal(serializer, 0.5), 0.5)
+    assert_equal(plans.serialize_decimal(serializer, None), None)
+
+def test_queryset_serialization_queries():
+    """Verify that querysets are serialized with a constant number of queries."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    request = factory.get('/')
+
+    def count_queries(**kwargs):
+        with CaptureQueriesContext(connection) as context:
+            Serializer(Article.objects.all(), **kwargs).serialize(request)
+
+        return len(context.captured_queries)
+
+    queries = count_queries()
+
+    author = Author.objects.create(
+        name = 'Jane Doe'
+    )
+
+    tag = Tag.objects.create(
+        name = 'politics'
+    )
+
+    articles = []
+    for i in range(10):
+        article = Article.objects.create(
+            title = 'Title',
+            content = 'Content',
+            author = author,
+            created_at = datetime(1970, 1, 1)
+        )
+        article.tags.add(tag)
+        articles.append(article)
+
+    try:
+        assert_equal(count_queries(), queries)
+        assert count_queries(optimize_queries=False) > queries
+    finally:
+        for article in articles:
+            article.delete()
+
+        author.delete()
+        tag.delete()
+
+def test_streaming_serialization():
+    """Verify that streamed serializations are identical to their regular counterparts."""
+    request = factory.get('/')
+
+    class ChunkedJSONSerializer(JSONSerializer):
+        chunk_size = 1
+
+    class ChunkedJSONPSerializer(JSONPSerializer):
+        chunk_size = 1
+
+    class ChunkedXMLSerializer(XMLSerializer):
+        chunk_size = 1
+
+    for source in [Article.objects.all(), {'articles': Article.objects.all(), 'count': 2}, [Article.objects.all()], {}]:
+        for Serializer in [JSONSerializer, ChunkedJSONSerializer, ChunkedJSONPSerializer, XMLSerializer, ChunkedXMLSerializer]:
+            assert_equal(
+                ''.join(Serializer(source).stream(request)),
+                Serializer(source).serialize(request)
+            )
+
+    assert_equal(len(list(ChunkedJSONSerializer(Article.objects.all()).stream(request))), 4)
+
+def test_xml_serialization():
+    """Verify that XML is escaped and named correctly."""
+    from collections import OrderedDict
+
+    request = factory.get('/')
+
+    assert_equal(XMLSerializer(OrderedDict([
+        ('articles', [
+            OrderedDict([('title', u'Fish & chips <3 \xe6\xf8\xe5'), ('is_published', True), ('author', None)])
+        ]),
+        ('tags', []),
+        ('count', 1)
+    ])).serialize(request), (
+        '<?xml version="1.0" encoding="UTF-8"?><response><items>'
+        '<articles><article><title>Fish &amp; chips &lt;3 &#230;&#248;&#229;</title><is_published>true</is_published><author /></article></articles>'
+        '<tags /><count>1</count></items></response>'
+    ))
+
+def test_json_backends():
+    """Verify that every JSON backend that is installed encodes and decodes JSON identically."""
+    from collections import OrderedDict
+    from respite.serializers import jsonbackends
+
+    request = factory.get('/')
+
+    data = [
+        Serializer(Article.objects.all()).serialize(request),
+        OrderedDict([('z', 1), ('a', 2), (u'\xe6', [u'\xe6\xf8\xe5 / "quoted" \\ \n', '', 0, -1, 2 ** 40, 0.5, 1.25])]),
+        [None, True, False, [], {}],
+        [1e16, 1e-7, 1.0, 0.1, 2 ** 64, -2 ** 64]
+    ]
+
+    reference = jsonbackends.StandardBackend()
+
+    for Backend in jsonbackends.BACKENDS.values():
+        if not Backend.exact or not Backend.is_available():
+            continue
+
+        backend = Backend()
+
+        for item in data:
+            string = backend.dumps(item)
+
+            assert_equal(string, reference.dumps(item))
+            assert_equal(backend.loads(string.encode('utf-8'), 'utf-8'), reference.loads(string))
+
+    # Backends that encode some values differently are only used if they're given by name
+    assert jsonbackends.find().exact
+
+    if jsonbackends.UltraJSONBackend.is_available():
+        assert_equal(jsonbackends.find('ujson'), jsonbackends.UltraJSONBackend)
+
+def test_field_serialization():
+    """Verify that the fields of models may be restricted."""
+    from respite.utils import parse_field_paths
+
+    article = Article.objects.get(id=1)
+    request = factory.get('/')
+
+    assert_equal(Serializer(article, fields=parse_field_paths(['title', 'author.name', 'tags'])).serialize(request), {
+        'title': 'Title',
+        'author': {
+            'name': 'John Doe'
+        },
+        'tags': [{
+            'id': 1,
+            'name': 'sports'
+        }]
+    })
+
+    assert_equal(Serializer(article.tags.all(), fields=parse_field_paths(['name'])).serialize(request), [{
+        'name': 'sports'
+    }])
+
+    # Relations that aren't serialized aren't selected, so their columns may be deferred
+    assert_equal(Serializer(Article.objects.only('id', 'title').filter(id=1), fields=parse_field_paths(['title'])).serialize(request), [{
+        'title': 'Title'
+    }])
+
+def test_valuesqueryset_serialization():
+    """Verify that valuesquerysets may be serialized."""
+    values = Article.objects.order_by('id').values('title', 'author', 'created_at')
+    request = factory.get('/')
+
+    data = Serializer(values).serialize(request)
+
+    assert_equal(data, [
+        {
+            'title': 'Title',
+            'author': 1,
+            'created_at': '1970-01-01T00:00:00'
+        },
+        {
+            'title': 'Another title',
+            'author': 1,
+            'created_at': '1970-01-01T00:00:00'
+        }
+    ])
+
+    assert_equal(data[0].keys(), ['title', 'author', 'created_at'])
+
+    assert_equal(''.join(JSONSerializer(values).stream(request)), JSONSerializer(values).serialize(request))
+    assert XMLSerializer(values).serialize(request)
+
+@override_settings(RESPITE_FRAGMENT_CACHE='default')
+def test_fragment_caching():
+    """Verify that serialized fragments of models are cached and invalidated as models change."""
+    from django.core.cache import get_cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    cache = get_cache('default')
+    cache.clear()
+
+    request = factory.get('/')
+
+    def serialize():
+        with CaptureQueriesContext(connection) as context:
+            data = Serializer(Article.objects.order_by('id'), cache=cache).serialize(request)
+
+        return data, len(context.captured_queries)
+
+    data, queries = serialize()
+
+    assert_equal(serialize(), (data, 1))
+    assert_equal(data, Serializer(Article.objects.order_by('id')).serialize(request))
+
+    article = Article.objects.order_by('id')[0]
+    article.title = 'New title'
+    article.save()
+
+    data, queries = serialize()
+
+    assert_equal(data[0]['title'], 'New title')
+    assert_equal(serialize(), (data, 1))
+
+    author = article.author
+    tag = Tag.objects.create(name='politics')
+
+    try:
+        article.tags.add(tag)
+
+        data, queries = serialize()
+
+        assert_equal([item['name'] for item in data[0]['tags']], ['sports', 'politics'])
+
+        tag.name = 'politicians'
+        tag.save()
+
+        data, queries = serialize()
+
+        assert_equal([item['name'] for item in data[0]['tags']], ['sports', 'politicians'])
+
+        tag.article_set.clear()
+
+        data, queries = serialize()
+
+        assert_equal([item['name'] for item in data[0]['tags']], ['sports'])
+
+        author.name = 'Jane Doe'
+        author.save()
+
+        data, queries = serialize()
+
+        assert_equal(data[0]['author']['name'], 'Jane Doe')
+        assert_equal(data[1]['author']['name'], 'Jane Doe')
+    finally:
+        article.title = 'Title'
+        article.save()
+
+        author.name = 'John Doe'
+        author.save()
+
+        tag.delete()
+
+        cache.clear()
+
+def test_model_memoization():
+    """Verify that models embedded in others are serialized once and that cycles are broken."""
+    request = factory.get('/')
+
+    data = Serializer(Article.objects.order_by('id')).serialize(request)
+
+    assert data[0]['author'] is data[1]['author']
+
+    fruit = Category.objects.create(name='Fruit')
+    apple = Category.objects.create(name='Apple', parent=fruit)
+    fruit.parent = apple
+    fruit.save()
+
+    try:
+        data = Serializer(apple).serialize(request)
+
+        assert_equal(data['parent']['name'], 'Fruit')
+        assert_equal(data['parent']['parent'], apple.pk)
+
+        assert_equal(
+            XMLSerializer([apple, apple]).serialize(request).count('<name>Fruit</name>'), 2
+        )
+    finally:
+        Category.objects.all().delete()
+
+def test_relation_expansion():
+    """Verify that relations are serialized as primary keys unless they are expanded."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    request = factory.get('/')
+    article = Article.objects.order_by('id')[0]
+
+    with CaptureQueriesContext(connection) as context:
+        data = Serializer(Article.objects.order_by('id'), expand={}).serialize(request)
+
+    assert_equal(data[0]['author'], article.author_id)
+    assert_equal(data[0]['tags'], [tag.pk for tag in article.tags.all()])
+    assert 'app_author' not in context.captured_queries[0]['sql']
+
+    data = Serializer(Article.objects.order_by('id'), expand={'author': {}}).serialize(request)
+
+    assert_equal(data[0]['author']['name'], 'John Doe')
+    assert_equal(data[0]['tags'], [tag.pk for tag in article.tags.all()])
+
+def test_messagepack_serialization():
+    """Verify that MessagePack encodes and decodes data like JSON does."""
+    from respite.serializers import messagepack
+    from respite.serializers.msgpackserializer import MessagePackSerializer
+    from respite.serializers import jsonbackends
+
+    request = factory.get('/')
+
+    assert_equal(
+        messagepack.unpackb(MessagePackSerializer(Article.objects.all()).serialize(request)),
+        jsonbackends.get().loads(JSONSerializer(Article.objects.all()).serialize(request))
+    )
+
+    data = [
+        None, True, False, 0, 127, 128, -32, -33, -129, 2 ** 16, -2 ** 31 - 1, 2 ** 64 - 1, -2 ** 63, 0.5,
+        u'', u'\xe6\xf8\xe5', u'x' * 31, u'x' * 32, u'x' * 256, u'x' * 65536,
+        [], range(16), range(65536), {}, dict((unicode(i), i) for i in range(16))
+    ]
+
+    for item in data:
+        assert_equal(messagepack.unpackb(messagepack.packb(item)), item)
+
+    assert_equal(messagepack.packb({'a': [1, None]}), '\x81\xa1a\x92\x01\xc0')
+    assert_equal(messagepack.unpackb(messagepack.packb([{1: 1}, {True: 1}])), [{1: 1}, {True: 1}])
+    assert_equal(messagepack.packb({True: 1}), '\x81\xc3\x01')
+
+    assert_raises(ValueError, messagepack.unpackb, '\x92\x01')
+    assert_raises(ValueError, messagepack.unpackb, '\x01\x02')
+    assert_raises(ValueError, messagepack.unpackb, '\xc1')
+
+    # Maps keyed by arrays or maps are malformed, since their keys can't be hashed.
+    assert_raises(ValueError, messagepack.unpackb, '\x81\x90\x01')
+    assert_raises(ValueError, messagepack.unpackb, '\x81\x80\x01')
+
+    # Arrays and maps may only be nested so deeply.
+    nested = []
+    for i in range(messagepack.MAX_DEPTH - 1):
+        nested = [nested]
+
+    assert_equal(messagepack.unpackb(messagepack.packb(nested)), nested)
+    assert_raises(ValueError, messagepack.unpackb, '\x91' * messagepack.MAX_DEPTH + '\x90')
+    assert_raises(ValueError, messagepack.unpackb, '\x91' * 100000 + '\x90')
+
+def test_csv_serialization():
+    """Verify that models are serialized as rows of comma-separated values, chunk by chunk."""
+    from respite.serializers.csvserializer import CSVSerializer
+
+    request = factory.get('/')
+
+    serializer = CSVSerializer({'articles': Article.objects.order_by('id')}, fields={'title': {}, 'tags': {}})
+    serializer.chunk_size = 1
+
+    strings = list(serializer.stream(request))
+
+    assert_equal(len(strings), 2)
+    assert_equal(''.join(strings).splitlines(), [
+        'title,tags',
+        'Title,%s' % Tag.objects.get().pk,
+        'Another title,%s' % Tag.objects.get().pk
+    ])
+
+    from collections import OrderedDict
+
+    data = [OrderedDict([('text', u'Comma, "quotes" and \xe6\xf8\xe5'), ('list', [1, None, True]), ('none', None)])]
+
+    assert_equal(
+        CSVSerializer(data).serialize(request),
+        'text,list,none\r\n"Comma, ""quotes"" and \xc3\xa6\xc3\xb8\xc3\xa5",1;;true,\r\n'
+    )
+
+def test_ndjson_serialization():
+    """Verify that models are serialized as JSON on a line each, chunk by chunk."""
+    from respite.serializers.ndjsonserializer import NDJSONSerializer
+
+    request = factory.get('/')
+
+    serializer = NDJSONSerializer({'articles': Article.objects.order_by('id')}, fields={'title': {}})
+    serializer.chunk_size = 1
+
+    strings = list(serializer.stream(request))
+
+    assert_equal(strings, ['{"title": "Title"}\n', '{"title": "Another title"}\n'])
+    assert_equal(NDJSONSerializer({'article': {'title': 'Title'}}).serialize(request), '{"title": "Title"}\n')
@@ -24,3 +24,52 @@ def test_parse_content_type():
 
     assert_equal(('application/json', 'UTF-8'), parse_content_type('application/json'))
     assert_equal(('application/json', 'ISO-8859-1'), parse_content_type('application/json; charset=ISO-8859-1'))
+
+def test_parse_field_paths():
+    from respite.utils import parse_field_paths
+
+    assert_equal(parse_field_paths(['title', 'author.name', 'author.id', ' tags ', '']), {
+        'title': {},
+        'author': {
+            'name': {},
+            'id': {}
+        },
+        'tags': {}
+    })
+
+def test_parse_accept_encoding_header():
+    from respite.utils import parse_accept_encoding_header
+
+    assert_equal(parse_accept_encoding_header('gzip, Deflate;q=0.5 , br;level=1;q=0.25, *;q=0, identity;q=x'), {
+        'gzip': 1.0,
+        'deflate': 0.5,
+        'br': 0.25,
+        '*': 0.0,
+        'identity': 0.0
+    })
+
+    assert_equal(parse_accept_encoding_header(''), {})
+
+def test_parse_accept_header():
+    from respite.utils import parse_accept_header
+
+    assert_equal(parse_accept_header('Text/HTML;level=1, text/*;q=0.5, *;q=2, application/json;q=x, bogus'), [
+        ('text/html', {'level': '1'}, 1.0),
+        ('text/*', {}, 0.5),
+        ('*/*', {}, 1.0),
+        ('application/json', {}, 0.0)
+    ])
+
+def test_lru_cache():
+    from respite.utils.datastructures import LRUCache
+
+    cache = LRUCache(2)
+    cache['a'] = 1
+    cache['b'] = 2
+    cache['a']
+    cache['c'] = 3
+
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert_equal(len(cache), 2)
+    assert_raises(KeyError, lambda: cache['b'])
@@ -5,6 +5,7 @@ from datetime import datetime
 from nose.tools import *
 from django.conf import settings
 from django.test.client import Client
+from django.test.utils import override_settings
 
 from . import monkeys
 from .project.app.models import Article, Author
@@ -27,9 +28,12 @@ def teardown():
     Article.objects.all().delete()
 
 @with_setup(setup, teardown)
-def test_disregards_multiple_formats_in_accept_header():
+def test_negotiates_multiple_formats_in_accept_header():
     response = client.get('/news/articles/', HTTP_ACCEPT='application/json, application/xml')
-    assert_equal(response['Content-Type'], 'text/html; charset=utf-8')
+    assert_equal(response['Content-Type'], 'application/json; charset=utf-8')
+
+    response = client.get('/news/articles/', HTTP_ACCEPT='text/html;q=0.5, application/*;q=0.9, application/x-yaml;q=0')
+    assert_equal(response['Content-Type'], 'application/json; charset=utf-8')
 
 @with_setup(setup, teardown)
 def test_index():
@@ -183,3 +187,972 @@ def test_content_types():
         formats.find(ArticleViews.supported_formats[0]).content_type,
         settings.DEFAULT_CHARSET
     )
+
+@with_setup(setup, teardown)
+def test_streaming():
+    from .project.app.views import ArticleViews
+
+    streaming_formats, ArticleViews.streaming_formats = ArticleViews.streaming_formats, ['json']
+
+    try:
+        response = client.get('/news/articles/', HTTP_ACCEPT='application/json')
+    finally:
+        ArticleViews.streaming_formats = streaming_formats
+
+    assert response.streaming
+    assert_equal(response['Content-Type'], 'application/json; charset=%s' % settings.DEFAULT_CHARSET)
+    assert_equal(len(json.loads(''.join(response.streaming_content))['articles']), 1)
+
+@with_setup(setup, teardown)
+def test_fields():
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as context:
+        response = client.get('/news/articles/1.json?fields=title,author.name&expand=author')
+
+    assert_equal(json.loads(response.content), {
+        'article': {
+            'title': 'Title',
+            'author': {
+                'name': 'John Doe'
+            }
+        }
+    })
+
+    assert '"content"' not in context.captured_queries[0]['sql']
+
+@with_setup(setup, teardown)
+def test_expand():
+    from respite import Views, Resource
+    from django.test.client import RequestFactory
+    from .project.app.models import Tag
+
+    class ArticleViews(Views, Resource):
+        model = Article
+        supported_formats = ['json']
+        max_expansion_depth = 1
+
+    article = Article.objects.get()
+    article.tags.add(Tag.objects.create(name='sports'))
+
+    def show(query):
+        request = RequestFactory().get('/articles/%d.json?fields=author,tags%s' % (article.pk, query))
+
+        return json.loads(ArticleViews().show(request, article.pk).content)['article']
+
+    assert_equal(show(''), {
+        'author': article.author_id,
+        'tags': [article.tags.get().pk]
+    })
+
+    assert_equal(show('&expand=author,tags'), {
+        'author': {
+            'id': article.author_id,
+            'name': 'John Doe'
+        },
+        'tags': [{
+            'id': article.tags.get().pk,
+            'name': 'sports'
+        }]
+    })
+
+    assert_equal(show('&expand=author.articles'), show('&expand=author'))
+
+    Tag.objects.all().delete()
+
+@with_setup(setup, teardown)
+def test_fields_of_index():
+    from respite import Views, Resource
+    from django.test.client import RequestFactory
+
+    class ArticleViews(Views, Resource):
+        model = Article
+        supported_formats = ['json']
+
+    for query in ['?fields=title', '?fields=title&expand=author', '?fields=title&expand=author.articles,tags']:
+        response = ArticleViews().index(RequestFactory().get('/articles.json' + query))
+
+        assert_equal(response.status_code, 200)
+        assert_equal(json.loads(response.content), {
+            'articles': [{
+                'title': 'Title'
+            }]
+        })
+
+    article = Article.objects.get()
+
+    response = ArticleViews().show(RequestFactory().get('/articles/1.json?fields=title&expand=author'), article.pk)
+
+    assert_equal(json.loads(response.content), {
+        'article': {
+            'title': 'Title'
+        }
+    })
+
+@with_setup(setup, teardown)
+def test_values_only():
+    from respite import Views, Resource
+    from django.test.client import RequestFactory
+
+    class ArticleValuesViews(Views, Resource):
+        model = Article
+        supported_formats = ['json']
+        values_only = True
+
+    response = ArticleValuesViews().index(RequestFactory().get('/articles.json?fields=id,title'))
+
+    assert_equal(json.loads(response.content), {
+        'articles': [{
+            'id': 1,
+            'title': 'Title'
+        }]
+    })
+
+@with_setup(setup, teardown)
+def test_messagepack():
+    from respite import Views, Resource
+    from respite.serializers import messagepack
+    from django.test.client import RequestFactory
+
+    class ArticleViews(Views, Resource):
+        model = Article
+        supported_formats = ['json', 'msgpack']
+
+    for request in [
+        RequestFactory().get('/articles.msgpack'),
+        RequestFactory().get('/articles', HTTP_ACCEPT='application/msgpack')
+    ]:
+        response = ArticleViews().index(request)
+
+        assert_equal(response['Content-Type'], 'application/msgpack')
+        assert_equal(messagepack.unpackb(response.content)['articles'][0]['title'], 'Title')
+
+@with_setup(setup, teardown)
+def test_csv():
+    from respite import Views, Resource
+    from django.test.client import RequestFactory
+    from .project.app.models import Tag
+
+    class ArticleViews(Views, Resource):
+        model = Article
+        supported_formats = ['csv']
+
+    article = Article.objects.get()
+    article.tags.add(Tag.objects.create(name='sports'), Tag.objects.create(name='politics'))
+
+    try:
+        response = ArticleViews().index(RequestFactory().get('/articles.csv'))
+
+        assert response.streaming
+        assert_equal(response['Content-Type'], 'text/csv; charset=%s' % settings.DEFAULT_CHARSET)
+        assert_equal(''.join(response.streaming_content).splitlines(), [
+            'id,title,content,is_published,created_at,author,tags',
+            '%d,Title,Content,false,1970-01-01T00:00:00,%d,%s' % (
+                article.pk, article.author_id, ';'.join([str(tag.pk) for tag in article.tags.all()])
+            )
+        ])
+
+        response = ArticleViews().show(RequestFactory().get('/articles/1.csv?fields=title,author'), article.pk)
+
+        assert_equal(''.join(response.streaming_content).splitlines(), [
+            'title,author',
+            'Title,%d' % article.author_id
+        ])
+
+        response = ArticleViews().show(RequestFactory().get('/articles/99.csv'), 99)
+
+        assert_equal(response.status_code, 404)
+        assert_equal(''.join(response.streaming_content).splitlines(), [
+            'error',
+            'The article could not be found.'
+        ])
+    finally:
+        Tag.objects.all().delete()
+
+@with_setup(setup, teardown)
+def test_ndjson():
+    from respite import Views, Resource
+    from django.test.client import RequestFactory
+
+    class ArticleViews(Views, Resource):
+        model = Article
+        supported_formats = ['ndjson']
+
+    response = ArticleViews().index(RequestFactory().get('/articles', HTTP_ACCEPT='application/x-ndjson'))
+
+    assert response.streaming
+    assert_equal(response['Content-Type'], 'application/x-ndjson; charset=%s' % settings.DEFAULT_CHARSET)
+    assert_equal([json.loads(line)['title'] for line in ''.join(response.streaming_content).splitlines()], ['Title'])
+
+    response = ArticleViews().show(RequestFactory().get('/articles/99', HTTP_ACCEPT='application/x-ndjson'), 99)
+
+    assert_equal(response.status_code, 404)
+    assert_equal([json.loads(line) for line in ''.join(response.streaming_content).splitlines()], [
+        {'error': 'The article could not be found.'}
+    ])
+
+def test_compression():
+    import zlib
+    from respite import Views
+    from django.test.client import RequestFactory
+
+    class CompressedViews(Views):
+        supported_formats = ['json']
+        compression_encodings = ['br', 'gzip', 'deflate']
+
+        def index(self, request):
+            return self._render(request, context={'items': ['item %d' % i for i in range(100)]})
+
+        def show(self, request):
+            return self._render(request, context={'item': 'item'})
+
+    def get(view, accept_encoding, streaming_formats=[]):
+        views = CompressedViews()
+        views.streaming_formats = streaming_formats
+
+        return getattr(views, view)(RequestFactory().get('/items.json', HTTP_ACCEPT_ENCODING=accept_encoding))
+
+    content = get('index', '').content
+
+    response = get('index', 'gzip, deflate')
+    assert_equal(response['Content-Encoding'], 'gzip')
+    assert_equal(response['Vary'], 'Accept-Encoding')
+    assert_equal(zlib.decompress(response.content, 16 + zlib.MAX_WBITS), content)
+
+    response = get('index', 'gzip;q=0.5, deflate')
+    assert_equal(response['Content-Encoding'], 'deflate')
+    assert_equal(zlib.decompress(response.content), content)
+
+    response = get('index', 'gzip;q=0, *;q=0')
+    assert not response.has_header('Content-Encoding')
+    assert_equal(response['Vary'], 'Accept-Encoding')
+    assert_equal(response.content, content)
+
+    response = get('index', 'gzip', streaming_formats=['json'])
+    assert_equal(response['Content-Encoding'], 'gzip')
+    assert_equal(zlib.decompress(''.join(response.streaming_content), 16 + zlib.MAX_WBITS), content)
+
+    response = get('show', 'gzip')
+    assert not response.has_header('Content-Encoding')
+    assert not response.has_header('Vary')
+
+    # Responses aren't compressed unless codings are given.
+    CompressedViews.compression_encodings = Views.compression_encodings
+
+    response = get('index', 'gzip, deflate')
+    assert not response.has_header('Content-Encoding')
+    assert not response.has_header('Vary')
+
+def test_missing_templates_are_remembered():
+    from respite import Views, templating
+    from django.test.client import RequestFactory
+
+    class ItemViews(Views):
+        supported_formats = ['html', 'json']
+
+        def index(self, request):
+            return self._render(request, template='articles/index', context={'articles': []})
+
+    templating.invalidate()
+
+    response = ItemViews().index(RequestFactory().get('/items.json'))
+
+    assert_equal(response.status_code, 200)
+    assert_equal(json.loads(response.content), {'articles': []})
+    assert not templating.exists('articles/index.json')
+    assert templating.exists('articles/index.html')
+
+    response = ItemViews().index(RequestFactory().get('/items.json'))
+
+    assert_equal(json.loads(response.content), {'articles': []})
+
+    with override_settings(DEBUG=True):
+        assert templating.exists('articles/index.json')
+
+    templating.invalidate()
+    templating.scan()
+
+    assert templating.exists('articles/index.html')
+    assert not templating.exists('articles/show.json')
+
+    templating.invalidate()
+
+def test_conditional_requests():
+    from respite import Views, Resource
+    from django.test.client import RequestFactory
+    from django.utils.http import http_date
+
+    author = Author.objects.create(name='John Doe')
+    article = Article.objects.create(title='Title', content='Content', author=author, created_at=datetime(1970, 1, 2))
+
+    class ArticleViews(Views, Resource):
+        model = Article
+        supported_formats = ['json']
+        last_modified_field = 'created_at'
+
+    def get(view, **headers):
+        if view == 'index':
+            return ArticleViews().index(RequestFactory().get('/articles.json', **headers))
+        else:
+            return ArticleViews().show(RequestFactory().get('/articles/%d.json' % article.id, **headers), article.id)
+
+    try:
+        response = get('show')
+        etag = response['ETag']
+
+        assert_equal(response.status_code, 200)
+        assert_equal(response['Last-Modified'], http_date(86400))
+
+        assert_equal(get('show', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        assert_equal(get('show', HTTP_IF_NONE_MATCH='"%s-gzip"' % etag.strip('"'))['ETag'], '"%s-gzip"' % etag.strip('"'))
+        assert_equal(get('show', HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+        assert_equal(get('show', HTTP_IF_MODIFIED_SINCE=http_date(86400)).status_code, 304)
+        assert_equal(get('show', HTTP_IF_MODIFIED_SINCE=http_date(86399)).status_code, 200)
+
+        response = get('index')
+        etag = response['ETag']
+
+        assert not response.has_header('Last-Modified')
+        assert_equal(get('index', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Article.objects.create(title='Title', content='Content', author=author, created_at=datetime(1970, 1, 1))
+
+        assert_equal(get('index', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        assert_equal(get('show', HTTP_IF_NONE_MATCH=get('show')['ETag']).status_code, 304)
+    finally:
+        Article.objects.all().delete()
+        author.delete()
+
+def test_head_skips_serialization():
+    from respite import Views, Resource
+    from django.db import connection
+    from django.test.client import RequestFactory
+    from django.test.utils import CaptureQueriesContext
+
+    class ArticleViews(Views, Resource):
+        model = Article
+        supported_formats = ['json']
+        compression_encodings = ['gzip']
+
+        def _serialize(self, request, format, context, status):
+            raise AssertionError('Responses to HEAD requests should not be serialized')
+
+    with CaptureQueriesContext(connection) as context:
+        response = ArticleViews().index(RequestFactory().head('/articles.json'))
+
+    assert_equal(response.status_code, 200)
+    assert_equal(response.content, '')
+    assert_equal(response['Content-Type'], 'application/json; charset=%s' % settings.DEFAULT_CHARSET)
+    assert_equal(response['Vary'], 'Accept-Encoding')
+    assert_equal(len(context.captured_queries), 0)
+
+    ArticleViews.last_modified_field = 'created_at'
+
+    response = ArticleViews().index(RequestFactory().head('/articles.json'))
+
+    assert response.has_header('ETag')
+
+def test_head_with_compression():
+    from respite import Views, Resource
+    from django.test.client import RequestFactory
+
+    author = Author.objects.create(name='John Doe')
+
+    for i in range(20):
+        Article.objects.create(title='Title %d' % i, content='Content', author=author, created_at=datetime(1970, 1, 1))
+
+    class ArticleViews(Views, Resource):
+        model = Article
+        supported_formats = ['json']
+        compression_encodings = ['gzip']
+        last_modified_field = 'created_at'
+
+    def request(method, path='/articles.json', **headers):
+        return ArticleViews().index(getattr(RequestFactory(), method)(path, **headers))
+
+    try:
+        # Responses to HEAD requests have the headers of responses to GET requests, however they're encoded.
+        for accept_encoding in ['gzip', 'identity']:
+            get = request('get', HTTP_ACCEPT_ENCODING=accept_encoding)
+            head = request('head', HTTP_ACCEPT_ENCODING=accept_encoding)
+
+            assert_equal(head.content, '')
+
+            for header in ['Content-Type', 'Content-Encoding', 'ETag', 'Vary']:
+                assert_equal(head.get(header), get.get(header))
+
+        assert_equal(head.get('Content-Encoding'), None)
+        assert_equal(request('head', HTTP_ACCEPT_ENCODING='gzip')['Content-Encoding'], 'gzip')
+        assert request('head', HTTP_ACCEPT_ENCODING='gzip')['ETag'].endswith('-gzip"')
+
+        ArticleViews.streaming_formats = ['json']
+
+        head = request('head', HTTP_ACCEPT_ENCODING='gzip')
+
+        assert_equal(head['Content-Encoding'], 'gzip')
+        assert_equal(''.join(head.streaming_content), '')
+    finally:
+        Article.objects.all().delete()
+        author.delete()
+
+@override_settings(RESPITE_RESPONSE_CACHE='default')
+def test_response_cache():
+    from respite import Views, Resource, caching
+    from django.db import connection
+    from django.test.client import RequestFactory
+    from django.test.utils import CaptureQueriesContext
+
+    author = Author.objects.create(name='John Doe')
+    article = Article.objects.create(title='Title', content='Content', author=author, created_at=datetime(1970, 1, 1))
+
+    class ArticleViews(Views, Resource):
+        model = Article
+        supported_formats = ['json']
+        cache_responses = True
+
+    def get(path='/articles.json', **headers):
+        with CaptureQueriesContext(connection) as context:
+            response = ArticleViews().index(RequestFactory().get(path, **headers))
+
+        return response, len(context.captured_queries)
+
+    try:
+        response, queries = get()
+        assert queries > 0
+
+        cached_response, queries = get()
+        assert_equal(queries, 0)
+        assert_equal(cached_response.content, response.content)
+        assert_equal(cached_response['Content-Type'], response['Content-Type'])
+        assert_equal(cached_response['Content-Length'], str(len(response.content)))
+
+        # Responses in other formats, with other query parameters or in other codings are cached apart.
+        assert get('/articles.json?expand=author')[1] > 0
+        assert_equal(get('/articles.json?expand=author')[1], 0)
+
+        # Responses link to pages by their absolute URLs, so they're cached apart by host and scheme.
+        assert get(HTTP_HOST='example.com')[1] > 0
+        assert_equal(get(HTTP_HOST='example.com')[1], 0)
+        assert get(**{'wsgi.url_scheme': 'https'})[1] > 0
+        assert_equal(get(**{'wsgi.url_scheme': 'https'})[1], 0)
+
+        # Responses are invalidated as the objects they represent change.
+        author.name = 'Jane Doe'
+        author.save()
+
+        response, queries = get('/articles.json?expand=author')
+        assert queries > 0
+        assert_equal(json.loads(response.content)['articles'][0]['author']['name'], 'Jane Doe')
+
+        article.delete()
+
+        response, queries = get()
+        assert queries > 0
+        assert_equal(json.loads(response.content)['articles'], [])
+    finally:
+        Article.objects.all().delete()
+        author.delete()
+
+        caching.get_response_cache().clear()
+
+@override_settings(RESPITE_RESPONSE_CACHE='default')
+def test_response_cache_dependencies():
+    from respite import Views, Resource, caching
+    from django.test.client import RequestFactory
+
+    class Writer(Author):
+        class Meta:
+            app_label = 'app'
+            proxy = True
+
+        def serialize(self):
+            return {
+                'name': self.name,
+                'articles': [article.title for article in self.articles.all()]
+            }
+
+    author = Writer.objects.create(name='John Doe')
+    article = Article.objects.create(title='Title', content='Content', author=author, created_at=datetime(1970, 1, 1))
+
+    class WriterViews(Views, Resource):
+        model = Writer
+        supported_formats = ['json']
+        cache_responses = True
+
+    def titles(views):
+        response = views().show(RequestFactory().get('/writers/%d.json' % author.id), author.id)
+
+        return json.loads(response.content)['writer']['articles']
+
+    try:
+        assert_equal(titles(WriterViews), ['Title'])
+
+        # Articles are embedded by a reverse relation, so their changes go unnoticed...
+        article.title = 'Updated'
+        article.save()
+
+        assert_equal(titles(WriterViews), ['Title'])
+
+        # ... unless responses are declared to depend on them.
+        class DependentWriterViews(WriterViews):
+            cache_dependencies = [Article]
+
+        assert_equal(titles(DependentWriterViews), ['Updated'])
+
+        article.title = 'Updated again'
+        article.save()
+
+        assert_equal(titles(DependentWriterViews), ['Updated again'])
+    finally:
+        Article.objects.all().delete()
+        author.delete()
+
+        caching.get_response_cache().clear()
+
+def test_pagination():
+    from respite import Views, Resource
+    from django.test.client import RequestFactory
+
+    author = Author.objects.create(name='John Doe')
+
+    for i in range(5):
+        Article.objects.create(title='Title %d' % i, content='Content', author=author, created_at=datetime(1970, 1, 5 - i % 3))
+
+    class ArticleViews(Views, Resource):
+        model = Article
+        supported_formats = ['json', 'csv']
+        page_size = 2
+        pagination_field = '-created_at'
+        count_objects = True
+
+    def get(url, views=ArticleViews):
+        return views().index(RequestFactory().get(url))
+
+    def titles(response):
+        return [article['title'] for article in json.loads(response.content)['articles']]
+
+    try:
+        # Articles are ordered by descending date and then by descending primary key.
+        expected = [article.title for article in Article.objects.order_by('-created_at', '-pk')]
+
+        response = get('/articles.json')
+        body = json.loads(response.content)
+
+        assert_equal(titles(response), expected[:2])
+        assert_equal(body['pagination']['previous'], None)
+        assert_equal(body['pagination']['count'], 5)
+        assert_equal(response['X-Total-Count'], '5')
+        assert_equal(response['Link'], '<%s>; rel="next"' % body['pagination']['next'])
+
+        response = get(body['pagination']['next'])
+        body = json.loads(response.content)
+
+        assert_equal(titles(response), expected[2:4])
+
+        last = get(body['pagination']['next'])
+
+        assert_equal(titles(last), expected[4:])
+        assert_equal(json.loads(last.content)['pagination']['next'], None)
+
+        response = get(json.loads(last.content)['pagination']['previous'])
+
+        assert_equal(titles(response), expected[2:4])
+
+        response = get(json.loads(response.content)['pagination']['previous'])
+
+        assert_equal(titles(response), expected[:2])
+        assert_equal(json.loads(response.content)['pagination']['previous'], None)
+
+        assert_equal(get('/articles.json?cursor=invalid').status_code, 400)
+
+        # Cursors that have been tampered with are rejected.
+        from respite.pagination import encode_cursor
+
+        for data in [
+            ['next'], ['next', 'abc', 'abc'], ['next', None, None], ['next', [1], 1], ['next', '1970-01-05T00:00:00', {}],
+            ['next', '1970-01-05T00:00:00', 10 ** 30], ['next', '1970-01-05T00:00:00', 1e400], ['last', '1970-01-05T00:00:00', 1]
+        ]:
+            assert_equal(get('/articles.json?cursor=%s' % encode_cursor(data)).status_code, 400)
+
+        # Pagination is given in the Link header alone in formats that are written row by row.
+        response = get('/articles.csv')
+
+        assert_equal(len(''.join(response.streaming_content).splitlines()), 3)
+
+        class OffsetArticleViews(ArticleViews):
+            pagination = 'offset'
+
+        expected = [article.title for article in Article.objects.order_by('pk')]
+
+        response = get('/articles.json', OffsetArticleViews)
+        body = json.loads(response.content)
+
+        assert_equal(titles(response), expected[:2])
+
+        response = get(body['pagination']['next'], OffsetArticleViews)
+
+        assert_equal(titles(response), expected[2:4])
+
+        response = get(json.loads(response.content)['pagination']['previous'], OffsetArticleViews)
+
+        assert_equal(titles(response), expected[:2])
+
+        for data in [['offset'], ['offset', -1], ['offset', '2'], ['offset', 2.5], ['offset', True], ['offset', 10 ** 30], ['next', 2]]:
+            assert_equal(get('/articles.json?cursor=%s' % encode_cursor(data), OffsetArticleViews).status_code, 400)
+    finally:
+        Article.objects.all().delete()
+        author.delete()
+
+def test_filtering_and_ordering():
+    import warnings
+    from respite import Views, Resource
+    from django.test.client import RequestFactory
+
+    john = Author.objects.create(name='John Doe')
+    jane = Author.objects.create(name='Jane Doe')
+
+    for i, author in enumerate([john, jane, john]):
+        Article.objects.create(title='Title %d' % i, content='Content', author=author, created_at=datetime(1970, 1, 1 + i))
+
+    class ArticleViews(Views, Resource):
+        model = Article
+        supported_formats = ['json']
+        filterable_fields = ['author', 'created_at__gte', 'title__in']
+        orderable_fields = ['created_at', 'title']
+
+    def get(url):
+        return ArticleViews().index(RequestFactory().get(url))
+
+    def titles(url):
+        return [article['title'] for article in json.loads(get(url).content)['articles']]
+
+    try:
+        assert_equal(titles('/articles.json?author=%d&order=-created_at' % john.id), ['Title 2', 'Title 0'])
+        assert_equal(titles('/articles.json?created_at__gte=1970-01-02&order=title'), ['Title 1', 'Title 2'])
+        assert_equal(titles('/articles.json?title__in=Title 0,Title 1&order=title'), ['Title 0', 'Title 1'])
+
+        # Query parameters that don't name fields are disregarded.
+        assert_equal(len(titles('/articles.json?_=1')), 3)
+
+        assert_equal(get('/articles.json?content=Content').status_code, 400)
+        assert_equal(get('/articles.json?author__name=John').status_code, 400)
+        assert_equal(get('/articles.json?order=content').status_code, 400)
+        assert_equal(get('/articles.json?author=John').status_code, 400)
+
+        # Resources that don't give any filterable fields aren't filtered.
+        class UnfilteredArticleViews(Views, Resource):
+            model = Article
+            supported_formats = ['json']
+
+        response = UnfilteredArticleViews().index(RequestFactory().get('/articles.json?author=%d&id=0' % john.id))
+
+        assert_equal(response.status_code, 200)
+        assert_equal(len(json.loads(response.content)['articles']), 3)
+
+        # Resources that don't give any orderable fields aren't ordered by the query either.
+        response = UnfilteredArticleViews().index(RequestFactory().get('/articles.json?order=-title'))
+
+        assert_equal(response.status_code, 200)
+        assert_equal([article['title'] for article in json.loads(response.content)['articles']], ['Title 0', 'Title 1', 'Title 2'])
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+
+            with override_settings(DEBUG=True):
+                get('/articles.json?author=%d&order=title' % john.id)
+
+        assert_equal([str(warning.message).split(' ')[0] for warning in caught], ['Article.title'])
+
+        # Paginated resources are paginated by the field they're ordered by.
+        ArticleViews.page_size = 2
+
+        response = get('/articles.json?order=-created_at')
+        next = json.loads(response.content)['pagination']['next']
+
+        assert_equal(titles('/articles.json?order=-created_at'), ['Title 2', 'Title 1'])
+        assert_equal(titles(next), ['Title 0'])
+        assert_equal(get('/articles.json?order=created_at,title').status_code, 400)
+    finally:
+        Article.objects.all().delete()
+        Author.objects.all().delete()
+
+def test_bulk():
+    from respite import Views, Resource
+    from respite.middleware import JsonMiddleware
+    from django.test.client import RequestFactory
+
+    author = Author.objects.create(name='John Doe')
+
+    class ArticleViews(Views, Resource):
+        model = Article
+        supported_formats = ['json']
+        bulk = True
+
+    def request(method, data):
+        request = getattr(RequestFactory(), method)('/articles.json', json.dumps(data), content_type='application/json')
+        JsonMiddleware().process_request(request)
+
+        return request
+
+    def article(title, **kwargs):
+        data = {'title': title, 'content': 'Content', 'author': author.id, 'created_at': '1970-01-01 00:00:00'}
+        data.update(kwargs)
+
+        return data
+
+    try:
+        response = ArticleViews().create(request('post', [article('Title 1'), article('Title 2', created_at='invalid')]))
+        results = json.loads(response.content)['results']
+
+        assert_equal(response.status_code, 400)
+        assert_equal([result['status'] for result in results], [424, 400])
+        assert_equal(Article.objects.count(), 0)
+
+        response = ArticleViews().create(request('post', [article('Title 1'), article('Title 2')]))
+        results = json.loads(response.content)['results']
+
+        assert_equal(response.status_code, 201)
+        assert_equal([result['article']['title'] for result in results], ['Title 1', 'Title 2'])
+
+        ids = [result['article']['id'] for result in results]
+
+        response = ArticleViews().bulk_update(request('patch', [{'id': ids[0], 'title': 'Updated'}, {'id': 0, 'title': 'Updated'}]))
+
+        assert_equal(response.status_code, 400)
+        assert_equal([result['status'] for result in json.loads(response.content)['results']], [424, 404])
+
+        response = ArticleViews().bulk_update(request('patch', [{'id': 'abc'}, {'id': '1' * 30}, {'title': 'Updated'}]))
+
+        assert_equal(response.status_code, 400)
+        assert_equal([result['status'] for result in json.loads(response.content)['results']], [400, 400, 400])
+
+        response = ArticleViews().bulk_update(request('patch', [{'id': ids[0], 'title': 'Updated'}]))
+
+        assert_equal(response.status_code, 200)
+        assert_equal(Article.objects.get(id=ids[0]).title, 'Updated')
+        assert_equal(Article.objects.get(id=ids[0]).content, 'Content')
+
+        response = ArticleViews().bulk_destroy(RequestFactory().delete('/articles.json?ids=%d,0' % ids[0]))
+
+        assert_equal(response.status_code, 400)
+        assert_equal(Article.objects.count(), 2)
+
+        for invalid in ['abc', [1], {'id': 1}, '1' * 30]:
+            response = ArticleViews().bulk_destroy(request('delete', [ids[0], invalid]))
+
+            assert_equal(response.status_code, 400)
+            assert_equal([result['status'] for result in json.loads(response.content)['results']], [200, 400])
+
+        response = ArticleViews().bulk_destroy(RequestFactory().delete('/articles.json?ids=%d,abc' % ids[0]))
+
+        assert_equal(response.status_code, 400)
+        assert_equal(Article.objects.count(), 2)
+
+        response = ArticleViews().bulk_destroy(request('delete', ids))
+
+        assert_equal(response.status_code, 200)
+        assert_equal(Article.objects.count(), 0)
+
+        ArticleViews.bulk = False
+
+        assert_equal(ArticleViews().bulk_destroy(request('delete', ids)).status_code, 405)
+    finally:
+        Article.objects.all().delete()
+        author.delete()
+
+def test_bulk_through_middleware():
+    from django.test.client import Client
+    from .project.app.views import ArticleViews
+
+    author = Author.objects.create(name='John Doe')
+
+    client = Client(enforce_csrf_checks=True)
+    client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+
+    def post(data):
+        return client.post('/news/articles/', json.dumps(data), content_type='application/json', HTTP_ACCEPT='application/json', HTTP_X_CSRFTOKEN='a' * 32)
+
+    ArticleViews.bulk = True
+
+    try:
+        response = post([
+            {'title': 'Title %d' % i, 'content': 'Content', 'author': author.id, 'created_at': '1970-01-01 00:00:00'} for i in range(2)
+        ])
+
+        assert_equal(response.status_code, 201)
+        assert_equal(Article.objects.count(), 2)
+
+        assert_equal(post({'title': 'Title'}).status_code, 400)
+    finally:
+        ArticleViews.bulk = False
+        Article.objects.all().delete()
+        author.delete()
+
+def test_batch():
+    from respite import Views, Resource, Batch
+    from django.test.client import RequestFactory
+
+    author = Author.objects.create(name='John Doe')
+    article = Article.objects.create(title='Title', content='Content', author=author, created_at=datetime(1970, 1, 1))
+
+    class BatchViews(Views, Batch):
+        supported_formats = ['json']
+
+    def batch(items, views=BatchViews, csrf_checks=False, **headers):
+        request = RequestFactory().post('/batch/', json.dumps(items), content_type='application/json', HTTP_ACCEPT='application/json', **headers)
+        request._dont_enforce_csrf_checks = not csrf_checks
+
+        return views().batch(request)
+
+    try:
+        response = batch([
+            {'method': 'GET', 'path': '/news/articles/%d' % article.id},
+            {'method': 'PATCH', 'path': '/news/articles/%d' % article.id, 'body': {'title': 'Updated'}},
+            {'method': 'GET', 'path': '/news/articles/%d?fields=title' % article.id},
+            {'method': 'GET', 'path': '/news/articles/0'},
+            {'method': 'GET', 'path': '/nowhere'}
+        ])
+
+        responses = json.loads(response.content)['responses']
+
+        assert_equal(response.status_code, 200)
+        assert_equal([item['status'] for item in responses], [200, 200, 200, 404, 404])
+        assert_equal(responses[0]['body']['article']['title'], 'Title')
+        assert_equal(responses[0]['headers']['Content-Type'], 'application/json; charset=%s' % settings.DEFAULT_CHARSET)
+        assert_equal(responses[1]['body']['article']['title'], 'Updated')
+        assert_equal(responses[2]['body'], {'article': {'title': 'Updated'}})
+
+        # Requests are checked for CSRF tokens unless the batch is exempt.
+        patch = {'method': 'PATCH', 'path': '/news/articles/%d' % article.id, 'body': {'title': 'Title'}}
+
+        response = batch([patch], csrf_checks=True)
+
+        assert_equal(json.loads(response.content)['responses'][0]['status'], 403)
+        assert_equal(Article.objects.get(id=article.id).title, 'Updated')
+
+        response = batch([patch], csrf_checks=True, HTTP_COOKIE='%s=%s' % (settings.CSRF_COOKIE_NAME, 'a' * 32), HTTP_X_CSRFTOKEN='a' * 32)
+
+        assert_equal(json.loads(response.content)['responses'][0]['status'], 200)
+        assert_equal(Article.objects.get(id=article.id).title, 'Title')
+
+        # Batches that change anything are run in turn, even if they may use threads.
+        class ThreadedBatchViews(BatchViews):
+            threads = 4
+
+        response = batch([
+            {'method': 'POST', 'path': '/news/articles/', 'body': {
+                'title': 'Another title', 'content': 'Content', 'author': author.id, 'created_at': '1970-01-01 00:00:00'
+            }},
+            {'method': 'GET', 'path': '/news/articles/?fields=title'},
+            {'method': 'GET', 'path': '/news/articles/?fields=title'}
+        ], ThreadedBatchViews)
+
+        responses = json.loads(response.content)['responses']
+
+        assert_equal([item['status'] for item in responses], [201, 200, 200])
+        assert_equal(responses[2]['body'], {'articles': [{'title': 'Title'}, {'title': 'Another title'}]})
+
+        # Cookies of responses are given with them.
+        from django.http import HttpResponse
+        from respite import formats
+
+        response = HttpResponse('Content', content_type='text/plain')
+        response.set_cookie('a', 'b', path='/')
+        response.set_cookie('c', 'd', max_age=60)
+
+        description = BatchViews()._describe_response(formats.find('json'), response)
+
+        assert_equal(description['body'], 'Content')
+        assert_equal(sorted(cookie.split(';')[0] for cookie in description['cookies']), ['a=b', 'c=d'])
+        assert_true('Max-Age=60' in [cookie for cookie in description['cookies'] if cookie.startswith('c=')][0])
+
+        assert_equal(batch({'path': '/news/articles/'}).status_code, 400)
+
+        BatchViews.max_requests = 1
+
+        assert_equal(batch([{'path': '/'}, {'path': '/'}]).status_code, 400)
+    finally:
+        Article.objects.all().delete()
+        author.delete()
+
+def test_batch_through_middleware():
+    from django.test.client import Client
+
+    author = Author.objects.create(name='John Doe')
+    article = Article.objects.create(title='Title', content='Content', author=author, created_at=datetime(1970, 1, 1))
+
+    client = Client(enforce_csrf_checks=True)
+    client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+
+    def batch(items, **headers):
+        return client.post('/news/batch/', json.dumps(items), content_type='application/json', HTTP_ACCEPT='application/json', **headers)
+
+    items = [
+        {'method': 'PATCH', 'path': '/news/articles/%d' % article.id, 'body': {'title': 'Updated'}},
+        {'method': 'GET', 'path': '/news/articles/%d' % article.id}
+    ]
+
+    try:
+        assert_equal(batch(items).status_code, 403)
+
+        response = batch(items, HTTP_X_CSRFTOKEN='a' * 32)
+        responses = json.loads(response.content)['responses']
+
+        assert_equal(response.status_code, 200)
+        assert_equal([item['status'] for item in responses], [200, 200])
+        assert_equal(responses[1]['body']['article']['title'], 'Updated')
+
+        # Batches can't be nested.
+        response = batch([{'method': 'POST', 'path': '/news/batch/', 'body': []}], HTTP_X_CSRFTOKEN='a' * 32)
+
+        assert_equal(json.loads(response.content)['responses'][0]['status'], 404)
+    finally:
+        Article.objects.all().delete()
+        author.delete()
+
+def test_batch_with_threads():
+    from respite import Views, Batch
+    from django.db import connections, DEFAULT_DB_ALIAS
+    from django.test.client import RequestFactory
+
+    connection = connections[DEFAULT_DB_ALIAS]
+
+    author = Author.objects.create(name='John Doe')
+
+    for i in range(8):
+        Article.objects.create(title='Title %d' % i, content='Content', author=author, created_at=datetime(1970, 1, 1))
+
+    class BatchViews(Views, Batch):
+        supported_formats = ['json']
+        threads = 4
+
+        def _run_concurrently(self, handler, request, state):
+            # Databases in memory are only shared by threads that share their connection.
+            connections[DEFAULT_DB_ALIAS] = connection
+
+            return super(BatchViews, self)._run_concurrently(handler, request, state)
+
+    request = RequestFactory().post(
+        path = '/batch/',
+        data = json.dumps(
+            [{'method': 'OPTIONS', 'path': '/news/articles/'}, {'method': 'HEAD', 'path': '/news/articles/'}] +
+            [{'method': 'GET', 'path': '/news/articles/%d' % article.id} for article in Article.objects.order_by('id')]
+        ),
+        content_type = 'application/json',
+        HTTP_ACCEPT = 'application/json'
+    )
+    request._dont_enforce_csrf_checks = True
+
+    connection.allow_thread_sharing = True
+
+    try:
+        responses = json.loads(BatchViews().batch(request).content)['responses']
+
+        assert_equal([item['status'] for item in responses], [200] * 10)
+        assert_equal([item['body']['article']['title'] for item in responses[2:]], ['Title %d' % i for i in range(8)])
+    finally:
+        connection.allow_thread_sharing = False
+
+        Article.objects.all().delete()
+        author.delete()